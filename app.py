@@ -1,12 +1,23 @@
 
-import gradio as gr
 import os
-import io
-import zipfile
-from datetime import datetime
-from src.document_processor import process_document
+import logging
+from contextlib import closing
+from src.document_processor import prefetch_legal_references
+from src.batch import iter_process_documents
 from src.checklist_verifier import verify_document_checklist
-from src.report_generator import generate_report
+from src.doc_classifier import classify_documents
+from src.report_generator import ReportAggregator, generate_report
+from src.rag_engine import rag_cache_stats, warmup
+from src.output_store import OutputStore, build_zip
+from src.metrics import METRICS, StageTimer, flush_metrics, serve_metrics
+
+logger = logging.getLogger(__name__)
+
+output_store = OutputStore()
+
+# Gradio queue: requests handled at once, and how many may wait (0 = unbounded).
+APP_CONCURRENCY = int(os.environ.get("ADGM_APP_CONCURRENCY", "2"))
+APP_QUEUE_SIZE = int(os.environ.get("ADGM_APP_QUEUE_SIZE", "32"))
 
 LEGAL_REFERENCES = {
     "Memorandum of Association": "ADGM Companies Regulations 2020, Section 12(1)",
@@ -27,68 +38,153 @@ required_docs = [
     "Shareholder Resolution"
 ]
 
-def analyze_documents(filepaths, debug=False):
+def _unique_arcname(name, taken):
+    """`name`, or "<stem>_<n><ext>" with the first free n when another upload already took it."""
+    stem, ext = os.path.splitext(name)
+    n = 1
+    while name in taken:
+        n += 1
+        name = f"{stem}_{n}{ext}"
+    return name
+
+def analyze_documents_stream(filepaths, debug=False, workers=None):
     """
-    filepaths: list of filepaths (strings) from gradio Files
-    returns: (report dict, zip path or None)
+    Generator version of `analyze_documents`: yields (partial report, None) as
+    each document finishes, then (final report, zip path). Closing the generator
+    (e.g. a cancelled Gradio request) cancels documents not yet started and
+    removes the run's scratch dir.
     """
     if not filepaths:
-        return {"error": "No files uploaded."}, None
+        yield {"error": "No files uploaded."}, None
+        return
+
+    filepaths = list(filepaths)
+    # Run-level stages; per-document ones come back in each result's timings_ms.
+    run_timer = StageTimer()
+    # Content-based types for the whole batch; filenames are only the fallback.
+    with run_timer.stage("classification"):
+        detected_types = classify_documents(filepaths)
+    checklist_result = verify_document_checklist(filepaths, detected_types)
+    detected_process = checklist_result.get("process", "Unknown")
+    # One batched RAG lookup for every rule citation in this upload.
+    with run_timer.stage("rag_prefetch"):
+        references = prefetch_legal_references()
+
+
+    if debug:
+        logger.info("Processing serially: %s", filepaths)
+        workers = 1
 
-  
-    checklist_result = verify_document_checklist(list(filepaths))
+    zip_path = None
+    results = [None] * len(filepaths)
+    # Partial reports grow one result at a time instead of being rebuilt per yield.
+    partial_report = ReportAggregator(checklist_result, detected_process)
+    # Reviewed copies are written to a per-run scratch dir, moved into the
+    # content-addressed store, and the scratch dir is removed afterwards.
+    with output_store.run_dir() as run_dir:
+        with closing(iter_process_documents(
+            filepaths,
+            workers=workers,
+            checklist_result=checklist_result,
+            # One subdir per upload: two uploads named alike must not share a reviewed path.
+            output_dirs=[os.path.join(run_dir, f"{i:04d}") for i in range(len(filepaths))],
+            debug=debug,
+            references=references
+        )) as finished:
+            for done, (i, r) in enumerate(finished, 1):
+                METRICS.observe_document(r)
+                p = r.get("reviewed_path")
+                if p and os.path.exists(p):
+                    with run_timer.stage("store"):
+                        # "<base>_reviewed-<hash>.docx": readable in downloads, still content-addressed.
+                        r["reviewed_path"] = output_store.put_file(p, prefix=os.path.splitext(os.path.basename(p))[0])
+                    r["_arcname"] = os.path.basename(p)
+                else:
+                    r["reviewed_path"] = None
+                results[i] = r
+                if done < len(filepaths):
+                    partial_report.add(r)
+                    partial = partial_report.snapshot()
+                    partial["progress"] = {"completed": done, "total": len(filepaths)}
+                    yield partial, None
+        to_zip = {}
+        for r in results:
+            if "_arcname" in r:
+                to_zip[_unique_arcname(r.pop("_arcname"), to_zip)] = r["reviewed_path"]
+        if to_zip:
+            with run_timer.stage("zip"):
+                zip_path = output_store.put_bytes(build_zip(to_zip), ".zip", prefix="reviewed_docs")
+    output_store.evict()
+
+    rag_cache = rag_cache_stats()
+    METRICS.observe_stages(run_timer.timings)
+    METRICS.observe_rag_cache(rag_cache)
+    flush_metrics()
+    report = generate_report(results, checklist_result, detected_process)
+    report["run_timings_ms"] = run_timer.timings
+    report["rag_query_cache"] = rag_cache
+    yield report, zip_path
+
+
+def analyze_documents(filepaths, debug=False, workers=None):
+    """
+    filepaths: list of filepaths (strings) from gradio Files
+    workers: process-pool size (default ADGM_WORKERS); debug runs serially
+    returns: (report dict, zip path or None)
+    """
+    final = ({"error": "No files uploaded."}, None)
+    for final in analyze_documents_stream(filepaths, debug=debug, workers=workers):
+        pass
+    return final
 
 
-    processed_docs = []
-    reviewed_paths = []
-    for fp in filepaths:
-        if debug:
-            print("[DEBUG] Processing:", fp)
-        result = process_document(fp, checklist_result=checklist_result, debug=debug)
-        processed_docs.append(result)
-        if result.get("reviewed_path"):
-            reviewed_paths.append(result["reviewed_path"])
+_demo = None
 
 
-    detected_process = checklist_result.get("process", "Unknown")
-    final_report = generate_report(processed_docs, checklist_result, detected_process)
+def build_demo():
+    """Build the Gradio UI. gradio is imported here so importing app.py stays cheap."""
+    import gradio as gr
 
-    zip_path = None
-    if reviewed_paths:
-        buf = io.BytesIO()
-        with zipfile.ZipFile(buf, "w", zipfile.ZIP_DEFLATED) as z:
-            for p in reviewed_paths:
-                if p and os.path.exists(p):
-                    z.write(p, arcname=os.path.basename(p))
-        buf.seek(0)
-        os.makedirs("tmp_reviewed", exist_ok=True)
-        zip_filename = f"reviewed_docs_{datetime.now().strftime('%Y%m%d_%H%M%S')}.zip"
-        zip_path = os.path.join("tmp_reviewed", zip_filename)
-        with open(zip_path, "wb") as fh:
-            fh.write(buf.read())
+    with gr.Blocks() as demo:
+        gr.Markdown("# 📄 ADGM Corporate Agent — MVP")
+        gr.Markdown("Upload one or more `.docx` files for ADGM compliance review.")
 
-    return final_report, zip_path
+        with gr.Row():
+            file_input = gr.Files(label="Upload .docx files", file_types=[".docx"], type="filepath")
+            debug_check = gr.Checkbox(label="Enable debug logs in console", value=False)
 
+        with gr.Row():
+            analyze_button = gr.Button("🔍 Analyze Documents", variant="primary")
+            cancel_button = gr.Button("⏹ Cancel")
 
-with gr.Blocks() as demo:
-    gr.Markdown("# 📄 ADGM Corporate Agent — MVP")
-    gr.Markdown("Upload one or more `.docx` files for ADGM compliance review.")
+        with gr.Row():
+            output_json = gr.JSON(label="📊 Analysis Report (JSON)")
+            output_zip = gr.File(label="⬇ Download Reviewed Documents (.zip)")
 
-    with gr.Row():
-        file_input = gr.Files(label="Upload .docx files", file_types=[".docx"], type="filepath")
-        debug_check = gr.Checkbox(label="Enable debug logs in console", value=False)
+        # A generator handler: the JSON panel updates as each document finishes.
+        analysis = analyze_button.click(
+            fn=analyze_documents_stream,
+            inputs=[file_input, debug_check],
+            outputs=[output_json, output_zip],
+            concurrency_limit=APP_CONCURRENCY
+        )
+        cancel_button.click(fn=None, cancels=[analysis])
+    demo.queue(default_concurrency_limit=APP_CONCURRENCY, max_size=APP_QUEUE_SIZE or None)
+    return demo
 
-    analyze_button = gr.Button("🔍 Analyze Documents", variant="primary")
 
-    with gr.Row():
-        output_json = gr.JSON(label="📊 Analysis Report (JSON)")
-        output_zip = gr.File(label="⬇ Download Reviewed Documents (.zip)")
+def __getattr__(name):
+    # Keeps `app.demo` working (e.g. for the `gradio app.py` reloader) without
+    # building the UI on plain import.
+    global _demo
+    if name == "demo":
+        if _demo is None:
+            _demo = build_demo()
+        return _demo
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
-    analyze_button.click(
-        fn=analyze_documents,
-        inputs=[file_input, debug_check],
-        outputs=[output_json, output_zip]
-    )
 
 if __name__ == "__main__":
-    demo.launch(share=True, server_name="0.0.0.0", server_port=7860)
+    warmup()
+    serve_metrics()
+    build_demo().launch(share=True, server_name="0.0.0.0", server_port=7860)
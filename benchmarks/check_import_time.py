@@ -0,0 +1,62 @@
+"""
+Import-time budget for the CLI entry point.
+
+Runs `import src.cli` in fresh interpreters and fails (exit 1) if the best
+wall-clock time, minus a bare interpreter start, exceeds the budget or if a
+heavy dependency gets imported eagerly.
+
+    python benchmarks/check_import_time.py [--budget-ms 150] [--runs 5]
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+DEFAULT_BUDGET_MS = float(os.environ.get("ADGM_IMPORT_BUDGET_MS", "150"))
+FORBIDDEN_MODULES = ["sklearn", "scipy", "numpy", "gradio", "docx"]
+
+_PROBE = (
+    "import json, sys; import {module}; "
+    "print(json.dumps(sorted(m for m in {forbidden!r} if m in sys.modules)))"
+)
+
+
+def _best_time(code: str, runs: int):
+    best, out = None, ""
+    for _ in range(runs):
+        t0 = time.perf_counter()
+        proc = subprocess.run([sys.executable, "-c", code], cwd=ROOT, capture_output=True, text=True, check=True)
+        elapsed = time.perf_counter() - t0
+        out = proc.stdout
+        best = elapsed if best is None else min(best, elapsed)
+    return best, out
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--module", default="src.cli")
+    parser.add_argument("--budget-ms", type=float, default=DEFAULT_BUDGET_MS)
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args(argv)
+
+    baseline, _ = _best_time("pass", args.runs)
+    total, out = _best_time(_PROBE.format(module=args.module, forbidden=FORBIDDEN_MODULES), args.runs)
+    import_ms = max(0.0, (total - baseline) * 1000.0)
+    eager = json.loads(out.strip() or "[]")
+
+    result = {
+        "module": args.module,
+        "import_ms": round(import_ms, 1),
+        "budget_ms": args.budget_ms,
+        "eager_heavy_imports": eager,
+        "ok": import_ms <= args.budget_ms and not eager,
+    }
+    print(json.dumps(result, indent=2))
+    return 0 if result["ok"] else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
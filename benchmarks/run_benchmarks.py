@@ -0,0 +1,245 @@
+"""
+Pipeline benchmarks against a stored baseline.
+
+Generates a synthetic corpus (see synthetic_docs.py), times each pipeline stage
+per document size (best of --repeat runs), prints the results as JSON and
+compares them with the baseline. Timings are compared relative to a fixed
+calibration workload timed in the same run, so a baseline recorded on a faster
+or slower machine still applies. The run fails (exit 1) if any stage is more
+than --tolerance slower than its scaled baseline and by more than --floor-ms.
+A baseline without a calibration timing is only used on the same platform.
+
+    python benchmarks/run_benchmarks.py [--sizes 10 1000 20000] [--repeat 3]
+        [--baseline benchmarks/baseline.json] [--update-baseline] [--output results.json]
+"""
+import argparse
+import json
+import os
+import platform
+import re
+import shutil
+import sys
+import tempfile
+import time
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+DEFAULT_BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baseline.json")
+RAG_REF_FILES = 30
+# Sentences in the calibration workload (the pre-PatternScanner checks over fixed text).
+CALIBRATION_SENTENCES = 20000
+RAG_QUERIES = ["jurisdiction of the courts", "signature block", "ambiguous wording", "numbered clauses",
+               "register of members", "beneficial ownership", "share transfer", "board quorum"] * 25
+
+
+def _best(fn, repeat, setup=None):
+    """Best wall-clock milliseconds of `fn(*setup())` over `repeat` runs (setup untimed)."""
+    best = None
+    for _ in range(repeat):
+        args = setup() if setup else ()
+        t0 = time.perf_counter()
+        fn(*args)
+        ms = (time.perf_counter() - t0) * 1000.0
+        best = ms if best is None else min(best, ms)
+    return round(best, 3)
+
+
+def _write_refs(ref_dir):
+    from synthetic_docs import SENTENCES
+    import random
+
+    rng = random.Random(7)
+    os.makedirs(ref_dir, exist_ok=True)
+    for i in range(RAG_REF_FILES):
+        body = "\n".join(f"Section {k}. " + " ".join(rng.sample(SENTENCES, 3)) for k in range(150))
+        with open(os.path.join(ref_dir, f"regulation_{i:02d}.txt"), "w", encoding="utf-8") as fh:
+            fh.write(body)
+
+
+def bench_rag(work, repeat):
+    from src.rag_engine import LocalRAG, sklearn_available
+
+    ref_dir = os.path.join(work, "refs")
+    _write_refs(ref_dir)
+    results = {}
+    for retriever, suffix in (("tfidf", ""), ("bm25", "_bm25")):
+        if retriever == "tfidf" and not sklearn_available():
+            continue
+        results[f"build{suffix}_ms"] = _best(lambda: LocalRAG(ref_dir, use_index=False, retriever=retriever), repeat)
+        index_dir = os.path.join(work, f"rag_index{suffix}")
+        LocalRAG(ref_dir, index_dir=index_dir, retriever=retriever)
+        results[f"index_load{suffix}_ms"] = _best(lambda: LocalRAG(ref_dir, index_dir=index_dir, retriever=retriever), repeat)
+        rag = LocalRAG(ref_dir, use_index=False, retriever=retriever)
+
+        def uncached():
+            rag._cache.clear()
+            return ()
+
+        results[f"query{suffix}_ms"] = round(_best(lambda: [rag.query(q) for q in RAG_QUERIES], repeat, uncached) / len(RAG_QUERIES), 4)
+        results[f"query_batch{suffix}_ms"] = _best(lambda: rag.query_many(RAG_QUERIES), repeat, uncached)
+    return results
+
+
+def _scan_baseline(dp, full_text):
+    """The per-sentence checks PatternScanner replaced (re.split, then re.search / `in`), for comparison."""
+    flagged = [s for s in re.split(r"(?<=[\.\?\!])\s+", full_text)
+               if any(re.search(pat, s.lower()) for pat in dp.AMBIGUOUS_PATTERNS)]
+    low = full_text.lower()
+    return flagged, [ind for ind in dp.JURISDICTION_INDICATORS if ind in low]
+
+
+def bench_calibration(repeat):
+    """Milliseconds of a fixed workload that no change to src/ affects; the unit other timings are scaled by."""
+    from synthetic_docs import SENTENCES
+    from src import document_processor as dp
+
+    text = " ".join(SENTENCES[i % len(SENTENCES)] for i in range(CALIBRATION_SENTENCES))
+    return {"calibration_ms": _best(lambda: _scan_baseline(dp, text), repeat)}
+
+
+def _stream_scan(scanner, texts):
+    stream = scanner.stream()
+    for i, text in enumerate(texts):
+        stream.feed(("\n" if i else "") + text)
+    return stream.close()
+
+
+def bench_document(path, work, repeat):
+    import app
+    from src import document_processor as dp
+    from src.comment_inserter import insert_comment, insert_comments
+    from src.file_utils import read_docx, read_docx_text, write_docx
+    from src.rules import DocumentContext, run_rules
+
+    results = {
+        "read_docx_ms": _best(lambda: read_docx(path), repeat),
+        "read_docx_text_ms": _best(lambda: read_docx_text(path), repeat),
+    }
+    doc, paragraphs, full_text, offsets = read_docx(path)
+    results["scan_ms"] = _best(lambda: dp._scan(full_text), repeat)
+    results["scan_baseline_ms"] = _best(lambda: _scan_baseline(dp, full_text), repeat)
+    results["stream_analysis_ms"] = _best(lambda: dp._analyze_stream(path, {}), repeat)
+    # Worst case for the streaming window: no sentence boundary anywhere.
+    unpunctuated = [re.sub(r"[\.\?\!]", ";", p.text) for p in paragraphs]
+    results["stream_scan_no_boundary_ms"] = _best(lambda: _stream_scan(dp.get_scanner(), unpunctuated), repeat)
+    matches = dp._scan(full_text)
+
+    rule_ms = {}
+    for _ in range(repeat):
+        ctx = DocumentContext(path, paragraphs, full_text, offsets, matches)
+        issues, timings = run_rules(ctx)
+        for name, ms in timings.items():
+            rule_ms[name] = min(ms, rule_ms.get(name, ms))
+    for name, ms in rule_ms.items():
+        results[f"rule_{name.replace(' ', '_')}_ms"] = ms
+    dp._resolve_legal_references(issues, {})
+    checklist = {"process": "Company Incorporation", "missing_documents": [{"document": "UBO Declaration Form", "legal_citation": ""}]}
+
+    def fresh_doc():
+        return (read_docx(path)[0],)
+
+    def comment_specs(d):
+        ps = d.paragraphs
+        return [(ps[min(it.get("paragraph_index") or 0, len(ps) - 1)], it["issue"], None) for it in issues]
+
+    results["insert_comment_ms"] = _best(lambda d: [insert_comment(p, t) for p, t, _ in comment_specs(d)], repeat, fresh_doc)
+    results["insert_comments_native_ms"] = _best(lambda d: insert_comments(d, comment_specs(d), mode="native"), repeat, fresh_doc)
+    results["front_summary_ms"] = _best(lambda d: dp._create_front_summary_and_merge(d, issues, checklist), repeat, fresh_doc)
+    out = os.path.join(work, "saved.docx")
+    results["save_ms"] = _best(lambda d: write_docx(d, out), repeat, fresh_doc)
+    results["end_to_end_ms"] = _best(lambda: app.analyze_documents([path], workers=1), repeat)
+    results["issues"] = len(issues)
+    return results
+
+
+def machine_scale(results, baseline):
+    """This machine's speed relative to the baseline's: calibration time here / there."""
+    here = results.get("calibration", {}).get("calibration_ms")
+    there = baseline.get("calibration", {}).get("calibration_ms")
+    return here / there if here and there else None
+
+
+def compare(results, baseline, tolerance, floor_ms, scale=1.0):
+    """
+    Stages slower than their baseline, scaled by `scale` (see machine_scale), by
+    more than `tolerance` (fraction) and `floor_ms`.
+    """
+    regressions = []
+    for group, stages in results.items():
+        if group == "calibration":
+            continue
+        for stage, ms in stages.items():
+            base = baseline.get(group, {}).get(stage)
+            if not stage.endswith("_ms") or base is None:
+                continue
+            expected = base * scale
+            if ms > expected * (1.0 + tolerance) and ms - expected > floor_ms:
+                regressions.append({"benchmark": f"{group}.{stage}", "baseline_ms": base, "expected_ms": round(expected, 3),
+                                    "ms": ms, "ratio": round(ms / expected, 2) if expected else None})
+    return regressions
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10, 1000, 20000])
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE)
+    parser.add_argument("--update-baseline", action="store_true", help="Write these results as the new baseline")
+    parser.add_argument("--tolerance", type=float, default=0.5, help="Allowed slowdown as a fraction of the baseline")
+    parser.add_argument("--floor-ms", type=float, default=5.0, help="Ignore slowdowns smaller than this")
+    parser.add_argument("--output", help="Also write the JSON results here")
+    args = parser.parse_args(argv)
+
+    work = tempfile.mkdtemp(prefix="adgm-bench-")
+    # Isolate the run: no persistent result cache, outputs under the scratch dir.
+    os.environ["ADGM_RESULT_CACHE"] = "0"
+    os.environ["ADGM_OUTPUT_DIR"] = os.path.join(work, "out")
+    os.environ["ADGM_CACHE_DIR"] = os.path.join(work, "cache")
+    sys.path[:0] = [ROOT, os.path.dirname(os.path.abspath(__file__))]
+    os.chdir(ROOT)
+    # Pipeline logging goes to stderr so stdout stays pure JSON.
+    stdout, sys.stdout = sys.stdout, sys.stderr
+    try:
+        from synthetic_docs import make_corpus
+
+        results = {"calibration": bench_calibration(args.repeat), "rag": bench_rag(work, args.repeat)}
+        for size, path in zip(args.sizes, make_corpus(os.path.join(work, "docs"), args.sizes)):
+            results[f"doc_{size}"] = bench_document(path, work, args.repeat)
+    finally:
+        sys.stdout = stdout
+        shutil.rmtree(work, ignore_errors=True)
+
+    meta = {"python": platform.python_version(), "platform": platform.platform(),
+            "sizes": args.sizes, "repeat": args.repeat}
+    baseline, scale, skipped = {}, None, None
+    if os.path.exists(args.baseline) and not args.update_baseline:
+        with open(args.baseline, "r", encoding="utf-8") as fh:
+            saved = json.load(fh)
+        baseline = saved.get("results", {})
+        scale = machine_scale(results, baseline)
+        if scale is None and saved.get("meta", {}).get("platform") != meta["platform"]:
+            skipped = "baseline has no calibration timing and was recorded on another platform"
+            baseline = {}
+    regressions = compare(results, baseline, args.tolerance, args.floor_ms, scale or 1.0)
+    report = {
+        "meta": meta,
+        "results": results,
+        "baseline": args.baseline if baseline else None,
+        "machine_scale": round(scale, 3) if scale else None,
+        "baseline_skipped": skipped,
+        "regressions": regressions,
+        "ok": not regressions,
+    }
+    text = json.dumps(report, indent=2)
+    print(text)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as fh:
+            fh.write(text + "\n")
+    if args.update_baseline:
+        with open(args.baseline, "w", encoding="utf-8") as fh:
+            json.dump({"meta": report["meta"], "results": results}, fh, indent=2)
+            fh.write("\n")
+    return 0 if report["ok"] else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,94 @@
+"""
+Synthetic .docx corpus for benchmarks.
+
+Documents look like ADGM corporate filings: a title, numbered clauses and
+sub-clauses, ambiguous wording ("may", "best endeavours", ...), jurisdiction
+phrases, a table every few hundred paragraphs and a signature block at the end.
+Output is deterministic for a given (paragraphs, seed).
+
+    python benchmarks/synthetic_docs.py OUT_DIR [--sizes 10 1000 20000] [--seed 0]
+"""
+import argparse
+import os
+import random
+import sys
+from typing import List
+
+from docx import Document
+
+TITLES = ["ARTICLES OF ASSOCIATION", "MEMORANDUM OF ASSOCIATION", "BOARD RESOLUTION", "EMPLOYMENT CONTRACT"]
+SENTENCES = [
+    "The Company shall maintain a register of members at its registered office.",
+    "The Directors may at their sole discretion decline to register any transfer of shares.",
+    "Each party shall use best endeavours to procure that the obligations are performed.",
+    "This Agreement is subject to the approval of the Registration Authority.",
+    "Any dispute shall be referred to the UAE Federal Courts.",
+    "The parties submit to the exclusive jurisdiction of the ADGM Courts.",
+    "Notices shall be given in writing to the address stated above.",
+    "The Company may endeavour to distribute dividends annually.",
+    "Disputes arising hereunder may be heard by the Dubai Courts.",
+    "The quorum for a meeting of the Board shall be two Directors.",
+    "Shares shall be issued fully paid and shall rank pari passu.",
+    "The Employee shall comply with all lawful instructions of the Employer.",
+]
+SIGNATURE_BLOCK = [
+    "Signed for and on behalf of the Company",
+    "Authorised Signatory",
+    "Name: ____________________",
+    "Signature: ____________________",
+    "Date: 01/02/2024",
+]
+TABLE_EVERY = 250
+
+
+def _paragraph_texts(paragraphs: int, rng: random.Random) -> List[str]:
+    body = max(1, paragraphs - len(SIGNATURE_BLOCK) - 1)
+    texts = []
+    clause = 0
+    for i in range(body):
+        if i % 12 == 0:
+            clause += 1
+            texts.append(f"{clause}. " + rng.choice(SENTENCES))
+        elif i % 4 == 0:
+            texts.append(f"{clause}.{i % 12 // 4}. " + " ".join(rng.sample(SENTENCES, 2)))
+        else:
+            texts.append(" ".join(rng.sample(SENTENCES, rng.randint(1, 3))))
+    return texts
+
+
+def make_docx(path: str, paragraphs: int, seed: int = 0) -> str:
+    """Write a synthetic document with roughly `paragraphs` body paragraphs."""
+    rng = random.Random(seed * 100003 + paragraphs)
+    doc = Document()
+    doc.add_paragraph(rng.choice(TITLES))
+    for i, text in enumerate(_paragraph_texts(paragraphs, rng)):
+        doc.add_paragraph(text)
+        if i and i % TABLE_EVERY == 0:
+            table = doc.add_table(rows=3, cols=3)
+            for r, row in enumerate(table.rows):
+                for c, cell in enumerate(row.cells):
+                    cell.text = f"Shareholder {r}-{c}" if r else ["Name", "Shares", "Class"][c]
+    for text in SIGNATURE_BLOCK:
+        doc.add_paragraph(text)
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    doc.save(path)
+    return path
+
+
+def make_corpus(out_dir: str, sizes: List[int], seed: int = 0) -> List[str]:
+    return [make_docx(os.path.join(out_dir, f"synthetic_{n}.docx"), n, seed) for n in sizes]
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("out_dir")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10, 1000, 20000])
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+    for path in make_corpus(args.out_dir, args.sizes, args.seed):
+        print(path)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
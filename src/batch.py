@@ -0,0 +1,138 @@
+import os
+import logging
+import threading
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, as_completed, wait
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from .document_processor import process_document
+from .rag_engine import warmup
+from .template_diff import get_template_library
+
+logger = logging.getLogger(__name__)
+
+# Number of worker processes for multi-document runs; 1 (or less) means serial.
+WORKERS = int(os.environ.get("ADGM_WORKERS", "1"))
+
+# Shared process pools keyed by size: requests asking for different worker
+# counts each get their own pool instead of tearing down one another's.
+_pools: Dict[int, ProcessPoolExecutor] = {}
+_pool_lock = threading.Lock()
+
+
+def _init_worker():
+    # Build (or memory-map) the RAG index and fingerprint the templates once per
+    # worker, not once per task.
+    warmup()
+    get_template_library()
+
+
+def _get_pool(workers: int) -> ProcessPoolExecutor:
+    """Shared process pool with `workers` processes, created on first use."""
+    with _pool_lock:
+        pool = _pools.get(workers)
+        if pool is None:
+            # spawn: the Gradio server is multi-threaded, so forking it is unsafe.
+            pool = _pools[workers] = ProcessPoolExecutor(
+                max_workers=workers,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_init_worker,
+            )
+        return pool
+
+
+def shutdown_pool() -> None:
+    with _pool_lock:
+        pools = list(_pools.values())
+        _pools.clear()
+    for pool in pools:
+        pool.shutdown(wait=True, cancel_futures=True)
+
+
+def _discard_pool(workers: int, pool: ProcessPoolExecutor) -> None:
+    """Forget a broken pool (unless another request already replaced it) and shut it down."""
+    with _pool_lock:
+        if _pools.get(workers) is pool:
+            del _pools[workers]
+    pool.shutdown(wait=True, cancel_futures=True)
+
+
+def _failure_result(filepath: str, error: BaseException) -> Dict[str, Any]:
+    return {
+        "file_name": os.path.basename(filepath),
+        "document_type": "Unknown",
+        "issues": [{"issue": f"Processing failed: {error}", "severity": "High"}],
+        "reviewed_path": None
+    }
+
+
+def _process_safely(filepath: str, kwargs: Dict[str, Any]) -> Dict[str, Any]:
+    try:
+        return process_document(filepath, **kwargs)
+    except Exception as e:
+        logger.exception("Failed to process %s", filepath)
+        return _failure_result(filepath, e)
+
+
+def mirrored_output_dirs(filepaths: List[str], output_dir: str) -> List[str]:
+    """
+    Output dir per file that mirrors its directory relative to the inputs' common
+    directory, so entityA/articles.docx and entityB/articles.docx do not overwrite
+    each other's reviewed copy.
+    """
+    if not filepaths:
+        return []
+    dirs = [os.path.dirname(os.path.abspath(fp)) for fp in filepaths]
+    try:
+        root = os.path.commonpath(dirs)
+    except ValueError:  # different drives
+        return [os.path.join(output_dir, f"{i:04d}") for i in range(len(filepaths))]
+    return [os.path.normpath(os.path.join(output_dir, os.path.relpath(d, root))) for d in dirs]
+
+
+def iter_process_documents(filepaths: List[str], workers: Optional[int] = None, output_dirs: Optional[List[str]] = None,
+                           **kwargs) -> Iterator[Tuple[int, Dict[str, Any]]]:
+    """
+    Run `process_document(fp, **kwargs)` for every file and yield (index, result)
+    as each one finishes. A failing document yields an error result instead of
+    aborting the batch. workers <= 1 runs serially in this process (handy for debugging).
+    `output_dirs` optionally gives each file its own output_dir (see mirrored_output_dirs).
+    """
+    workers = WORKERS if workers is None else workers
+    per_file = [dict(kwargs, output_dir=d) for d in output_dirs] if output_dirs else [kwargs] * len(filepaths)
+    if workers <= 1 or len(filepaths) <= 1:
+        for i, fp in enumerate(filepaths):
+            yield i, _process_safely(fp, per_file[i])
+        return
+
+    pool = _get_pool(workers)
+    futures = {pool.submit(_process_safely, fp, per_file[i]): i for i, fp in enumerate(filepaths)}
+    broken = False
+    try:
+        for fut in as_completed(futures):
+            i = futures[fut]
+            try:
+                yield i, fut.result()
+            except BrokenProcessPool as e:
+                broken = True
+                yield i, _failure_result(filepaths[i], e)
+            except Exception as e:
+                yield i, _failure_result(filepaths[i], e)
+    finally:
+        for fut in futures:
+            fut.cancel()
+        # Let documents already running finish, so nothing writes into the
+        # caller's output dir after an early close (e.g. a cancelled request).
+        wait(futures)
+        if broken:
+            _discard_pool(workers, pool)
+
+
+def process_documents(filepaths: List[str], workers: Optional[int] = None, output_dirs: Optional[List[str]] = None,
+                      **kwargs) -> List[Dict[str, Any]]:
+    """`iter_process_documents`, collected back into upload order."""
+    results = [None] * len(filepaths)
+    for i, result in iter_process_documents(filepaths, workers=workers, output_dirs=output_dirs, **kwargs):
+        results[i] = result
+    return results
@@ -0,0 +1,173 @@
+import os
+import re
+import json
+import math
+import heapq
+from array import array
+from collections import Counter
+from typing import Dict, Iterable, List, Sequence, Tuple
+
+# numpy is optional: postings live in `array` buffers and are viewed as numpy
+# arrays (zero-copy) for vectorized scoring when it is installed. Imported on
+# first search, not at module import.
+_np = None
+_NUMPY_AVAILABLE = None
+
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+_TOKEN_RE = re.compile(r"(?u)\b\w\w+\b")
+# Small built-in list so the retriever does not depend on sklearn's stop words.
+STOP_WORDS = frozenset("""
+a about above after again against all also am an and any are as at be because been before being below
+between both but by can could did do does doing down during each either else etc for from further had
+has have having he her here hers herself him himself his how however i if in into is it its itself just
+me more most my myself no nor not now of off on once only or other our ours ourselves out over own per
+same she should so some such than that the their theirs them themselves then there these they this those
+through to too under until up upon us very via was we were what when where whether which while who whom
+why with within without would you your yours yourself yourselves
+""".split())
+
+
+def _numpy_available() -> bool:
+    global _np, _NUMPY_AVAILABLE
+    if _NUMPY_AVAILABLE is None:
+        try:
+            import numpy as _np
+            _NUMPY_AVAILABLE = True
+        except Exception:
+            _NUMPY_AVAILABLE = False
+    return _NUMPY_AVAILABLE
+
+
+def tokenize(text: str) -> List[str]:
+    return [t for t in _TOKEN_RE.findall(text.lower()) if t not in STOP_WORDS]
+
+
+class BM25Index:
+    """
+    Okapi BM25 over a fixed set of passages, stored as a CSR-style inverted index:
+    `indptr[t]:indptr[t + 1]` slices `ids` (passage ids) and `weights` for term t.
+    Weights are the full per-posting BM25 contribution (idf included), so scoring
+    a query is a sum over its terms' postings. Scores returned by `search_many`
+    are divided by the query's best achievable score, giving [0, 1].
+    """
+
+    def __init__(self, k1: float = BM25_K1, b: float = BM25_B):
+        self.k1 = k1
+        self.b = b
+        self.vocab: Dict[str, int] = {}
+        self.idf = array("f")
+        self.indptr = array("q", [0])
+        self.ids = array("i")
+        self.weights = array("f")
+        self.n_passages = 0
+
+    @classmethod
+    def build(cls, texts: Iterable[str], k1: float = BM25_K1, b: float = BM25_B) -> "BM25Index":
+        index = cls(k1, b)
+        vocab = index.vocab
+        postings: List[Tuple[array, array]] = []
+        lengths = array("i")
+        for pid, text in enumerate(texts):
+            tokens = tokenize(text)
+            lengths.append(len(tokens))
+            for term, tf in Counter(tokens).items():
+                tid = vocab.get(term)
+                if tid is None:
+                    tid = vocab[term] = len(postings)
+                    postings.append((array("i"), array("i")))
+                postings[tid][0].append(pid)
+                postings[tid][1].append(tf)
+        n = index.n_passages = len(lengths)
+        avgdl = (sum(lengths) / n) if n else 0.0
+        # Per-passage length normalisation k1 * (1 - b + b * dl / avgdl).
+        norm = [k1 * (1.0 - b + b * dl / avgdl) if avgdl else k1 for dl in lengths]
+        for pids, tfs in postings:
+            df = len(pids)
+            idf = math.log(1.0 + (n - df + 0.5) / (df + 0.5))
+            index.idf.append(idf)
+            index.ids.extend(pids)
+            index.weights.extend(idf * tf * (k1 + 1.0) / (tf + norm[p]) for p, tf in zip(pids, tfs))
+            index.indptr.append(len(index.ids))
+        return index
+
+    # ---- scoring ----
+
+    def _query_terms(self, query: str) -> Tuple[List[int], float]:
+        """Known term ids of `query` and their best achievable score; unknown terms are ignored."""
+        tids = sorted({self.vocab[t] for t in tokenize(query) if t in self.vocab})
+        return tids, sum(self.idf[t] for t in tids) * (self.k1 + 1.0)
+
+    def search_many(self, queries: Sequence[str], top_k: int = 1) -> List[List[Tuple[int, float]]]:
+        """Top-k (passage id, normalised score) per query, best first."""
+        if self.n_passages and _numpy_available():
+            ids = _np.frombuffer(self.ids, dtype=_np.int32)
+            weights = _np.frombuffer(self.weights, dtype=_np.float32)
+            return [self._search_np(q, top_k, ids, weights) for q in queries]
+        return [self._search_py(q, top_k) for q in queries]
+
+    def _search_np(self, query: str, top_k: int, ids, weights) -> List[Tuple[int, float]]:
+        tids, bound = self._query_terms(query)
+        if not tids or top_k <= 0:
+            return []
+        ptr = self.indptr
+        q_ids = _np.concatenate([ids[ptr[t]:ptr[t + 1]] for t in tids])
+        q_w = _np.concatenate([weights[ptr[t]:ptr[t + 1]] for t in tids]).astype(_np.float64)
+        if len(q_ids) * 8 < self.n_passages:
+            # Few postings: accumulate over the touched passages only.
+            cand, inverse = _np.unique(q_ids, return_inverse=True)
+            scores = _np.bincount(inverse, weights=q_w)
+        else:
+            scores = _np.bincount(q_ids, weights=q_w, minlength=self.n_passages)
+            cand = _np.flatnonzero(scores)
+            scores = scores[cand]
+        # `cand` is ascending, so ties go to the lower passage id (as in _search_py).
+        if len(scores) > top_k:
+            kth = _np.partition(scores, len(scores) - top_k)[len(scores) - top_k]
+            keep = _np.flatnonzero(scores >= kth)
+            cand, scores = cand[keep], scores[keep]
+        order = _np.lexsort((cand, -scores))[:top_k]
+        return [(int(cand[i]), float(scores[i] / bound)) for i in order]
+
+    def _search_py(self, query: str, top_k: int) -> List[Tuple[int, float]]:
+        tids, bound = self._query_terms(query)
+        if not tids or top_k <= 0:
+            return []
+        acc: Dict[int, float] = {}
+        ptr, ids, weights = self.indptr, self.ids, self.weights
+        for t in tids:
+            for i in range(ptr[t], ptr[t + 1]):
+                p = ids[i]
+                acc[p] = acc.get(p, 0.0) + weights[i]
+        best = heapq.nlargest(top_k, acc.items(), key=lambda kv: (kv[1], -kv[0]))
+        return [(p, s / bound) for p, s in best]
+
+    # ---- persistence ----
+
+    _ARRAYS = ("idf", "indptr", "ids", "weights")
+
+    def save(self, prefix: str) -> None:
+        terms = list(self.vocab)  # insertion order == term id
+        with open(prefix + "bm25.json", "w", encoding="utf-8") as fh:
+            json.dump({"k1": self.k1, "b": self.b, "n_passages": self.n_passages, "terms": terms}, fh, ensure_ascii=False)
+        for name in self._ARRAYS:
+            with open(f"{prefix}bm25_{name}.bin", "wb") as fh:
+                getattr(self, name).tofile(fh)
+
+    @classmethod
+    def load(cls, prefix: str) -> "BM25Index":
+        with open(prefix + "bm25.json", "r", encoding="utf-8") as fh:
+            meta = json.load(fh)
+        index = cls(meta["k1"], meta["b"])
+        index.n_passages = meta["n_passages"]
+        index.vocab = {t: i for i, t in enumerate(meta["terms"])}
+        for name in cls._ARRAYS:
+            path = f"{prefix}bm25_{name}.bin"
+            buf = array(getattr(index, name).typecode)
+            with open(path, "rb") as fh:
+                buf.fromfile(fh, os.path.getsize(path) // buf.itemsize)
+            setattr(index, name, buf)
+        if len(index.indptr) != len(index.vocab) + 1 or len(index.ids) != index.indptr[-1]:
+            raise ValueError(f"inconsistent BM25 index at {prefix}")
+        return index
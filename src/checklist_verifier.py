@@ -1,5 +1,7 @@
 import os
-from typing import List, Dict
+import re
+from functools import lru_cache
+from typing import List, Dict, FrozenSet, Iterable, Optional, Sequence, Tuple
 
 # Checklists for processes
 CHECKLISTS = {
@@ -56,22 +58,63 @@ CITATION_MAP = {
 }
 
 
+# All keywords in one pattern. The lookahead reports a match at every position,
+# so overlapping keywords are all seen; the earliest DOC_KEYWORD_MAP entry wins,
+# as in a linear scan of the map.
+_KEYWORD_RANK = {kw: i for i, kw in enumerate(DOC_KEYWORD_MAP)}
+_KEYWORD_RE = re.compile("(?=(%s))" % "|".join(re.escape(kw) for kw in DOC_KEYWORD_MAP))
+_SEPARATORS = re.compile(r"[_\-]+")
+_CHECKLIST_SETS = {process: frozenset(docs) for process, docs in CHECKLISTS.items()}
+
+
 def get_legal_citation(doc_name: str) -> str:
     return CITATION_MAP.get(doc_name, "")
 
 
-def normalize_uploaded_types(uploaded: List[str]) -> List[str]:
+@lru_cache(maxsize=65536)
+def normalize_name(name: str) -> Optional[str]:
+    """Standard document name for a file name from its keywords, or None."""
+    found = _KEYWORD_RE.findall(_SEPARATORS.sub(" ", os.path.basename(name).lower()))
+    if not found:
+        return None
+    return DOC_KEYWORD_MAP[min(found, key=_KEYWORD_RANK.__getitem__)]
+
+
+def detect_process(present: FrozenSet[str]) -> str:
+    """Process whose checklist overlaps `present` most (first in CHECKLISTS on ties)."""
+    best = ("Unknown", 0)
+    for process, required in _CHECKLIST_SETS.items():
+        matches = len(required & present)
+        if matches > best[1]:
+            best = (process, matches)
+    return best[0]
+
+
+def missing_documents(process: str, present: Iterable[str]) -> List[Dict[str, str]]:
+    """Checklist documents of `process` not in `present`, in checklist order."""
+    present = present if isinstance(present, (set, frozenset)) else set(present)
+    return [
+        {"document": d, "legal_citation": get_legal_citation(d)}
+        for d in CHECKLISTS.get(process, []) if d not in present
+    ]
+
+
+def normalize_uploaded_types(uploaded: List[str], detected_types: Optional[Sequence[Tuple[str, float]]] = None) -> List[str]:
+    """
+    Standard document names for the uploads. `detected_types` is an optional
+    (type, confidence) per upload from the content classifier; it is used only
+    for files whose names carry no keyword, since an explicit name is more
+    reliable than a low-confidence guess.
+    """
     normalized = []
-    for u in uploaded:
+    for i, u in enumerate(uploaded):
         if not u:
             continue
-        s = os.path.basename(u).lower()
-        matched = None
-        for kw, label in DOC_KEYWORD_MAP.items():
-            if kw in s:
-                matched = label
-                break
-        normalized.append(matched or os.path.splitext(os.path.basename(u))[0].title())
+        name = normalize_name(u)
+        detected = detected_types[i] if detected_types and i < len(detected_types) else None
+        if name is None and detected and detected[0] != "Unknown":
+            name = detected[0]
+        normalized.append(name or os.path.splitext(os.path.basename(u))[0].title())
 
     # Deduplicate while keeping order
     seen = set()
@@ -84,31 +127,27 @@ def normalize_uploaded_types(uploaded: List[str]) -> List[str]:
 
 
 def detect_process_from_uploaded(uploaded_normalized: List[str]) -> str:
-    best = ("Unknown", 0)
-    for process, checklist in CHECKLISTS.items():
-        matches = sum(1 for doc in checklist if doc in uploaded_normalized)
-        if matches > best[1]:
-            best = (process, matches)
-    return best[0]
+    return detect_process(frozenset(uploaded_normalized))
 
 
-def verify_document_checklist(uploaded_raw: List[str]) -> Dict:
-    uploaded_normalized = normalize_uploaded_types(uploaded_raw)
+def verify_document_checklist(uploaded_raw: List[str], detected_types: Optional[Sequence[Tuple[str, float]]] = None) -> Dict:
+    uploaded_normalized = normalize_uploaded_types(uploaded_raw, detected_types)
     process = detect_process_from_uploaded(uploaded_normalized)
     result = {
         "process": process,
         "documents_uploaded": len(uploaded_normalized),
         "uploaded_documents": uploaded_normalized
     }
+    if detected_types:
+        result["classified_documents"] = {
+            u: {"document_type": t, "confidence": c}
+            for u, (t, c) in zip(uploaded_raw, detected_types) if u
+        }
     if process in CHECKLISTS:
-        required = CHECKLISTS[process]
-        missing = [d for d in required if d not in uploaded_normalized]
-        result["required_documents"] = len(required)
+        missing = missing_documents(process, uploaded_normalized)
+        result["required_documents"] = len(CHECKLISTS[process])
         if missing:
-            result["missing_documents"] = [
-                {"document": d, "legal_citation": get_legal_citation(d)}
-                for d in missing
-            ]
+            result["missing_documents"] = missing
     else:
         result["required_documents"] = 0
         result["missing_documents"] = []
@@ -1,45 +1,231 @@
-
 import argparse
+import glob
+import json
 import os
-from .checklist_verifier import verify_document_checklist
-from .document_processor import process_document  
-from .file_utils import write_json
+import sys
 
+# Heavy modules (python-docx, scikit-learn) are imported inside the command
+# handlers so `python -m src.cli --help` and `rebuild_index` start quickly.
+
+
+def _rebuild_index(args):
+    from .rag_engine import rebuild_index
+
+    print("Rebuilding legal reference index...")
+    summary = rebuild_index(force=args.force)
+    print(f"Reference dir: {summary['ref_dir']}")
+    print(f"Index dir: {summary['index_dir']}")
+    print(f"Documents indexed: {summary['documents']} ({summary['retriever']})" if summary["indexed"] else "No index built (no reference files).")
+
+
+def _ingest(args):
+    from .ingest import ingest_sources
+
+    summary = ingest_sources(
+        args.sources_dir, args.out, args.csv, workers=args.workers, force=args.force, rebuild=not args.no_index,
+    )
+    print(
+        f"Sources: {summary['sources']} ({summary['with_provenance']} with provenance), extracted: {summary['extracted']}, "
+        f"unchanged: {summary['unchanged']}, removed: {summary['removed']}, failed: {len(summary['failed'])}"
+    )
+    for rel, error in summary["failed"].items():
+        print(f"  failed: {rel}: {error}", file=sys.stderr)
+    index = summary.get("index")
+    if index:
+        print(f"Documents indexed: {index['documents']} ({index['retriever']})" if index["indexed"] else "No index built.")
+
+
+def _data_room(args):
+    from .data_room import write_data_room_report
+
+    totals = write_data_room_report(args.root, args.jsonl)
+    print(
+        f"Entities: {totals['entities']}, files scanned: {totals['files_scanned']}, "
+        f"incomplete: {totals['entities_incomplete']} ({totals['missing_documents']} missing documents)",
+        file=sys.stderr,
+    )
 
-def main():
-    parser = argparse.ArgumentParser(description="ADGM Compliance Document Checker")
-    parser.add_argument("--input", required=True, help="Path to input .docx file")
-    parser.add_argument("--output", required=True, help="Directory to save reviewed file and report")
-    args = parser.parse_args()
 
-  
+def expand_inputs(patterns, manifest=None):
+    """
+    .docx paths from files, directories (searched recursively) and glob patterns,
+    plus the lines of an optional manifest (one path or pattern per line, relative
+    to the manifest, '#' comments). Absolute, de-duplicated, in input order.
+    """
+    items = list(patterns or [])
+    if manifest:
+        base = os.path.dirname(os.path.abspath(manifest))
+        with open(manifest, "r", encoding="utf-8") as fh:
+            for line in fh:
+                line = line.strip()
+                if line and not line.startswith("#"):
+                    items.append(line if os.path.isabs(line) else os.path.join(base, line))
+
+    found, seen = [], set()
+    for item in items:
+        if os.path.isdir(item):
+            paths = sorted(glob.glob(os.path.join(item, "**", "*.docx"), recursive=True))
+        elif os.path.isfile(item):
+            paths = [item]
+        else:
+            paths = sorted(glob.glob(item, recursive=True))
+            if not paths:
+                print(f"[WARN] No input matches {item}", file=sys.stderr)
+        for p in paths:
+            p = os.path.abspath(p)
+            if p not in seen and p.lower().endswith(".docx") and not os.path.basename(p).startswith("~$"):
+                seen.add(p)
+                found.append(p)
+    return found
+
+
+def _iter_results(path):
+    """Records of a results JSONL file, skipping a line cut short by an interrupted run."""
+    if not os.path.exists(path):
+        return
+    with open(path, "r", encoding="utf-8") as fh:
+        for line in fh:
+            try:
+                rec = json.loads(line)
+            except ValueError:
+                continue
+            if isinstance(rec, dict) and rec.get("input"):
+                yield rec
+
+
+def _load_results(path):
+    """
+    Input paths that already have a result. The file is rewritten with only its
+    complete records, so appending after an interrupted run stays valid JSONL.
+    """
+    done = set()
+    if not os.path.exists(path):
+        return done
+    tmp = path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as fh:
+        for rec in _iter_results(path):
+            done.add(rec["input"])
+            fh.write(json.dumps(rec, ensure_ascii=False) + "\n")
+    os.replace(tmp, path)
+    return done
+
+
+def _review(args):
+    from .batch import iter_process_documents, mirrored_output_dirs
+    from .checklist_verifier import verify_document_checklist
+    from .doc_classifier import classify_documents
+    from .document_processor import prefetch_legal_references
+    from .file_utils import write_json
+    from .metrics import METRICS, StageTimer, flush_metrics
+    from .rag_engine import rag_cache_stats
+    from .report_generator import ReportAggregator
+
+    out_dir = os.path.abspath(args.output)
+    # Never re-review our own output when it sits inside an input directory.
+    inputs = [p for p in expand_inputs(args.input, args.manifest) if not p.startswith(out_dir + os.sep)]
+    if not inputs:
+        print("[ERROR] No .docx inputs found.", file=sys.stderr)
+        sys.exit(1)
     os.makedirs(args.output, exist_ok=True)
+    results_path = args.results or os.path.join(args.output, "results.jsonl")
 
-  
-    print("[1/3] Verifying checklist...")
-    checklist_result = verify_document_checklist(args.input)
+    print(f"[1/3] Verifying checklist for {len(inputs)} document(s)...")
+    run_timer = StageTimer()
+    with run_timer.stage("classification"):
+        detected_types = classify_documents(inputs)
+    checklist_result = verify_document_checklist(inputs, detected_types)
     print(f"Detected process: {checklist_result.get('process', 'Unknown')}")
     print(f"Missing documents: {checklist_result.get('missing_documents', [])}")
 
+    done = _load_results(results_path) if args.resume else set()
+    if not args.resume and os.path.exists(results_path):
+        os.remove(results_path)
+    pending = [p for p in inputs if p not in done]
+    # Reviewed copies keep the inputs' relative layout under --output.
+    output_dirs = dict(zip(inputs, mirrored_output_dirs(inputs, out_dir)))
+    print(f"[2/3] Processing {len(pending)} document(s)" + (f", {len(inputs) - len(pending)} already done" if done else "") + "...")
+    with run_timer.stage("rag_prefetch"):
+        references = prefetch_legal_references()
+    with open(results_path, "a", encoding="utf-8") as out:
+        for n, (i, result) in enumerate(iter_process_documents(
+            pending,
+            workers=args.workers,
+            checklist_result=checklist_result,
+            output_dirs=[output_dirs[p] for p in pending],
+            references=references,
+            report_only=args.report_only or args.stream,
+            streaming=True if args.stream else None
+        ), 1):
+            METRICS.observe_document(result)
+            out.write(json.dumps(dict(result, input=pending[i]), ensure_ascii=False) + "\n")
+            out.flush()
+            print(f"  [{n}/{len(pending)}] {result.get('file_name')}: {len(result.get('issues', []))} issue(s)")
 
-    print("[2/3] Processing document...")
-    result = process_document(
-        args.input,
-        checklist_result=checklist_result,
-        output_dir=args.output,
-        debug=False
-    )
-
- 
     print("[3/3] Generating report...")
+    # Streamed back from the results file, so memory does not grow with the batch.
+    wanted = set(inputs)
+    issues_path = os.path.join(args.output, "issues.jsonl")
+    with ReportAggregator(checklist_result, checklist_result.get("process"), issues_path) as agg:
+        seen = set()
+        for rec in _iter_results(results_path):
+            if rec["input"] in wanted and rec["input"] not in seen:
+                seen.add(rec["input"])
+                agg.add(rec)
+    report = agg.close()
+    rag_cache = rag_cache_stats()
+    METRICS.observe_stages(run_timer.timings)
+    METRICS.observe_rag_cache(rag_cache)
+    report["run_timings_ms"] = run_timer.timings
+    report["rag_query_cache"] = rag_cache
     report_path = os.path.join(args.output, "review_report.json")
-    write_json(result, report_path)
+    write_json(report, report_path)
+    flush_metrics(args.metrics)
 
-   
     print("\n Review complete.")
-    print(f"Reviewed document: {result.get('reviewed_path', 'None')}")
+    print(f"Results: {results_path}")
+    print(f"Issues: {issues_path}")
     print(f"Report saved: {report_path}")
 
 
+def main():
+    parser = argparse.ArgumentParser(description="ADGM Compliance Document Checker")
+    parser.add_argument("--input", nargs="+", help=".docx files, directories or glob patterns")
+    parser.add_argument("--manifest", help="Text file listing inputs, one per line")
+    parser.add_argument("--output", help="Directory to save reviewed files (mirroring the input layout) and reports")
+    parser.add_argument("--report-only", action="store_true", help="Only write the JSON reports; skip building the reviewed .docx")
+    parser.add_argument("--stream", action="store_true", help="Memory-bounded analysis for very large documents (implies --report-only)")
+    parser.add_argument("--workers", type=int, default=None, help="Worker processes (default ADGM_WORKERS)")
+    parser.add_argument("--results", help="Per-document JSONL results (default <output>/results.jsonl)")
+    parser.add_argument("--resume", action="store_true", help="Keep existing results and skip inputs that already have one")
+    parser.add_argument("--metrics", help="Write Prometheus text metrics here (default ADGM_METRICS_FILE)")
+    subparsers = parser.add_subparsers(dest="command")
+    rebuild = subparsers.add_parser("rebuild_index", help="Build or refresh the on-disk legal reference index")
+    rebuild.add_argument("--force", action="store_true", help="Refit even if reference files are unchanged")
+    data_room = subparsers.add_parser("data_room", help="Checklist report per entity folder of a data room (JSONL)")
+    data_room.add_argument("root", help="Data room directory; each top-level folder is one entity")
+    data_room.add_argument("--jsonl", help="Write entity reports here instead of stdout")
+    ingest = subparsers.add_parser("ingest", help="Extract reference sources (.docx/.pdf/.txt) into the legal reference dir")
+    ingest.add_argument("sources_dir", nargs="?", help="Local copies of the sources (default ADGM_SOURCES_DIR or data/sources)")
+    ingest.add_argument("--csv", help="Sources CSV with category and URL per file (default data/data_sources.csv)")
+    ingest.add_argument("--out", help="Reference dir to write extracted text to (default legal_refs)")
+    ingest.add_argument("--workers", type=int, default=None, help="Extraction processes (default: CPU count)")
+    ingest.add_argument("--force", action="store_true", help="Re-extract every source, changed or not")
+    ingest.add_argument("--no-index", action="store_true", help="Do not refresh the retrieval index afterwards")
+    args = parser.parse_args()
+
+    if args.command == "rebuild_index":
+        _rebuild_index(args)
+        return
+    if args.command == "data_room":
+        _data_room(args)
+        return
+    if args.command == "ingest":
+        _ingest(args)
+        return
+    if not (args.input or args.manifest) or not args.output:
+        parser.error("--input (or --manifest) and --output are required")
+    _review(args)
+
+
 if __name__ == "__main__":
     main()
@@ -1,6 +1,40 @@
+import os
+import copy
+import logging
+from typing import List, Optional, Sequence, Tuple
 
 from docx.shared import RGBColor, Pt
 from docx.oxml import parse_xml
+from docx.oxml.ns import qn
+from docx.opc.constants import CONTENT_TYPE as CT, RELATIONSHIP_TYPE as RT
+from docx.opc.packuri import PackURI
+from docx.opc.part import XmlPart
+
+logger = logging.getLogger(__name__)
+
+# "native": real Word comments in word/comments.xml anchored over the flagged text.
+# "inline": the older visible "[COMMENT: ...]" run appended to the paragraph.
+COMMENT_MODE = os.environ.get("ADGM_COMMENT_MODE", "native")
+COMMENT_AUTHOR = "ADGM Corporate Agent"
+COMMENT_INITIALS = "ACA"
+
+_W_NS = "http://schemas.openxmlformats.org/wordprocessingml/2006/main"
+
+# Element templates are parsed once and deep-copied per use.
+_HIGHLIGHT = parse_xml(f'<w:highlight xmlns:w="{_W_NS}" w:val="yellow"/>')
+_COMMENTS_ROOT = parse_xml(f'<w:comments xmlns:w="{_W_NS}"/>')
+_COMMENT = parse_xml(
+    f'<w:comment xmlns:w="{_W_NS}" w:id="0" w:author="{COMMENT_AUTHOR}" w:initials="{COMMENT_INITIALS}">'
+    '<w:p><w:r><w:annotationRef/></w:r><w:r><w:t xml:space="preserve"></w:t></w:r></w:p>'
+    '</w:comment>'
+)
+_RANGE_START = parse_xml(f'<w:commentRangeStart xmlns:w="{_W_NS}" w:id="0"/>')
+_RANGE_END = parse_xml(f'<w:commentRangeEnd xmlns:w="{_W_NS}" w:id="0"/>')
+_REFERENCE_RUN = parse_xml(f'<w:r xmlns:w="{_W_NS}"><w:commentReference w:id="0"/></w:r>')
+
+# (paragraph, comment text, optional (start, end) span within paragraph.text)
+CommentSpec = Tuple[object, str, Optional[Tuple[int, int]]]
+
 
 def insert_comment(paragraph, comment_text, color=(255,0,0), bold=True, italic=False, font_size=9):
     """
@@ -16,9 +50,124 @@ def insert_comment(paragraph, comment_text, color=(255,0,0), bold=True, italic=F
     run.font.italic = italic
     run.font.size = Pt(font_size)
 
- 
+
     try:
-        highlight = parse_xml(r'<w:highlight xmlns:w="http://schemas.openxmlformats.org/wordprocessingml/2006/main" w:val="yellow"/>')
-        run._element.rPr.append(highlight)
+        run._element.rPr.append(copy.deepcopy(_HIGHLIGHT))
     except Exception:
         pass
+
+
+def insert_comments(doc, comments: Sequence[CommentSpec], mode: str = None) -> None:
+    """
+    Add all comments for a document in one pass.
+    mode "native" writes Word comments (falling back to inline if the document's
+    comments part cannot be edited); mode "inline" appends visible comment runs.
+    """
+    mode = mode or COMMENT_MODE
+    if not comments:
+        return
+    root = _comments_root(doc) if mode == "native" else None
+    if root is None:
+        for paragraph, text, _ in comments:
+            insert_comment(paragraph, text)
+        return
+
+    ids = [int(c.get(qn("w:id"))) for c in root.iterchildren(qn("w:comment"))]
+    next_id = max(ids) + 1 if ids else 0
+    # No w:date (it is optional): a timestamp would make identical reviews differ
+    # byte for byte, and the output store addresses artifacts by content.
+    for paragraph, text, span in comments:
+        cid = str(next_id)
+        next_id += 1
+        comment = copy.deepcopy(_COMMENT)
+        comment.set(qn("w:id"), cid)
+        comment.findall(".//" + qn("w:t"))[-1].text = text
+        root.append(comment)
+        _anchor_comment(paragraph._p, cid, span)
+
+
+def _comments_root(doc):
+    """The <w:comments> element of the document, creating the part if needed."""
+    part = doc.part
+    for rel in part.rels.values():
+        if rel.reltype == RT.COMMENTS and not rel.is_external:
+            element = getattr(rel.target_part, "element", None)
+            if element is None:
+                logger.warning("Comments part is not editable; falling back to inline comments.")
+            return element
+    package = part.package
+    comments_part = XmlPart(
+        PackURI(package.next_partname("/word/comments%d.xml")),
+        CT.WML_COMMENTS,
+        copy.deepcopy(_COMMENTS_ROOT),
+        package,
+    )
+    part.relate_to(comments_part, RT.COMMENTS)
+    return comments_part.element
+
+
+def _item_text(el) -> str:
+    if el.tag == qn("w:r"):
+        return el.text
+    return "".join(r.text for r in el.iterchildren(qn("w:r")))
+
+
+def _split_run(run, offset: int):
+    """
+    Split a single-<w:t> run at `offset`, returning the new right-hand run, or
+    None when the run has other text content and cannot be split safely.
+    """
+    texts = run.findall(qn("w:t"))
+    if len(texts) != 1 or len(run.text) != len(texts[0].text or ""):
+        return None
+    right = copy.deepcopy(run)
+    full = texts[0].text or ""
+    texts[0].text = full[:offset]
+    right.find(qn("w:t")).text = full[offset:]
+    for t in (texts[0], right.find(qn("w:t"))):
+        t.set("{http://www.w3.org/XML/1998/namespace}space", "preserve")
+    run.addnext(right)
+    return right
+
+
+def _paragraph_items(p) -> List[Tuple[object, int, int]]:
+    items = []
+    pos = 0
+    for el in p.iterchildren(qn("w:r"), qn("w:hyperlink")):
+        n = len(_item_text(el))
+        items.append((el, pos, pos + n))
+        pos += n
+    return items
+
+
+def _split_at(p, offset: int) -> None:
+    for el, a, b in _paragraph_items(p):
+        if a < offset < b and el.tag == qn("w:r"):
+            _split_run(el, offset - a)
+            return
+
+
+def _anchor_comment(p, cid: str, span: Optional[Tuple[int, int]]) -> None:
+    """Wrap the runs covering `span` (whole paragraph if None) in a comment range."""
+    if span is not None:
+        start, end = span
+        _split_at(p, start)
+        _split_at(p, end)
+        covered = [el for el, a, b in _paragraph_items(p) if a < end and b > start]
+    else:
+        covered = [el for el, a, b in _paragraph_items(p) if b > a]
+
+    range_start = copy.deepcopy(_RANGE_START)
+    range_end = copy.deepcopy(_RANGE_END)
+    reference = copy.deepcopy(_REFERENCE_RUN)
+    for el in (range_start, range_end):
+        el.set(qn("w:id"), cid)
+    reference.find(qn("w:commentReference")).set(qn("w:id"), cid)
+
+    if covered:
+        covered[0].addprevious(range_start)
+        covered[-1].addnext(range_end)
+    else:
+        p.append(range_start)
+        p.append(range_end)
+    range_end.addnext(reference)
@@ -0,0 +1,113 @@
+import os
+import sys
+import json
+import logging
+from collections import Counter
+from typing import Any, Dict, Iterator, Optional, Sequence, Tuple
+
+from .checklist_verifier import CHECKLISTS, detect_process, missing_documents, normalize_name
+
+logger = logging.getLogger(__name__)
+
+# Files considered documents in a data room; None would accept every file.
+DATA_ROOM_EXTENSIONS = (".docx", ".doc", ".pdf", ".txt", ".rtf", ".odt")
+ROOT_ENTITY = "."
+
+
+def _iter_files(top: str, extensions: Optional[Sequence[str]]) -> Iterator[str]:
+    """Regular, non-hidden files under `top` (iterative scandir walk, no symlink following)."""
+    stack = [top]
+    while stack:
+        path = stack.pop()
+        try:
+            entries = sorted(os.scandir(path), key=lambda e: e.name)
+        except OSError as e:
+            logger.warning("Data room: cannot read %s: %s", path, e)
+            continue
+        subdirs = []
+        for e in entries:
+            if e.name.startswith("."):
+                continue
+            if e.is_dir(follow_symlinks=False):
+                subdirs.append(e.path)
+            elif e.is_file(follow_symlinks=False):
+                if extensions is None or os.path.splitext(e.name)[1].lower() in extensions:
+                    yield e.path
+        stack.extend(reversed(subdirs))
+
+
+def iter_entities(root: str, extensions: Optional[Sequence[str]] = DATA_ROOM_EXTENSIONS) -> Iterator[Tuple[str, Iterator[str]]]:
+    """
+    (entity, file iterator) per entity folder. Each top-level directory of `root`
+    is one entity and owns every file below it; files directly in `root` form
+    the ROOT_ENTITY group.
+    """
+    root = os.path.abspath(root)
+    top_files, entity_dirs = [], []
+    for e in sorted(os.scandir(root), key=lambda e: e.name):
+        if e.name.startswith("."):
+            continue
+        if e.is_dir(follow_symlinks=False):
+            entity_dirs.append(e)
+        elif e.is_file(follow_symlinks=False) and (extensions is None or os.path.splitext(e.name)[1].lower() in extensions):
+            top_files.append(e.path)
+    if top_files:
+        yield ROOT_ENTITY, iter(top_files)
+    for e in entity_dirs:
+        yield e.name, _iter_files(e.path, extensions)
+
+
+def entity_report(entity: str, files: Iterator[str], root: str = "") -> Dict[str, Any]:
+    """Checklist report for one entity: detected process, document counts and missing documents."""
+    counts = Counter()
+    unrecognized = 0
+    total = 0
+    for path in files:
+        total += 1
+        label = normalize_name(os.path.basename(path))
+        if label is None:
+            unrecognized += 1
+        else:
+            counts[label] += 1
+    present = frozenset(counts)
+    process = detect_process(present)
+    missing = missing_documents(process, present)
+    return {
+        "entity": entity,
+        "path": os.path.normpath(os.path.join(root, entity)) if root else entity,
+        "process": process,
+        "files_scanned": total,
+        "unrecognized_files": unrecognized,
+        "documents": dict(sorted(counts.items())),
+        "required_documents": len(CHECKLISTS.get(process, [])),
+        "missing_documents": missing,
+    }
+
+
+def iter_data_room(root: str, extensions: Optional[Sequence[str]] = DATA_ROOM_EXTENSIONS) -> Iterator[Dict[str, Any]]:
+    """Stream one entity report at a time; only the current entity's counts are held in memory."""
+    root = os.path.abspath(root)
+    for entity, files in iter_entities(root, extensions):
+        yield entity_report(entity, files, root)
+
+
+def write_data_room_report(root: str, out_path: Optional[str] = None, extensions: Optional[Sequence[str]] = DATA_ROOM_EXTENSIONS) -> Dict[str, Any]:
+    """
+    Write one JSON line per entity to `out_path` (stdout if None) as each is
+    finished, and return run totals.
+    """
+    totals = {"entities": 0, "files_scanned": 0, "entities_incomplete": 0, "missing_documents": 0}
+    fh = open(out_path, "w", encoding="utf-8") if out_path else sys.stdout
+    try:
+        for report in iter_data_room(root, extensions):
+            fh.write(json.dumps(report, ensure_ascii=False) + "\n")
+            fh.flush()
+            totals["entities"] += 1
+            totals["files_scanned"] += report["files_scanned"]
+            if report["missing_documents"]:
+                totals["entities_incomplete"] += 1
+                totals["missing_documents"] += len(report["missing_documents"])
+    finally:
+        if out_path:
+            fh.close()
+    return totals
@@ -0,0 +1,141 @@
+import os
+import glob
+import logging
+import threading
+from typing import List, Sequence, Tuple
+
+from .checklist_verifier import CHECKLISTS, normalize_name
+from .file_utils import read_docx_text
+from .rag_engine import REF_DIR, sklearn_available
+
+logger = logging.getLogger(__name__)
+
+TEMPLATE_DIR = os.environ.get(
+    "ADGM_TEMPLATE_DIR",
+    os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "templates")),
+)
+MIN_CONFIDENCE = float(os.environ.get("ADGM_CLASSIFIER_MIN_CONFIDENCE", "0.12"))
+# Only the head of each document is classified; titles and recitals carry the signal.
+CLASSIFY_CHARS = 20000
+
+# Seed vocabulary per document type, so every type has a centroid even before
+# any reference or template file for it is available.
+TYPE_SEEDS = {
+    "Articles of Association": "articles of association company share capital shares directors general meetings shareholders dividends transfer of shares interpretation objects",
+    "Memorandum of Association": "memorandum of association subscribers wish to form a company agree to become members take shares registered office liability limited",
+    "Incorporation Application Form": "application for incorporation registration authority proposed company name registered office applicant details company type",
+    "UBO Declaration Form": "ultimate beneficial owner declaration beneficial ownership control percentage of shares natural person register of beneficial owners",
+    "Register of Members and Directors": "register of members register of directors name address date of entry shares held nationality date of appointment",
+    "Board Resolution": "resolution of the board of directors written resolution directors resolved that it is hereby resolved meeting of the board quorum",
+    "Shareholder Resolution": "resolution of the shareholders written resolution of the members special resolution ordinary resolution shareholders resolved",
+    "Trade License Application": "trade licence application licensed activities business activity commercial licence applicant",
+    "Regulatory Approval Form": "regulatory approval form application for approval regulator authorisation permission",
+    "Business Plan": "business plan executive summary market analysis financial projections strategy revenue",
+    "Passport Copy of Shareholders": "passport copy passport number nationality date of birth date of expiry shareholder identification",
+    "Employment Contract": "employment contract employer employee salary working hours probation period annual leave termination notice period",
+    "Offer Letter": "offer letter pleased to offer you the position start date remuneration acceptance of offer",
+    "Employee Handbook": "employee handbook policies code of conduct leave policy disciplinary procedure grievance",
+    "Non-Disclosure Agreement": "non-disclosure agreement confidential information disclosing party receiving party confidentiality obligations",
+}
+
+
+def _read_text(path: str) -> str:
+    if path.lower().endswith(".docx"):
+        return read_docx_text(path)[1][:CLASSIFY_CHARS]
+    with open(path, "r", encoding="utf-8", errors="ignore") as fh:
+        return fh.read(CLASSIFY_CHARS)
+
+
+class DocumentClassifier:
+    """
+    Content-based document type classifier.
+
+    Each type gets a centroid: the normalised mean TF-IDF vector of its seed text
+    plus any reference/template files whose names map to it. A batch of documents
+    is scored against all centroids with a single sparse matrix product, and each
+    document gets (type, cosine confidence).
+    """
+
+    def __init__(self, corpus_dirs: Sequence[str] = (REF_DIR, TEMPLATE_DIR)):
+        self.types = []
+        self.vectorizer = None
+        self.centroids = None
+        self.available = sklearn_available()
+        if self.available:
+            self._fit(corpus_dirs)
+
+    def _fit(self, corpus_dirs: Sequence[str]) -> None:
+        import numpy as np
+        import scipy.sparse as sp
+        from sklearn.feature_extraction.text import TfidfVectorizer
+        from sklearn.preprocessing import normalize
+
+        labels = {t for docs in CHECKLISTS.values() for t in docs}
+        texts, text_types = [], []
+        for t, seed in TYPE_SEEDS.items():
+            texts.append(seed)
+            text_types.append(t)
+        for d in corpus_dirs:
+            for path in sorted(glob.glob(os.path.join(d, "*.txt")) + glob.glob(os.path.join(d, "*.docx"))):
+                t = normalize_name(path)
+                if t not in labels:
+                    continue
+                try:
+                    texts.append(_read_text(path))
+                    text_types.append(t)
+                except Exception as e:
+                    logger.warning("Classifier: skipping %s: %s", path, e)
+
+        self.types = sorted(set(text_types))
+        type_idx = {t: i for i, t in enumerate(self.types)}
+        self.vectorizer = TfidfVectorizer(stop_words="english", ngram_range=(1, 2), sublinear_tf=True)
+        X = self.vectorizer.fit_transform(texts)
+        # (types x texts) averaging matrix, then row-normalise the centroids.
+        rows = np.array([type_idx[t] for t in text_types])
+        counts = np.bincount(rows, minlength=len(self.types)).astype(float)
+        avg = sp.csr_matrix((1.0 / counts[rows], (rows, np.arange(len(texts)))), shape=(len(self.types), len(texts)))
+        self.centroids = normalize(avg @ X).tocsr()
+        logger.info("Classifier: %d types from %d texts", len(self.types), len(texts))
+
+    def classify_texts(self, texts: Sequence[str]) -> List[Tuple[str, float]]:
+        """(type, confidence) per text; ("Unknown", score) below MIN_CONFIDENCE."""
+        if not self.available or not texts:
+            return [("Unknown", 0.0) for _ in texts]
+        sims = (self.vectorizer.transform(texts) @ self.centroids.T).toarray()
+        out = []
+        for row in sims:
+            best = int(row.argmax())
+            score = float(round(row[best], 4))
+            out.append((self.types[best] if score >= MIN_CONFIDENCE else "Unknown", score))
+        return out
+
+    def classify_files(self, paths: Sequence[str]) -> List[Tuple[str, float]]:
+        texts = []
+        for p in paths:
+            try:
+                texts.append(_read_text(p))
+            except Exception:
+                texts.append("")
+        return self.classify_texts(texts)
+
+
+_classifier = None
+_classifier_lock = threading.Lock()
+
+
+def get_classifier() -> DocumentClassifier:
+    global _classifier
+    if _classifier is None:
+        with _classifier_lock:
+            if _classifier is None:
+                _classifier = DocumentClassifier()
+    return _classifier
+
+
+def classify_documents(paths: Sequence[str]) -> List[Tuple[str, float]]:
+    """Classify a whole upload batch in one pass; never raises."""
+    try:
+        return get_classifier().classify_files(list(paths))
+    except Exception as e:
+        logger.exception("Classifier failed: %s", e)
+        return [("Unknown", 0.0) for _ in paths]
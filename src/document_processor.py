@@ -1,14 +1,26 @@
 import os
 import re
-from typing import List, Dict, Any
+import json
+import hashlib
+import logging
+import time
+from functools import lru_cache
+from typing import List, Dict, Any, Optional, Tuple
 from docx import Document
 from docx.shared import Pt
 
-from .checklist_verifier import verify_document_checklist
+from .checklist_verifier import verify_document_checklist, normalize_name
 from .report_generator import generate_report
-from .comment_inserter import insert_comment
-from .rag_engine import get_legal_reference
-from .file_utils import read_docx, write_docx
+from .comment_inserter import insert_comments, COMMENT_MODE
+from .rag_engine import get_legal_references, index_fingerprint, STATIC_RULES
+from .result_cache import ResultCache, get_result_cache, sha256_file
+from .file_utils import read_docx, read_docx_text, write_docx, iter_docx_paragraph_texts, ParagraphOffsets
+from .pattern_scanner import PatternScanner, ScanMatch, load_pattern_groups
+from .rules import DocumentContext, StreamingContext, Rule, RULES, register_rule, enabled_rules, run_rules, run_rules_stream
+from .metrics import StageTimer
+from .template_diff import template_deviations, template_fingerprint
+
+logger = logging.getLogger(__name__)
 
 
 AMBIGUOUS_PATTERNS = [
@@ -25,8 +37,28 @@ JURISDICTION_INDICATORS = [
     "abu dhabi courts",
     "sharjah court"
 ]
+# Optional JSON file overriding the pattern lists above, e.g.
+# {"ambiguous": {"regex": ["\\bmay\\b"]}, "jurisdiction": {"literal": ["dubai courts"]}}
+PATTERNS_FILE = os.environ.get("ADGM_PATTERNS_FILE")
+# (phrase in text, keyword in file name, document type), checked in order.
+DOC_TYPE_CASCADE = [
+    ("articles of association", "articles", "Articles of Association"),
+    ("memorandum of association", "memorandum", "Memorandum of Association"),
+    ("employment contract", "employment", "Employment Contract"),
+    ("board resolution", "board resolution", "Board Resolution"),
+]
+# report_only documents at least this large (.docx size) are analysed in streaming mode.
+STREAM_MIN_MB = float(os.environ.get("ADGM_STREAM_MIN_MB", "8"))
+# Bump whenever check logic changes in a way that alters results (invalidates the result cache).
+RULES_VERSION = 1
+# RAG queries the checks below cite; issues carry theirs in "_ref_query" until resolved.
+RULE_REFERENCE_QUERIES = ["jurisdiction", "signature", "ambiguous", "numbered clauses"]
 
-def _read_doc_text_and_paragraphs(filepath: str):
+def _read_doc_text_and_paragraphs(filepath: str, report_only: bool = False):
+    if report_only:
+        # Text-only fast path: no python-docx object model is built.
+        paragraphs, full_text, offsets = read_docx_text(filepath)
+        return None, paragraphs, full_text, offsets
     return read_docx(filepath)
 
 def _has_signature_block(paragraphs, lookback=8) -> bool:
@@ -43,88 +75,218 @@ def _has_signature_block(paragraphs, lookback=8) -> bool:
         return True
     return False
 
-def _find_ambiguous_sentences(text: str) -> List[str]:
-    if not text:
-        return []
-    sentences = re.split(r'(?<=[\.\?\!])\s+', text)
-    found = []
-    for s in sentences:
-        low = s.lower()
-        for pat in AMBIGUOUS_PATTERNS:
-            if re.search(pat, low):
-                found.append(s.strip())
-                break
-    return found
-
-def _has_clause_numbering(paragraphs) -> bool:
-    count = 0
-    for p in paragraphs:
-        t = p.text.strip()
-        if re.match(r"^\d+\.", t) or re.match(r"^\d+\.\d+", t) or re.match(r"^\([a-z0-9]+\)", t):
-            count += 1
-    return count >= 3
-
-def _find_jurisdiction_issues(full_text: str) -> List[Dict[str, Any]]:
-    if not full_text:
-        return []
-    issues = []
-    low = full_text.lower()
-    for ind in JURISDICTION_INDICATORS:
-        if ind in low:
+@lru_cache(maxsize=4)
+def get_scanner(patterns_file: Optional[str] = PATTERNS_FILE) -> PatternScanner:
+    """Compiled multi-pattern scanner for the ambiguity and jurisdiction patterns."""
+    return PatternScanner(load_pattern_groups(patterns_file, {
+        "ambiguous": {"regex": AMBIGUOUS_PATTERNS},
+        "jurisdiction": {"literal": JURISDICTION_INDICATORS},
+    }))
+
+def _scan(text: str) -> List[ScanMatch]:
+    return get_scanner().scan(text)
+
+_NUMBERED_CLAUSE = re.compile(r"^(?:\d+\.|\([a-z0-9]+\))")
+
+def _anchor(offsets: Optional[ParagraphOffsets], start: int, end: int) -> Dict[str, Any]:
+    """
+    paragraph_index (plus paragraph_indices when the span crosses paragraphs) for a
+    full_text span, and paragraph_span: the span within the first paragraph's text.
+    """
+    if offsets is None:
+        return {}
+    paras = offsets.paragraphs_for_span(start, end)
+    if not paras:
+        return {"paragraph_index": None}
+    anchor = {"paragraph_index": paras[0]}
+    if len(paras) > 1:
+        anchor["paragraph_indices"] = paras
+    p_start, p_end = offsets.paragraph_bounds(paras[0])
+    anchor["paragraph_span"] = [max(start, p_start) - p_start, min(end, p_end) - p_start]
+    return anchor
+
+@register_rule
+class JurisdictionRule(Rule):
+    """Non-ADGM courts named anywhere in the text (one finding per indicator)."""
+    name = "jurisdiction"
+    ref_query = "jurisdiction"
+
+    def __init__(self, ctx):
+        super().__init__(ctx)
+        self.first = {}
+
+    def sentence(self, start, end, matches):
+        for m in matches:
+            if m.group == "jurisdiction" and m.pattern_id not in self.first:
+                self.first[m.pattern_id] = _anchor(self.ctx.offsets, m.start, m.end)
+
+    def finish(self):
+        issues = []
+        for pid, ind in enumerate(get_scanner().groups().get("jurisdiction", [])):
+            if pid in self.first:
+                issues.append({
+                    **self.first[pid],
+                    "issue": f"Document references '{ind}' which is not ADGM jurisdiction.",
+                    "severity": "High",
+                    "suggestion": "Update jurisdiction clause to ADGM Courts."
+                })
+        return issues
+
+@register_rule
+class SignatureRule(Rule):
+    """Signature block (or a date) expected in the final paragraphs."""
+    name = "signature"
+    ref_query = "signature"
+    tail_size = 8
+
+    def __init__(self, ctx):
+        super().__init__(ctx)
+        self.signed = False
+
+    def tail(self, paragraphs):
+        self.signed = _has_signature_block(paragraphs, lookback=self.tail_size)
+
+    def finish(self):
+        if self.signed:
+            return []
+        n = self.ctx.paragraph_count
+        return [{
+            "paragraph_index": n-1 if n else None,
+            "issue": "No signature block detected in the final paragraphs.",
+            "severity": "High",
+            "suggestion": "Add signature block with name, designation, company name and date."
+        }]
+
+@register_rule
+class AmbiguousLanguageRule(Rule):
+    """Sentences using non-binding wording (first 8 reported)."""
+    name = "ambiguous"
+    ref_query = "ambiguous"
+    limit = 8
+
+    def __init__(self, ctx):
+        super().__init__(ctx)
+        self.found = []
+
+    def sentence(self, start, end, matches):
+        if len(self.found) < self.limit and any(m.group == "ambiguous" for m in matches):
+            self.found.append((_anchor(self.ctx.offsets, start, end), self.ctx.text(start, end).strip()))
+
+    def finish(self):
+        issues = []
+        for anchor, s in self.found:
             issues.append({
-                "issue": f"Document references '{ind}' which is not ADGM jurisdiction.",
-                "severity": "High",
-                "suggestion": "Update jurisdiction clause to ADGM Courts.",
-                "legal_reference": get_legal_reference("jurisdiction")
+                "paragraph_index": None,
+                **anchor,
+                "issue": f"Ambiguous/non-binding language detected: \"{s[:200]}\"",
+                "severity": "Medium",
+                "suggestion": "Consider replacing 'may' with 'shall' or more precise wording."
             })
-    return issues
+        return issues
+
+@register_rule
+class ClauseNumberingRule(Rule):
+    """At least three numbered clauses/headings expected."""
+    name = "numbered clauses"
+    ref_query = "numbered clauses"
+    required = 3
+
+    def __init__(self, ctx):
+        super().__init__(ctx)
+        self.count = 0
+
+    def paragraph(self, idx, text):
+        if self.count < self.required and _NUMBERED_CLAUSE.match(text.strip()):
+            self.count += 1
+
+    def finish(self):
+        if self.count >= self.required:
+            return []
+        return [{
+            "paragraph_index": None,
+            "issue": "Document appears to lack numbered clauses/section headings.",
+            "severity": "Low",
+            "suggestion": "Use numbered clause headings (1., 1.1, 2., etc.) to improve clarity."
+        }]
+
+def prefetch_legal_references(queries: List[str] = None) -> Dict[str, str]:
+    """
+    Resolve RAG citations for `queries` (default: every rule query) in one batch.
+    Pass the result to `process_document(references=...)` to share it across a whole upload.
+    """
+    queries = list(dict.fromkeys(queries or RULE_REFERENCE_QUERIES))
+    return dict(zip(queries, get_legal_references(queries)))
+
+def _resolve_legal_references(issues: List[Dict[str, Any]], references: Optional[Dict[str, str]] = None) -> None:
+    """Fill `legal_reference` for every issue carrying a `_ref_query`, with one batched lookup for the misses."""
+    references = dict(references or {})
+    missing = [it["_ref_query"] for it in issues if it.get("_ref_query") and it["_ref_query"] not in references]
+    if missing:
+        references.update(prefetch_legal_references(missing))
+    for it in issues:
+        q = it.pop("_ref_query", None)
+        if q:
+            it["legal_reference"] = references.get(q, "")
 
 def _create_front_summary_and_merge(original_doc: Document, issues_by_par: List[Dict[str, Any]], checklist_result: Dict[str, Any]):
+    """
+    Prepend the review summary to `original_doc` in place and return it.
+    Summary paragraphs are moved in front of the first body element, so the
+    original content (tables, styles, inserted comments) is kept and never copied.
+    """
     checklist_result = checklist_result or {}
-    new_doc = Document()
+    body = original_doc.element.body
+    anchor = body[0] if len(body) else None
+    summary = []
+
+    def add(text=""):
+        p = original_doc.add_paragraph(text)
+        summary.append(p._p)
+        return p
 
-    hdr = new_doc.add_paragraph("---- REVIEW SUMMARY (ADGM Corporate Agent - MVP) ----")
+    hdr = add("---- REVIEW SUMMARY (ADGM Corporate Agent - MVP) ----")
     hdr.runs[0].bold = True
     hdr.runs[0].font.size = Pt(12)
 
     
-    new_doc.add_paragraph(f"Detected process: {checklist_result.get('process','Unknown')}")
-    new_doc.add_paragraph(f"Documents uploaded: {checklist_result.get('documents_uploaded',0)}")
-    new_doc.add_paragraph(f"Required documents: {checklist_result.get('required_documents',0)}")
+    add(f"Detected process: {checklist_result.get('process','Unknown')}")
+    add(f"Documents uploaded: {checklist_result.get('documents_uploaded',0)}")
+    add(f"Required documents: {checklist_result.get('required_documents',0)}")
 
     missing = checklist_result.get("missing_documents", [])
     if missing:
-        new_doc.add_paragraph("Missing documents:")
+        add("Missing documents:")
         for m in missing:
             if isinstance(m, dict):
-                new_doc.add_paragraph(f" - {m.get('document')} ({m.get('legal_citation','')})")
+                add(f" - {m.get('document')} ({m.get('legal_citation','')})")
             else:
-                new_doc.add_paragraph(f" - {m}")
+                add(f" - {m}")
 
     
-    new_doc.add_paragraph("")
-    new_doc.add_paragraph("Issues found:")
+    add("")
+    add("Issues found:")
     if not issues_by_par:
-        new_doc.add_paragraph(" No issues detected by automated checks.")
+        add(" No issues detected by automated checks.")
     else:
         for idx, it in enumerate(issues_by_par, start=1):
-            new_doc.add_paragraph(f"{idx}. [{it.get('severity','')}] {it.get('issue')}")
+            add(f"{idx}. [{it.get('severity','')}] {it.get('issue')}")
             if it.get("suggestion"):
-                new_doc.add_paragraph(f"   Suggestion: {it['suggestion']}")
+                add(f"   Suggestion: {it['suggestion']}")
             if it.get("legal_reference"):
-                new_doc.add_paragraph(f"   Legal Reference: {it['legal_reference']}")
-            new_doc.add_paragraph("")
+                add(f"   Legal Reference: {it['legal_reference']}")
+            add("")
 
    
-    new_doc.add_page_break()
-    for p in original_doc.paragraphs:
-        if p.text is None:
-            continue
-        new_doc.add_paragraph(p.text)
-    return new_doc
-
-def add_review_notes_and_save_doc(doc_obj: Document, original_path: str, output_dir: str, issues_by_par: List[Dict[str, Any]], checklist_result: Dict[str, Any]) -> str:
-    
+    summary.append(original_doc.add_page_break()._p)
+    if anchor is not None:
+        for el in summary:
+            anchor.addprevious(el)
+    return original_doc
+
+def add_review_notes_and_save_doc(doc_obj: Document, original_path: str, output_dir: str, issues_by_par: List[Dict[str, Any]], checklist_result: Dict[str, Any], comment_mode: str = None, timer: Optional[StageTimer] = None) -> str:
+    timer = timer or StageTimer()
+    paragraphs = doc_obj.paragraphs
+    comments = []
     for it in issues_by_par:
         para_idx = it.get("paragraph_index")
         comment_text = it.get("issue", "")
@@ -133,14 +295,16 @@ def add_review_notes_and_save_doc(doc_obj: Document, original_path: str, output_
         if it.get("legal_reference"):
             comment_text += f" (Ref: {it.get('legal_reference')})"
 
-        if para_idx is not None and 0 <= para_idx < len(doc_obj.paragraphs):
-            insert_comment(doc_obj.paragraphs[para_idx], comment_text)
+        if para_idx is not None and 0 <= para_idx < len(paragraphs):
+            span = it.get("paragraph_span")
+            comments.append((paragraphs[para_idx], comment_text, tuple(span) if span else None))
         else:
-            p = doc_obj.add_paragraph()
-            insert_comment(p, comment_text)
+            comments.append((doc_obj.add_paragraph(), comment_text, None))
+    with timer.stage("comment_insertion"):
+        insert_comments(doc_obj, comments, mode=comment_mode)
 
-   
-    merged_doc = _create_front_summary_and_merge(doc_obj, issues_by_par, checklist_result)
+    with timer.stage("summary_merge"):
+        merged_doc = _create_front_summary_and_merge(doc_obj, issues_by_par, checklist_result)
 
     
     os.makedirs(output_dir, exist_ok=True)
@@ -148,92 +312,268 @@ def add_review_notes_and_save_doc(doc_obj: Document, original_path: str, output_
     reviewed_name = f"{base}_reviewed.docx"
     reviewed_path = os.path.abspath(os.path.join(output_dir, reviewed_name))
 
-    print(f"[DEBUG] Saving reviewed document to: {reviewed_path}")
-    write_docx(merged_doc, reviewed_path)
-    print(f"[DEBUG] Successfully saved reviewed document.")
+    with timer.stage("save"):
+        write_docx(merged_doc, reviewed_path)
+    logger.debug("Saved reviewed document to %s", reviewed_path)
 
     return reviewed_path
 
-def process_document(filepath: str, checklist_result: Dict[str, Any] = None, output_dir: str = None, debug: bool = False) -> Dict[str, Any]:
+def rules_fingerprint() -> str:
     """
-    Main document processing function.
-    Returns dictionary with file_name, document_type, issues, reviewed_path.
+    Version fingerprint of everything a cached result depends on: the rule code
+    version, registered rules, pattern lists, rule citations, the reference index
+    and the template set.
     """
-    try:
-        doc, paragraphs, full_text = _read_doc_text_and_paragraphs(filepath)
-    except Exception as e:
-        return {
-            "file_name": os.path.basename(filepath),
-            "document_type": "Unknown",
-            "issues": [{"issue": f"Failed to open .docx: {e}", "severity": "High"}],
-            "reviewed_path": None
-        }
+    h = hashlib.sha256(json.dumps({
+        "rules_version": RULES_VERSION,
+        "rules": list(RULES),
+        "doc_types": DOC_TYPE_CASCADE,
+        "patterns": get_scanner().groups(),
+        "reference_queries": RULE_REFERENCE_QUERIES,
+        "static_rules": STATIC_RULES,
+    }, sort_keys=True).encode("utf-8"))
+    h.update(index_fingerprint().encode("utf-8"))
+    h.update(template_fingerprint().encode("utf-8"))
+    return h.hexdigest()
 
-    
+def _artifact_context(checklist_result: Dict[str, Any], doc_type: str) -> str:
+    """
+    What a reviewed .docx depends on besides the issues: summary contents, comment
+    mode and document type. The path-keyed classifier map is left out, so the
+    artifact stays reusable when the same file is uploaded from a new temp path.
+    """
+    summary = {k: v for k, v in (checklist_result or {}).items() if k != "classified_documents"}
+    return hashlib.sha256(
+        json.dumps([summary, COMMENT_MODE, doc_type], sort_keys=True, default=str).encode("utf-8")
+    ).hexdigest()
+
+def _detect_doc_type(ctx: DocumentContext) -> str:
+    """Document type from the text's DOC_TYPE_CASCADE phrases, or "Unknown"."""
+    for phrase, _, doc_type in DOC_TYPE_CASCADE:
+        if ctx.contains(phrase):
+            return doc_type
+    return "Unknown"
+
+def _name_type(filepath: str) -> Optional[str]:
+    """Document type named by the file: the checklist's keywords first, then DOC_TYPE_CASCADE's."""
+    doc_type = normalize_name(filepath)
+    if doc_type:
+        return doc_type
     fn = os.path.basename(filepath).lower()
-    if "articles of association" in full_text.lower() or "articles" in fn:
-        doc_type = "Articles of Association"
-    elif "memorandum of association" in full_text.lower() or "memorandum" in fn:
-        doc_type = "Memorandum of Association"
-    elif "employment contract" in full_text.lower() or "employment" in fn:
-        doc_type = "Employment Contract"
-    elif "board resolution" in full_text.lower() or "board resolution" in fn:
-        doc_type = "Board Resolution"
-    else:
-        doc_type = "Unknown"
+    for _, fn_keyword, doc_type in DOC_TYPE_CASCADE:
+        if fn_keyword in fn:
+            return doc_type
+    return None
 
-    
-    issues = []
-    issues.extend(_find_jurisdiction_issues(full_text))
+def _classifier_type(filepath: str, checklist_result: Optional[Dict[str, Any]]) -> Optional[str]:
+    """The content classifier's type for the file (see doc_classifier.py), if it has one."""
+    classified = (checklist_result or {}).get("classified_documents", {}).get(filepath)
+    if classified and classified["document_type"] != "Unknown":
+        return classified["document_type"]
+    return None
 
-    if not _has_signature_block(paragraphs):
-        issues.append({
-            "paragraph_index": len(paragraphs)-1 if paragraphs else None,
-            "issue": "No signature block detected in the final paragraphs.",
-            "severity": "High",
-            "suggestion": "Add signature block with name, designation, company name and date.",
-            "legal_reference": get_legal_reference("signature")
-        })
-
-    ambs = _find_ambiguous_sentences(full_text)
-    for s in ambs[:8]:
-        idx = next((i for i, p in enumerate(paragraphs) if s in p.text), None)
-        issues.append({
-            "paragraph_index": idx,
-            "issue": f"Ambiguous/non-binding language detected: \"{s[:200]}\"",
-            "severity": "Medium",
-            "suggestion": "Consider replacing 'may' with 'shall' or more precise wording.",
-            "legal_reference": get_legal_reference("ambiguous")
-        })
-
-    if not _has_clause_numbering(paragraphs):
-        issues.append({
-            "paragraph_index": None,
-            "issue": "Document appears to lack numbered clauses/section headings.",
-            "severity": "Low",
-            "suggestion": "Use numbered clause headings (1., 1.1, 2., etc.) to improve clarity.",
-            "legal_reference": get_legal_reference("numbered clauses")
-        })
+def _resolve_doc_type(content_type: str, filepath: str, checklist_result: Optional[Dict[str, Any]]) -> str:
+    """
+    Final document type. As in the checklist, a type named by the file wins; then
+    the content cascade, then the classifier's guess.
+    """
+    if content_type == "Unknown":
+        content_type = None
+    return _name_type(filepath) or content_type or _classifier_type(filepath, checklist_result) or "Unknown"
 
-   
-    reviewed_path = None
+def _analyze(filepath: str, paragraphs, full_text: str, offsets: ParagraphOffsets, references: Optional[Dict[str, str]], process: Optional[str] = None, timer: Optional[StageTimer] = None):
+    """
+    Detect the document type and run the enabled rules in one walk.
+    Returns (doc_type, issues); stage timings go to `timer` ("check.<rule>" per rule).
+    """
+    timer = timer or StageTimer()
+    with timer.stage("scan"):
+        ctx = DocumentContext(filepath, paragraphs, full_text, offsets, _scan(full_text))
+    with timer.stage("doc_type"):
+        doc_type = _detect_doc_type(ctx)
+    issues, rule_timings = run_rules(ctx, process)
+    for name, ms in rule_timings.items():
+        timer.add(f"check.{name}", ms)
+    with timer.stage("rag_lookup"):
+        _resolve_legal_references(issues, references)
+    return doc_type, issues
+
+def _analyze_stream(filepath: str, references: Optional[Dict[str, str]], process: Optional[str] = None, timer: Optional[StageTimer] = None):
+    """
+    Memory-bounded `_analyze`: paragraphs are streamed from word/document.xml and
+    checked as they arrive, without a Document, paragraph list or full_text.
+    Returns (doc_type, issues); reading and scanning are timed together as "stream".
+    """
+    timer = timer or StageTimer()
+    ctx = StreamingContext(filepath, [phrase for phrase, _, _ in DOC_TYPE_CASCADE])
+    t0 = time.perf_counter()
+    try:
+        issues, rule_timings = run_rules_stream(ctx, iter_docx_paragraph_texts(filepath), get_scanner(), process)
+    except Exception as e:
+        raise RuntimeError(f"Error reading DOCX file {filepath}: {e}")
+    timer.add("stream", (time.perf_counter() - t0) * 1000.0 - sum(rule_timings.values()))
+    for name, ms in rule_timings.items():
+        timer.add(f"check.{name}", ms)
+    with timer.stage("doc_type"):
+        doc_type = _detect_doc_type(ctx)
+    with timer.stage("rag_lookup"):
+        _resolve_legal_references(issues, references)
+    return doc_type, issues
+
+def _save_reviewed(doc: Document, filepath: str, output_dir: Optional[str], issues: List[Dict[str, Any]], checklist_result: Dict[str, Any], timer: Optional[StageTimer] = None) -> Optional[str]:
     try:
-        reviewed_path = add_review_notes_and_save_doc(
+        return add_review_notes_and_save_doc(
             doc,
             filepath,
             output_dir or os.path.join(os.path.dirname(filepath), "tmp_reviewed"),
             issues,
-            checklist_result or {}
+            checklist_result or {},
+            timer=timer
         )
     except Exception as e:
-        print(f"[ERROR] Failed to save reviewed doc for {filepath}: {e}")
-        import traceback
-        traceback.print_exc()
-        reviewed_path = None
+        logger.exception("Failed to save reviewed doc for %s: %s", filepath, e)
+        return None
 
-    return {
+def _cached_reviewed_path(hit: Dict[str, Any], filepath: str, output_dir: Optional[str], checklist_result: Dict[str, Any], timer: Optional[StageTimer] = None) -> Tuple[Optional[str], bool]:
+    """
+    Reviewed .docx for a cache hit: the stored artifact if it was built for the same
+    context, otherwise rebuilt from the cached issues. Returns (path, rebuilt).
+    """
+    if hit.get("artifact") and hit.get("artifact_context") == _artifact_context(checklist_result, hit["document_type"]):
+        out_dir = output_dir or os.path.join(os.path.dirname(filepath), "tmp_reviewed")
+        os.makedirs(out_dir, exist_ok=True)
+        base = os.path.splitext(os.path.basename(filepath))[0]
+        path = os.path.abspath(os.path.join(out_dir, f"{base}_reviewed.docx"))
+        with open(path, "wb") as fh:
+            fh.write(hit["artifact"])
+        return path, False
+    timer = timer or StageTimer()
+    with timer.stage("read_docx"):
+        doc = read_docx(filepath)[0]
+    return _save_reviewed(doc, filepath, output_dir, hit["issues"], checklist_result, timer), True
+
+def _store_result(cache: ResultCache, file_hash: str, fingerprint: str, doc_type: str, issues: List[Dict[str, Any]], reviewed_path: Optional[str], checklist_result: Dict[str, Any]) -> None:
+    artifact = None
+    if reviewed_path and os.path.exists(reviewed_path):
+        with open(reviewed_path, "rb") as fh:
+            artifact = fh.read()
+    try:
+        cache.put(file_hash, fingerprint, doc_type, issues, artifact, _artifact_context(checklist_result, doc_type) if artifact else None)
+    except Exception as e:
+        logger.error("Failed to cache result for %s: %s", file_hash[:12], e)
+
+_purged_fingerprint = None
+
+def _process(filepath: str, checklist_result: Optional[Dict[str, Any]], output_dir: Optional[str], references: Optional[Dict[str, str]],
+             report_only: bool, cache: Optional[ResultCache], process: Optional[str], timer: StageTimer,
+             streaming: Optional[bool] = None) -> Dict[str, Any]:
+    """Body of `process_document`; every stage it runs is recorded on `timer`."""
+    global _purged_fingerprint
+    if streaming is None:
+        try:
+            streaming = report_only and os.path.getsize(filepath) >= STREAM_MIN_MB * 1024 * 1024
+        except OSError:
+            # Unreadable file: the normal open below reports it as the document's issue.
+            streaming, cache = False, None
+    report_only = report_only or streaming
+    file_hash = fingerprint = None
+    if cache is not None:
+        try:
+            # The enabled rule set depends on the process and streaming results lack
+            # the template comparison. Beyond the bytes, the document type (hence the
+            # template issues) depends on the file name and, without a type in the
+            # name, on the classifier's guess, so those are part of the key too.
+            mode = "stream" if streaming else "full"
+            name_type = _name_type(filepath)
+            key = [enabled_rules(process), mode, name_type, None if name_type else _classifier_type(filepath, checklist_result)]
+            file_hash = hashlib.sha256(
+                f"{sha256_file(filepath)}:{json.dumps(key)}".encode("utf-8")
+            ).hexdigest()
+            fingerprint = rules_fingerprint()
+            if fingerprint != _purged_fingerprint:
+                # Rules or references changed: results under older fingerprints are dead.
+                cache.purge_stale(fingerprint)
+                _purged_fingerprint = fingerprint
+            with timer.stage("cache_lookup"):
+                hit = cache.get(file_hash, fingerprint)
+        except Exception as e:
+            logger.error("Result cache lookup failed for %s: %s", filepath, e)
+            cache, hit = None, None
+        if hit is not None:
+            reviewed_path = None
+            if not report_only:
+                try:
+                    reviewed_path, rebuilt = _cached_reviewed_path(hit, filepath, output_dir, checklist_result or {}, timer)
+                except Exception as e:
+                    logger.error("Failed to restore reviewed doc for %s: %s", filepath, e)
+                    reviewed_path, rebuilt = None, False
+                if rebuilt:
+                    with timer.stage("cache_store"):
+                        _store_result(cache, file_hash, fingerprint, hit["document_type"], hit["issues"], reviewed_path, checklist_result or {})
+            return {
+                "file_name": os.path.basename(filepath),
+                "document_type": hit["document_type"],
+                "issues": hit["issues"],
+                "reviewed_path": reviewed_path,
+                "cache": "hit"
+            }
+
+    try:
+        if streaming:
+            doc_type, issues = _analyze_stream(filepath, references, process, timer)
+        else:
+            with timer.stage("read_docx"):
+                doc, paragraphs, full_text, offsets = _read_doc_text_and_paragraphs(filepath, report_only)
+    except Exception as e:
+        return {
+            "file_name": os.path.basename(filepath),
+            "document_type": "Unknown",
+            "issues": [{"issue": f"Failed to open .docx: {e}", "severity": "High"}],
+            "reviewed_path": None
+        }
+
+    if not streaming:
+        doc_type, issues = _analyze(filepath, paragraphs, full_text, offsets, references, process, timer)
+    doc_type = _resolve_doc_type(doc_type, filepath, checklist_result)
+    if not streaming:
+        # Streaming mode keeps no paragraph list, so it skips the template comparison.
+        with timer.stage("template_diff"):
+            issues.extend(template_deviations(doc_type, [p.text for p in paragraphs]))
+
+   
+    reviewed_path = None
+    if not report_only:
+        reviewed_path = _save_reviewed(doc, filepath, output_dir, issues, checklist_result, timer)
+
+    result = {
         "file_name": os.path.basename(filepath),
         "document_type": doc_type,
         "issues": issues,
         "reviewed_path": reviewed_path
     }
+    if cache is not None:
+        with timer.stage("cache_store"):
+            _store_result(cache, file_hash, fingerprint, doc_type, issues, reviewed_path, checklist_result or {})
+        result["cache"] = "miss"
+    return result
+
+def process_document(filepath: str, checklist_result: Dict[str, Any] = None, output_dir: str = None, debug: bool = False, references: Optional[Dict[str, str]] = None, report_only: bool = False, use_cache: bool = True, streaming: Optional[bool] = None) -> Dict[str, Any]:
+    """
+    Main document processing function.
+    `references` is an optional query -> citation map from `prefetch_legal_references`.
+    `report_only` analyses the text only and skips building/saving the reviewed .docx.
+    `streaming` analyses in bounded memory (implies report_only); None picks it
+    for report_only files of at least ADGM_STREAM_MIN_MB.
+    `use_cache` looks the file up in the persistent result cache (see result_cache.py).
+    Returns dictionary with file_name, document_type, issues, reviewed_path,
+    timings_ms (milliseconds per pipeline stage, see metrics.py) and
+    "cache": "hit"/"miss" when the cache is enabled. `debug` logs the timings.
+    """
+    process = (checklist_result or {}).get("process")
+    cache = get_result_cache() if use_cache else None
+    timer = StageTimer(file_name=os.path.basename(filepath))
+    result = _process(filepath, checklist_result, output_dir, references, report_only, cache, process, timer, streaming)
+    result["timings_ms"] = timer.timings
+    if debug:
+        logger.info("Timings for %s (ms): %s", result["file_name"], timer.timings)
+    return result
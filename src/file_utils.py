@@ -2,19 +2,161 @@
 import json
 import csv
 import os
-from typing import List, Tuple, Any
+import zipfile
+import xml.etree.ElementTree as ET
+from array import array
+from bisect import bisect_right
+from typing import Iterable, Iterator, List, NamedTuple, Optional, Tuple, Any
 from docx import Document
 
-def read_docx(filepath: str) -> Tuple[Document, List[Any], str]:
+_W = "{http://schemas.openxmlformats.org/wordprocessingml/2006/main}"
+_W_BODY, _W_P, _W_R, _W_HYPERLINK = _W + "body", _W + "p", _W + "r", _W + "hyperlink"
+# Run children that contribute text, mirroring python-docx `Run.text`.
+_RUN_TEXT = {_W + "tab": "\t", _W + "ptab": "\t", _W + "noBreakHyphen": "-", _W + "cr": "\n"}
+_W_T, _W_BR, _W_TYPE = _W + "t", _W + "br", _W + "type"
+
+
+class TextParagraph(NamedTuple):
+    """Text-only stand-in for a python-docx Paragraph (exposes `.text`)."""
+    text: str
+
+
+class ParagraphOffsets:
+    """
+    Compact map from `full_text` character offsets back to paragraph indexes.
+
+    `full_text` joins the non-blank paragraphs with "\n"; `starts[k]` is where the
+    k-th joined paragraph begins and `para_index[k]` is its index in the document's
+    paragraph list. Lookups are a binary search over `starts`.
+    """
+    __slots__ = ("starts", "para_index", "text_length")
+
+    def __init__(self):
+        self.starts = array("q")
+        self.para_index = array("l")
+        self.text_length = 0
+
+    def __len__(self) -> int:
+        return len(self.starts)
+
+    def locate(self, pos: int) -> Optional[int]:
+        """Paragraph index containing character `pos` (a separator maps to the paragraph before it)."""
+        if not self.starts or pos < 0 or pos >= self.text_length:
+            return None
+        k = bisect_right(self.starts, pos) - 1
+        return self.para_index[k] if k >= 0 else None
+
+    def paragraphs_for_span(self, start: int, end: int) -> List[int]:
+        """Paragraph indexes overlapped by the half-open span [start, end)."""
+        if not self.starts or end <= start:
+            return []
+        lo = max(bisect_right(self.starts, start) - 1, 0)
+        hi = bisect_right(self.starts, end - 1)
+        return list(self.para_index[lo:hi])
+
+    def append(self, para_idx: int, length: int) -> int:
+        """Add the next non-blank paragraph (joined after a "\n"); returns its start."""
+        pos = self.text_length + 1 if self.starts else 0
+        self.starts.append(pos)
+        self.para_index.append(para_idx)
+        self.text_length = pos + length
+        return pos
+
+    def trim(self, pos: int) -> None:
+        """Forget paragraphs that end before `pos` (streaming: bounded by the live window)."""
+        k = bisect_right(self.starts, pos) - 1
+        if k > 0:
+            del self.starts[:k]
+            del self.para_index[:k]
+
+    def paragraph_bounds(self, para_idx: int) -> Optional[Tuple[int, int]]:
+        """`full_text` span (start, end) of paragraph `para_idx` (None if it was blank)."""
+        k = bisect_right(self.para_index, para_idx) - 1
+        if k < 0 or self.para_index[k] != para_idx:
+            return None
+        end = self.starts[k + 1] - 1 if k + 1 < len(self.starts) else self.text_length
+        return self.starts[k], end
+
+
+def join_paragraph_texts(texts: Iterable[str]) -> Tuple[str, ParagraphOffsets]:
+    """Join non-blank paragraph texts with "\n" and record where each one starts."""
+    offsets = ParagraphOffsets()
+    parts = []
+    for i, t in enumerate(texts):
+        if not t or not t.strip():
+            continue
+        offsets.append(i, len(t))
+        parts.append(t)
+    return "\n".join(parts), offsets
+
+
+def iter_docx_paragraph_texts(filepath: str) -> Iterator[str]:
+    """
+    Stream the texts of the body-level paragraphs (what python-docx exposes as
+    `Document.paragraphs`) straight from word/document.xml with incremental
+    parsing. Finished elements are cleared, so memory does not grow with the document.
+    """
+    with zipfile.ZipFile(filepath) as z, z.open("word/document.xml") as fh:
+        stack = []
+        body = body_depth = None
+        parts = None
+        for event, el in ET.iterparse(fh, events=("start", "end")):
+            if event == "start":
+                stack.append(el.tag)
+                if el.tag == _W_BODY and body_depth is None:
+                    body, body_depth = el, len(stack)
+                elif el.tag == _W_P and body_depth is not None and len(stack) == body_depth + 1:
+                    parts = []
+                continue
+
+            tag = stack.pop()
+            if parts is not None and body_depth is not None:
+                # Only direct run content of the paragraph (p/r/x or p/hyperlink/r/x) counts.
+                depth = len(stack)
+                in_run = depth >= body_depth + 2 and stack[-1] == _W_R and (
+                    depth == body_depth + 2
+                    or (depth == body_depth + 3 and stack[-2] == _W_HYPERLINK)
+                )
+                if in_run:
+                    if tag == _W_T:
+                        parts.append(el.text or "")
+                    elif tag == _W_BR:
+                        if el.get(_W_TYPE, "textWrapping") == "textWrapping":
+                            parts.append("\n")
+                    elif tag in _RUN_TEXT:
+                        parts.append(_RUN_TEXT[tag])
+                if tag == _W_P and len(stack) == body_depth:
+                    yield "".join(parts)
+                    parts = None
+            if body_depth is not None and len(stack) == body_depth:
+                # A body child is finished: drop it entirely, not just its content.
+                el.clear()
+                del body[:]
+
+def read_docx_text(filepath: str) -> Tuple[List[TextParagraph], str, ParagraphOffsets]:
+    """
+    Fast text-only alternative to `read_docx` (no python-docx object model).
+    Returns (paragraphs, full_text, offsets) with the same full_text/offsets as `read_docx`.
+    Raises RuntimeError on failure.
+    """
+    try:
+        paragraphs = [TextParagraph(t) for t in iter_docx_paragraph_texts(filepath)]
+        text, offsets = join_paragraph_texts(p.text for p in paragraphs)
+        return paragraphs, text, offsets
+    except Exception as e:
+        raise RuntimeError(f"Error reading DOCX file {filepath}: {e}")
+
+def read_docx(filepath: str) -> Tuple[Document, List[Any], str, ParagraphOffsets]:
     """
-    Read a .docx and return (Document object, list of paragraphs, full_text).
+    Read a .docx and return (Document object, list of paragraphs, full_text, offsets).
+    `offsets` maps full_text character positions to paragraph indexes.
     Raises RuntimeError on failure.
     """
     try:
         doc = Document(filepath)
         paragraphs = [p for p in doc.paragraphs]
-        text = "\n".join(p.text for p in paragraphs if p.text and p.text.strip())
-        return doc, paragraphs, text
+        text, offsets = join_paragraph_texts(p.text for p in paragraphs)
+        return doc, paragraphs, text, offsets
     except Exception as e:
         raise RuntimeError(f"Error reading DOCX file {filepath}: {e}")
 
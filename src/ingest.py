@@ -0,0 +1,284 @@
+import os
+import re
+import json
+import uuid
+import hashlib
+import logging
+import unicodedata
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import unquote, urlparse
+
+from .rag_engine import PROVENANCE_FILE, REF_DIR
+
+logger = logging.getLogger(__name__)
+
+_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+DATA_SOURCES_CSV = os.environ.get("ADGM_DATA_SOURCES", os.path.join(_ROOT, "data", "data_sources.csv"))
+# Local copies of the files listed in DATA_SOURCES_CSV (downloaded by hand or by a sync job).
+SOURCES_DIR = os.environ.get("ADGM_SOURCES_DIR", os.path.join(_ROOT, "data", "sources"))
+SOURCE_EXTENSIONS = (".docx", ".pdf", ".txt")
+INGEST_FORMAT_VERSION = 1
+
+_HYPHEN_BREAK_RE = re.compile(r"(\w)-\n(?=[a-z])")
+_BLANK_RUN_RE = re.compile(r"\n{3,}")
+
+
+def read_data_sources(csv_path: str = DATA_SOURCES_CSV) -> List[Dict[str, str]]:
+    """
+    Rows of the sources CSV as {category, document_type, url}. The middle column
+    holds unquoted commas ("General Incorporation, AoA, MoA, ..."), so a line is
+    split on its first and last comma rather than parsed as strict CSV.
+    """
+    rows = []
+    with open(csv_path, "r", encoding="utf-8-sig") as fh:
+        next(fh, None)  # header
+        for line in fh:
+            line = line.strip()
+            if line.count(",") < 2:
+                continue
+            category, rest = line.split(",", 1)
+            doc_type, url = rest.rsplit(",", 1)
+            rows.append({"category": category.strip(), "document_type": doc_type.strip().strip('"'), "url": url.strip()})
+    return rows
+
+
+def _url_filename(url: str) -> Optional[str]:
+    """File name a source URL downloads as (the last path segment with a known extension)."""
+    for segment in reversed(urlparse(url).path.split("/")):
+        name = unquote(segment).lower()
+        if os.path.splitext(name)[1] in SOURCE_EXTENSIONS:
+            return name
+    return None
+
+
+def _provenance_by_filename(rows: List[Dict[str, str]]) -> Dict[str, Dict[str, str]]:
+    out = {}
+    for row in rows:
+        name = _url_filename(row["url"])
+        if name:
+            out.setdefault(name, row)
+    return out
+
+
+def normalize_text(text: str) -> str:
+    """NFKC, unified newlines, collapsed whitespace, re-joined hyphenated line breaks, no blank runs."""
+    text = unicodedata.normalize("NFKC", text).replace("\r\n", "\n").replace("\r", "\n")
+    text = "\n".join(" ".join(line.split()) for line in text.split("\n"))
+    text = _HYPHEN_BREAK_RE.sub(r"\1", text)
+    return _BLANK_RUN_RE.sub("\n\n", text).strip()
+
+
+def extract_text(path: str) -> str:
+    """Raw text of a .docx, .pdf or .txt file. Raises RuntimeError on failure."""
+    ext = os.path.splitext(path)[1].lower()
+    try:
+        if ext == ".docx":
+            from .file_utils import iter_docx_paragraph_texts
+
+            return "\n".join(iter_docx_paragraph_texts(path))
+        if ext == ".pdf":
+            try:
+                from pypdf import PdfReader
+            except ImportError:
+                raise RuntimeError("PDF extraction requires the pypdf package (pip install pypdf)")
+            return "\n\n".join(page.extract_text() or "" for page in PdfReader(path).pages)
+        with open(path, "r", encoding="utf-8", errors="replace") as fh:
+            return fh.read()
+    except RuntimeError:
+        raise
+    except Exception as e:
+        raise RuntimeError(f"Error extracting {path}: {e}")
+
+
+def _extract_job(path: str) -> Tuple[Optional[str], Optional[str]]:
+    """Worker entry point: (normalized text, None) or (None, error message)."""
+    try:
+        return normalize_text(extract_text(path)), None
+    except Exception as e:
+        return None, str(e)
+
+
+def _sha256_file(path: str) -> str:
+    h = hashlib.sha256()
+    with open(path, "rb") as fh:
+        for block in iter(lambda: fh.read(1 << 20), b""):
+            h.update(block)
+    return h.hexdigest()
+
+
+def _scan_sources(sources_dir: str) -> List[str]:
+    """Source paths relative to `sources_dir`, sorted; hidden files and Word lock files skipped."""
+    found = []
+    for dirpath, dirnames, filenames in os.walk(sources_dir):
+        dirnames[:] = sorted(d for d in dirnames if not d.startswith("."))
+        for name in filenames:
+            if name.startswith((".", "~$")) or os.path.splitext(name)[1].lower() not in SOURCE_EXTENSIONS:
+                continue
+            found.append(os.path.relpath(os.path.join(dirpath, name), sources_dir))
+    return sorted(found)
+
+
+def _output_name(rel: str, taken: set, out_dir: str) -> str:
+    """
+    Output file for a new source: "<stem>.txt", else "<stem>_<ext>.txt", else
+    "<stem>_<ext>_<n>.txt". Names used by other sources and files already in
+    `out_dir` (e.g. hand-written references) are skipped, never overwritten.
+    """
+    stem, ext = os.path.splitext(rel.replace(os.sep, "__"))
+    candidates = [f"{stem}.txt", f"{stem}_{ext[1:].lower()}.txt"]
+    n = 2
+    while True:
+        for name in candidates:
+            if name not in taken and not os.path.exists(os.path.join(out_dir, name)):
+                return name
+        candidates = [f"{stem}_{ext[1:].lower()}_{n}.txt"]
+        n += 1
+
+
+def load_provenance(out_dir: str = REF_DIR) -> Dict[str, Any]:
+    """The ingestion manifest of `out_dir`: source -> hash, output file and provenance."""
+    path = os.path.join(out_dir, PROVENANCE_FILE)
+    try:
+        with open(path, "r", encoding="utf-8") as fh:
+            saved = json.load(fh)
+    except (OSError, ValueError):
+        return {"version": INGEST_FORMAT_VERSION, "sources": {}}
+    if saved.get("version") != INGEST_FORMAT_VERSION:
+        return {"version": INGEST_FORMAT_VERSION, "sources": {}}
+    return saved
+
+
+def _write_atomic(path: str, text: str) -> None:
+    tmp = f"{path}.{uuid.uuid4().hex}.tmp"
+    with open(tmp, "w", encoding="utf-8") as fh:
+        fh.write(text)
+    os.replace(tmp, path)
+
+
+def ingest_sources(
+    sources_dir: Optional[str] = None,
+    out_dir: Optional[str] = None,
+    csv_path: Optional[str] = None,
+    workers: Optional[int] = None,
+    force: bool = False,
+    rebuild: bool = True,
+) -> Dict[str, Any]:
+    """
+    Extract every source file under `sources_dir` (default SOURCES_DIR) into
+    normalized `.txt` files in `out_dir` (default REF_DIR), recording provenance
+    from the sources CSV (default DATA_SOURCES_CSV).
+
+    Incremental: a source is re-extracted only when its size/mtime changed and its
+    sha256 differs from the last run; outputs of deleted sources are removed.
+    Extraction runs in `workers` processes (default: CPU count). With `rebuild`,
+    the retrieval index is refreshed afterwards (a no-op if no output changed).
+    """
+    sources_dir = sources_dir or SOURCES_DIR
+    out_dir = out_dir or REF_DIR
+    csv_path = csv_path or DATA_SOURCES_CSV
+    if not os.path.isdir(sources_dir):
+        raise FileNotFoundError(f"Sources dir not found: {sources_dir}")
+    os.makedirs(out_dir, exist_ok=True)
+    rows = read_data_sources(csv_path) if os.path.exists(csv_path) else []
+    by_name = _provenance_by_filename(rows)
+    previous = load_provenance(out_dir)["sources"]
+
+    entries: Dict[str, Dict[str, Any]] = {}
+    todo: List[str] = []
+    unchanged = 0
+    taken = {e["output"] for e in previous.values()}
+    for rel in _scan_sources(sources_dir):
+        path = os.path.join(sources_dir, rel)
+        try:
+            st = os.stat(path)
+        except OSError as e:
+            logger.warning("Ingest: cannot stat %s: %s", path, e)
+            continue
+        row = by_name.get(os.path.basename(rel).lower(), {})
+        old = previous.get(rel)
+        entry = {
+            "mtime": st.st_mtime_ns,
+            "size": st.st_size,
+            "category": row.get("category"),
+            "document_type": row.get("document_type"),
+            "url": row.get("url"),
+        }
+        if old and not force and os.path.exists(os.path.join(out_dir, old["output"])):
+            same_stat = old["mtime"] == st.st_mtime_ns and old["size"] == st.st_size
+            digest = old["sha256"] if same_stat else _sha256_file(path)
+            if digest == old["sha256"]:
+                entries[rel] = dict(entry, sha256=digest, output=old["output"], chars=old.get("chars"))
+                unchanged += 1
+                continue
+        else:
+            digest = _sha256_file(path)
+        output = old["output"] if old else _output_name(rel, taken, out_dir)
+        taken.add(output)
+        entries[rel] = dict(entry, sha256=digest, output=output)
+        todo.append(rel)
+
+    failed = {}
+    if todo:
+        workers = min(workers or os.cpu_count() or 1, len(todo))
+        paths = [os.path.join(sources_dir, rel) for rel in todo]
+        pool = None
+        if workers <= 1:
+            extracted = map(_extract_job, paths)
+        else:
+            # spawn, like the review pool: callers may be multi-threaded servers.
+            pool = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"))
+            extracted = pool.map(_extract_job, paths, chunksize=max(1, len(todo) // (workers * 4)))
+        try:
+            for rel, (text, error) in zip(todo, extracted):
+                if error is not None or not text:
+                    failed[rel] = error or "no text extracted"
+                    logger.warning("Ingest: skipping %s: %s", rel, failed[rel])
+                    entries.pop(rel)
+                    continue
+                _write_atomic(os.path.join(out_dir, entries[rel]["output"]), text + "\n")
+                entries[rel]["chars"] = len(text)
+        finally:
+            if pool is not None:
+                pool.shutdown(wait=True, cancel_futures=True)
+
+    live = {e["output"] for e in entries.values()}
+    removed = 0
+    for rel, old in previous.items():
+        if rel not in entries and old["output"] not in live and rel not in failed:
+            try:
+                os.remove(os.path.join(out_dir, old["output"]))
+                removed += 1
+            except FileNotFoundError:
+                pass
+    # A source that failed this time keeps its last good extraction.
+    for rel in failed:
+        if rel in previous:
+            entries[rel] = previous[rel]
+
+    manifest = json.dumps({"version": INGEST_FORMAT_VERSION, "sources": dict(sorted(entries.items()))}, ensure_ascii=False, indent=1)
+    # Rewritten only on change: its stat is part of the RAG index fingerprint.
+    if manifest != json.dumps(load_provenance(out_dir), ensure_ascii=False, indent=1):
+        _write_atomic(os.path.join(out_dir, PROVENANCE_FILE), manifest)
+    summary = {
+        "sources_dir": os.path.abspath(sources_dir),
+        "out_dir": os.path.abspath(out_dir),
+        "sources": len(entries),
+        "extracted": len(todo) - len(failed),
+        "unchanged": unchanged,
+        "removed": removed,
+        "failed": failed,
+        "with_provenance": sum(1 for e in entries.values() if e.get("url")),
+    }
+    if rebuild:
+        summary["index"] = _refresh_index(out_dir)
+    return summary
+
+
+def _refresh_index(out_dir: str) -> Dict[str, Any]:
+    from . import rag_engine
+
+    if os.path.abspath(out_dir) == os.path.abspath(REF_DIR):
+        return rag_engine.rebuild_index()
+    return rag_engine.LocalRAG(out_dir).summary()
@@ -0,0 +1,173 @@
+import os
+import time
+import uuid
+import logging
+import threading
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+from .report_generator import _severity_key
+
+logger = logging.getLogger(__name__)
+
+# Prometheus text file rewritten after every run, and/or a port serving GET /metrics.
+METRICS_FILE = os.environ.get("ADGM_METRICS_FILE")
+METRICS_PORT = int(os.environ.get("ADGM_METRICS_PORT", "0"))
+
+# hook(stage, milliseconds, labels) is called whenever a stage finishes, in the
+# process that ran it (pool workers included); use it to feed a profiler or tracer.
+TimerHook = Callable[[str, float, Dict[str, Any]], None]
+_hooks: List[TimerHook] = []
+
+
+def add_timer_hook(hook: TimerHook) -> None:
+    _hooks.append(hook)
+
+
+def remove_timer_hook(hook: TimerHook) -> None:
+    if hook in _hooks:
+        _hooks.remove(hook)
+
+
+class StageTimer:
+    """
+    Wall-clock milliseconds per pipeline stage for one document (or one run).
+    Repeated stages accumulate; `timings` keeps first-seen order.
+    """
+
+    def __init__(self, **labels):
+        self.labels = labels
+        self.timings: Dict[str, float] = {}
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        t0 = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(name, (time.perf_counter() - t0) * 1000.0)
+
+    def add(self, name: str, ms: float) -> None:
+        self.timings[name] = round(self.timings.get(name, 0.0) + ms, 3)
+        for hook in list(_hooks):
+            try:
+                hook(name, ms, self.labels)
+            except Exception:
+                logger.exception("Timer hook %r failed", hook)
+
+
+class Metrics:
+    """
+    Process-wide counters rendered in the Prometheus text format. Document
+    results are recorded where they are collected (the parent of a worker pool),
+    from the `timings_ms` each result carries.
+    """
+
+    _HELP = {
+        "adgm_documents_processed_total": ("counter", "Documents reviewed."),
+        "adgm_issues_total": ("counter", "Issues found, by severity."),
+        "adgm_result_cache_hits_total": ("counter", "Result cache hits."),
+        "adgm_result_cache_misses_total": ("counter", "Result cache misses."),
+        "adgm_rag_query_cache_hits_total": ("counter", "RAG query cache hits."),
+        "adgm_rag_query_cache_misses_total": ("counter", "RAG query cache misses."),
+        "adgm_stage_duration_seconds": ("summary", "Time spent per pipeline stage."),
+    }
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._values: Dict[Tuple[str, Tuple[Tuple[str, str], ...]], float] = {}
+
+    def inc(self, name: str, value: float = 1.0, **labels) -> None:
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + value
+
+    def set(self, name: str, value: float, **labels) -> None:
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self._values[key] = value
+
+    def observe_rag_cache(self, stats: Dict[str, Any]) -> None:
+        """Mirror the RAG engine's cumulative query cache counters (see rag_engine.rag_cache_stats)."""
+        self.set("adgm_rag_query_cache_hits_total", stats.get("hits", 0))
+        self.set("adgm_rag_query_cache_misses_total", stats.get("misses", 0))
+
+    def observe_stage(self, stage: str, ms: float) -> None:
+        self.inc("adgm_stage_duration_seconds_sum", ms / 1000.0, stage=stage)
+        self.inc("adgm_stage_duration_seconds_count", 1, stage=stage)
+
+    def observe_stages(self, timings: Dict[str, float]) -> None:
+        for stage, ms in (timings or {}).items():
+            self.observe_stage(stage, ms)
+
+    def observe_document(self, result: Dict[str, Any]) -> None:
+        self.inc("adgm_documents_processed_total")
+        for it in result.get("issues", []):
+            self.inc("adgm_issues_total", severity=_severity_key(it))
+        if result.get("cache") == "hit":
+            self.inc("adgm_result_cache_hits_total")
+        elif result.get("cache") == "miss":
+            self.inc("adgm_result_cache_misses_total")
+        self.observe_stages(result.get("timings_ms"))
+
+    def render(self) -> str:
+        with self._lock:
+            items = sorted(self._values.items())
+        lines, seen = [], set()
+        for (name, labels), value in items:
+            family = name.rsplit("_sum", 1)[0].rsplit("_count", 1)[0] if name.startswith("adgm_stage_") else name
+            if family not in seen and family in self._HELP:
+                seen.add(family)
+                kind, text = self._HELP[family]
+                lines.append(f"# HELP {family} {text}")
+                lines.append(f"# TYPE {family} {kind}")
+            label_text = ",".join(f'{k}="{v}"' for k, v in labels)
+            lines.append(f"{name}{{{label_text}}} {value:g}" if label_text else f"{name} {value:g}")
+        return "\n".join(lines) + "\n"
+
+    def write(self, path: str) -> None:
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        tmp = f"{path}.{uuid.uuid4().hex}.tmp"
+        with open(tmp, "w", encoding="utf-8") as fh:
+            fh.write(self.render())
+        os.replace(tmp, path)
+
+
+METRICS = Metrics()
+
+
+def flush_metrics(path: Optional[str] = None) -> None:
+    """Rewrite the metrics file (ADGM_METRICS_FILE unless `path` is given); no-op if none."""
+    path = path or METRICS_FILE
+    if path:
+        try:
+            METRICS.write(path)
+        except OSError as e:
+            logger.warning("Failed to write metrics to %s: %s", path, e)
+
+
+def serve_metrics(port: int = METRICS_PORT, host: str = "0.0.0.0"):
+    """Serve GET /metrics from a daemon thread; returns the server (None if port is 0)."""
+    if not port:
+        return None
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.split("?")[0] != "/metrics":
+                self.send_error(404)
+                return
+            body = METRICS.render().encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer((host, port), Handler)
+    threading.Thread(target=server.serve_forever, name="metrics", daemon=True).start()
+    logger.info("Serving metrics on http://%s:%d/metrics", host, port)
+    return server
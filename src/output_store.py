@@ -0,0 +1,155 @@
+import os
+import re
+import io
+import time
+import uuid
+import shutil
+import hashlib
+import zipfile
+import logging
+import threading
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Optional
+
+logger = logging.getLogger(__name__)
+
+OUTPUT_DIR = os.environ.get("ADGM_OUTPUT_DIR", "tmp_reviewed")
+OUTPUT_MAX_MB = float(os.environ.get("ADGM_OUTPUT_MAX_MB", "512"))
+OUTPUT_MAX_AGE_HOURS = float(os.environ.get("ADGM_OUTPUT_MAX_AGE_HOURS", "72"))
+
+RUNS_DIR_NAME = ".runs"
+_HASH_LEN = 20
+# Only files written by the store are ever evicted: "<prefix>-<hash><ext>".
+_STORED_NAME = re.compile(r"^(?:.*-)?[0-9a-f]{%d}(?:\.[A-Za-z0-9]+)?$" % _HASH_LEN)
+_ZIP_SUFFIXES = (".docx", ".zip")
+_FIXED_ZIP_DATE = (1980, 1, 1, 0, 0, 0)
+
+
+def content_digest(data: bytes, suffix: str = "") -> str:
+    """
+    SHA-256 of an artifact's content. Zip containers (.docx, .zip) are hashed over
+    their entry names and uncompressed bytes, so re-saving identical content with
+    new zip timestamps still maps to the same key.
+    """
+    h = hashlib.sha256()
+    if suffix.lower() in _ZIP_SUFFIXES:
+        try:
+            with zipfile.ZipFile(io.BytesIO(data)) as z:
+                for info in sorted(z.infolist(), key=lambda i: i.filename):
+                    h.update(info.filename.encode("utf-8") + b"\0")
+                    h.update(z.read(info))
+                    h.update(b"\0")
+            return h.hexdigest()
+        except zipfile.BadZipFile:
+            h = hashlib.sha256()
+    h.update(data)
+    return h.hexdigest()
+
+
+def build_zip(files: Dict[str, str]) -> bytes:
+    """Zip {arcname: path} into memory with fixed timestamps (same inputs -> same bytes)."""
+    buf = io.BytesIO()
+    with zipfile.ZipFile(buf, "w", zipfile.ZIP_DEFLATED) as z:
+        for arcname in sorted(files):
+            info = zipfile.ZipInfo(arcname, date_time=_FIXED_ZIP_DATE)
+            info.compress_type = zipfile.ZIP_DEFLATED
+            with open(files[arcname], "rb") as fh:
+                z.writestr(info, fh.read())
+    return buf.getvalue()
+
+
+class OutputStore:
+    """
+    Content-addressed, size/age-bounded store for reviewed artifacts.
+
+    Artifacts are named by content hash, so identical outputs are written once;
+    re-storing one only refreshes its mtime, which doubles as the LRU clock.
+    `evict()` drops expired files, then least recently used ones until the
+    store fits its byte budget. Per-run scratch space comes from `run_dir()`.
+    """
+
+    def __init__(self, root: str = OUTPUT_DIR, max_bytes: Optional[int] = None, max_age_seconds: Optional[float] = None):
+        self.root = os.path.abspath(root)
+        self.max_bytes = int(OUTPUT_MAX_MB * 1024 * 1024) if max_bytes is None else max_bytes
+        self.max_age_seconds = OUTPUT_MAX_AGE_HOURS * 3600 if max_age_seconds is None else max_age_seconds
+        self._lock = threading.Lock()
+
+    def put_bytes(self, data: bytes, suffix: str = "", prefix: str = "") -> str:
+        """Store `data` and return its path; `prefix` only makes the name readable."""
+        digest = content_digest(data, suffix)[:_HASH_LEN]
+        name = f"{prefix}-{digest}{suffix}" if prefix else f"{digest}{suffix}"
+        path = os.path.join(self.root, name)
+        os.makedirs(self.root, exist_ok=True)
+        if os.path.exists(path):
+            os.utime(path)
+            return path
+        tmp = os.path.join(self.root, f".{name}.{uuid.uuid4().hex}.tmp")
+        with open(tmp, "wb") as fh:
+            fh.write(data)
+        os.replace(tmp, path)
+        return path
+
+    def put_file(self, src: str, prefix: str = "") -> str:
+        with open(src, "rb") as fh:
+            data = fh.read()
+        return self.put_bytes(data, os.path.splitext(src)[1], prefix=prefix)
+
+    @contextmanager
+    def run_dir(self) -> Iterator[str]:
+        """
+        Scratch directory for one run's intermediates. On exit it is renamed out of
+        the way first and then deleted, so a half-removed run dir is never visible.
+        """
+        path = os.path.join(self.root, RUNS_DIR_NAME, uuid.uuid4().hex)
+        os.makedirs(path)
+        try:
+            yield path
+        finally:
+            trash = f"{path}.trash"
+            try:
+                os.replace(path, trash)
+            except OSError:
+                trash = path
+            shutil.rmtree(trash, ignore_errors=True)
+
+    def _stored_files(self) -> List[os.DirEntry]:
+        if not os.path.isdir(self.root):
+            return []
+        return [
+            e for e in os.scandir(self.root)
+            if e.is_file(follow_symlinks=False) and _STORED_NAME.match(e.name)
+        ]
+
+    def evict(self, now: Optional[float] = None) -> List[str]:
+        """Apply the age and size budgets; returns the removed paths."""
+        now = time.time() if now is None else now
+        removed = []
+        with self._lock:
+            entries = sorted(
+                ((e.stat().st_mtime, e.stat().st_size, e.path) for e in self._stored_files()),
+            )
+            total = sum(size for _, size, _ in entries)
+            for mtime, size, path in entries:
+                expired = self.max_age_seconds > 0 and now - mtime > self.max_age_seconds
+                if not expired and total <= self.max_bytes:
+                    continue
+                try:
+                    os.remove(path)
+                    removed.append(path)
+                    total -= size
+                except OSError as e:
+                    logger.warning("Output store: failed to evict %s: %s", path, e)
+            self._sweep_stale_runs(now)
+        return removed
+
+    def _sweep_stale_runs(self, now: float) -> None:
+        """Remove run dirs left behind by crashed processes."""
+        runs = os.path.join(self.root, RUNS_DIR_NAME)
+        if not os.path.isdir(runs):
+            return
+        for e in os.scandir(runs):
+            try:
+                if now - e.stat().st_mtime > max(self.max_age_seconds, 3600):
+                    shutil.rmtree(e.path, ignore_errors=True)
+            except OSError:
+                pass
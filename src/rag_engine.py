@@ -1,9 +1,18 @@
 
 
 import os
+import re
 import glob
+import json
+import uuid
+import hashlib
 import logging
-from typing import Tuple
+import threading
+from collections import OrderedDict
+from array import array
+from typing import Tuple, List, Dict, Any, Optional
+
+from .bm25 import BM25Index, BM25_B, BM25_K1
 
 logger = logging.getLogger(__name__)
 logger.setLevel(logging.INFO)
@@ -17,93 +26,600 @@ STATIC_RULES = {
 
 
 REF_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "legal_refs"))
+INDEX_DIR_NAME = ".index"
+# Written by src.ingest: maps each extracted ref file to its source's category and URL.
+PROVENANCE_FILE = ".sources.json"
+INDEX_FORMAT_VERSION = 2
+PASSAGE_CHARS = 800
+PASSAGE_OVERLAP = 200
+TFIDF_PARAMS = {"stop_words": "english", "ngram_range": [1, 2], "passage_chars": PASSAGE_CHARS, "passage_overlap": PASSAGE_OVERLAP}
+BM25_PARAMS = {"retriever": "bm25", "k1": BM25_K1, "b": BM25_B, "passage_chars": PASSAGE_CHARS, "passage_overlap": PASSAGE_OVERLAP}
+MIN_SCORE = 0.08
+# "tfidf", "bm25", or "auto" (TF-IDF when scikit-learn imports, BM25 otherwise).
+RAG_RETRIEVER = os.environ.get("ADGM_RAG_RETRIEVER", "auto").strip().lower()
+QUERY_CACHE_SIZE = int(os.environ.get("ADGM_RAG_CACHE_SIZE", "1024"))
+
+# numpy/scipy/sklearn are imported on first engine build, not at module import.
+np = sp = TfidfVectorizer = None
+_SKLEARN_AVAILABLE = None
+
+
+def sklearn_available() -> bool:
+    global np, sp, TfidfVectorizer, _SKLEARN_AVAILABLE
+    if _SKLEARN_AVAILABLE is None:
+        try:
+            import numpy as np
+            import scipy.sparse as sp
+            from sklearn.feature_extraction.text import TfidfVectorizer
+            _SKLEARN_AVAILABLE = True
+        except Exception:
+            _SKLEARN_AVAILABLE = False
+    return _SKLEARN_AVAILABLE
+
+
+def resolve_retriever(name: Optional[str] = None) -> str:
+    """The retriever actually used for `name` (default RAG_RETRIEVER): "tfidf" or "bm25"."""
+    name = (name or RAG_RETRIEVER).lower()
+    if name == "bm25":
+        return "bm25"
+    if name not in ("tfidf", "auto"):
+        logger.warning("RAG: unknown retriever %r, using auto", name)
+    if sklearn_available():
+        return "tfidf"
+    if name == "tfidf":
+        logger.warning("RAG: scikit-learn unavailable, falling back to BM25")
+    return "bm25"
+
+
+def _sha256_file(path: str) -> str:
+    h = hashlib.sha256()
+    with open(path, "rb") as fh:
+        for block in iter(lambda: fh.read(1 << 20), b""):
+            h.update(block)
+    return h.hexdigest()
+
+
+def _write_json_atomic(data, path: str) -> None:
+    tmp = f"{path}.{uuid.uuid4().hex}.tmp"
+    with open(tmp, "w", encoding="utf-8") as fh:
+        json.dump(data, fh, ensure_ascii=False)
+    os.replace(tmp, path)
+
+
+def _make_vectorizer(vocabulary=None):
+    return TfidfVectorizer(
+        vocabulary=vocabulary,
+        stop_words=TFIDF_PARAMS["stop_words"],
+        ngram_range=tuple(TFIDF_PARAMS["ngram_range"]),
+    )
+
+
+# Lines that open a new clause/section in regulations and templates.
+_HEADING_RE = re.compile(
+    r"^[ \t]*(?:(?:part|chapter|section|article|schedule|clause|regulation|rule)\s+[\w.()-]+"
+    r"|\d+(?:\.\d+)*[.)]?[ \t]+\S|\([a-z0-9]{1,4}\)[ \t]+\S)",
+    re.IGNORECASE | re.MULTILINE,
+)
+
+
+def _window_end(text: str, start: int, limit: int, max_chars: int) -> int:
+    """End of a window starting at `start`, snapped back to a sentence or word break."""
+    end = min(start + max_chars, limit)
+    if end >= limit:
+        return limit
+    floor = start + max_chars // 2
+    for sep in (". ", "\n", " "):
+        cut = text.rfind(sep, floor, end)
+        if cut != -1:
+            return cut + len(sep)
+    return end
+
+
+def split_passages(text: str, max_chars: int = PASSAGE_CHARS, overlap: int = PASSAGE_OVERLAP) -> List[Tuple[int, int]]:
+    """
+    Split a reference text into clause/section-aware passages.
+    Returns (start, end) character offsets. Short consecutive sections are packed
+    together up to `max_chars`; longer sections are cut into overlapping windows.
+    """
+    if not text:
+        return []
+    bounds = sorted({0, *(m.start() for m in _HEADING_RE.finditer(text))})
+    sections = [(b, bounds[i + 1] if i + 1 < len(bounds) else len(text)) for i, b in enumerate(bounds)]
+
+    passages = []
+    cur_start = cur_end = None
+    for start, end in sections:
+        if cur_start is not None and end - cur_start <= max_chars:
+            cur_end = end
+            continue
+        if cur_start is not None:
+            passages.append((cur_start, cur_end))
+        if end - start <= max_chars:
+            cur_start, cur_end = start, end
+            continue
+        w_start = start
+        while True:
+            w_end = _window_end(text, w_start, end, max_chars)
+            passages.append((w_start, w_end))
+            if w_end >= end:
+                break
+            w_start = max(w_end - overlap, w_start + 1)
+            space = text.find(" ", w_start, w_end)
+            if space != -1:
+                w_start = space + 1
+        cur_start = cur_end = None
+    if cur_start is not None:
+        passages.append((cur_start, cur_end))
+    return [(a, b) for a, b in passages if text[a:b].strip()]
+
+
+class _LRUCache:
+    """Small thread-safe LRU map with hit/miss counters."""
+
+    def __init__(self, maxsize: int = QUERY_CACHE_SIZE):
+        self.maxsize = maxsize
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        with self._lock:
+            if key in self._data:
+                self._data.move_to_end(key)
+                self.hits += 1
+                return self._data[key]
+            self.misses += 1
+            return None
+
+    def put(self, key, value) -> None:
+        if self.maxsize <= 0:
+            return
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+    def info(self) -> Dict[str, Any]:
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / total, 4) if total else 0.0,
+                "size": len(self._data),
+                "maxsize": self.maxsize,
+            }
+
+
+def _normalize_query(q: str) -> str:
+    return " ".join(q.lower().split())
+
+
+class _PassageTable:
+    """(doc index, start, end) rows over a flat int64 array; the numpy-free `passages`."""
+
+    def __init__(self, flat: Optional[array] = None):
+        self.flat = flat if flat is not None else array("q")
+
+    def __len__(self) -> int:
+        return len(self.flat) // 3
+
+    def __getitem__(self, i: int) -> Tuple[int, int, int]:
+        i = int(i) * 3
+        return self.flat[i], self.flat[i + 1], self.flat[i + 2]
 
-try:
-    from sklearn.feature_extraction.text import TfidfVectorizer
-    from sklearn.metrics.pairwise import cosine_similarity
-    SKLEARN_AVAILABLE = True
-except Exception:
-    SKLEARN_AVAILABLE = False
 
 class LocalRAG:
-    def __init__(self, ref_dir=REF_DIR):
+    def __init__(self, ref_dir=REF_DIR, index_dir: Optional[str] = None, use_index: bool = True, retriever: Optional[str] = None,
+                 force_rebuild: bool = False):
         self.ref_dir = ref_dir
+        self.index_dir = index_dir or os.path.join(ref_dir, INDEX_DIR_NAME)
+        self.use_index = use_index
         self.docs = []        
         self.doc_names = []     
+        self.passages = None    # (n_passages, 3) rows: doc index, start, end
         self.vectorizer = None
-        self.doc_vectors = None
-        self.use_sklearn = SKLEARN_AVAILABLE
-        self._load_refs()
+        self.doc_vectors = None # csc (n_passages x vocab); .T is the term -> passage postings
+        self.bm25 = None        # BM25Index when retriever == "bm25"
+        self.manifest = None
+        self.provenance = {}    # ref file name -> {"category", "document_type", "url"}
+        self.requested_retriever = retriever
+        self.retriever = resolve_retriever(retriever)
+        self.use_sklearn = self.retriever == "tfidf"
+        self._cache = _LRUCache()
+        self._load_refs(force_rebuild=force_rebuild)
 
-    def _load_refs(self):
+    def _load_refs(self, force_rebuild: bool = False):
+        self._cache.clear()
         if not os.path.isdir(self.ref_dir):
             logger.info("RAG: ref dir not found (%s). Using STATIC_RULES fallback.", self.ref_dir)
             return
+        self.provenance = self._read_provenance()
 
-        files = sorted(glob.glob(os.path.join(self.ref_dir, "*.txt")))
-        for f in files:
-            try:
-                with open(f, "r", encoding="utf-8") as fh:
-                    txt = fh.read().strip()
-                    if txt:
-                        self.docs.append(txt)
-                        self.doc_names.append(os.path.basename(f))
-            except Exception as e:
-                logger.exception("RAG: failed to read ref file %s: %s", f, e)
+        saved = self._read_saved_manifest() if self.use_index else None
+        manifest = self._scan_manifest(saved)
+        if (
+            not force_rebuild
+            and saved is not None
+            and saved.get("files") == manifest["files"]
+            and self._load_index(saved)
+        ):
+            logger.info(
+                "RAG: loaded saved index with %d documents / %d passages from %s",
+                len(self.docs), len(self.passages), self.index_dir,
+            )
+            return
+
+        cached_texts = self._read_saved_texts(saved) if saved else {}
+        self.docs, self.doc_names = [], []
+        for entry in manifest["files"]:
+            name = entry["path"]
+            txt = cached_texts.get((name, entry["sha256"]))
+            if txt is None:
+                try:
+                    with open(os.path.join(self.ref_dir, name), "r", encoding="utf-8") as fh:
+                        txt = fh.read().strip()
+                except Exception as e:
+                    logger.exception("RAG: failed to read ref file %s: %s", name, e)
+                    continue
+            if txt:
+                self.docs.append(txt)
+                self.doc_names.append(name)
+        self.manifest = manifest
 
         if not self.docs:
             logger.info("RAG: no text files loaded from %s", self.ref_dir)
             self.use_sklearn = False
             return
 
+        rows = [
+            (d, a, b)
+            for d, txt in enumerate(self.docs)
+            for a, b in split_passages(txt)
+        ]
         if self.use_sklearn:
             try:
-                self.vectorizer = TfidfVectorizer(stop_words="english", ngram_range=(1,2))
-                self.doc_vectors = self.vectorizer.fit_transform(self.docs)
-                logger.info("RAG: TF-IDF index built with %d documents", len(self.docs))
+                self.passages = np.asarray(rows, dtype=np.int64).reshape(-1, 3)
+                self.vectorizer = _make_vectorizer()
+                self.doc_vectors = self.vectorizer.fit_transform(
+                    self.docs[d][a:b] for d, a, b in rows
+                ).tocsc()
+                logger.info("RAG: TF-IDF index built with %d documents / %d passages", len(self.docs), len(rows))
             except Exception as e:
                 logger.exception("RAG: sklearn TF-IDF build failed: %s", e)
                 self.use_sklearn = False
+                return
+        else:
+            try:
+                self.passages = _PassageTable(array("q", (x for row in rows for x in row)))
+                self.bm25 = BM25Index.build(self.docs[d][a:b] for d, a, b in rows)
+                logger.info("RAG: BM25 index built with %d documents / %d passages", len(self.docs), len(rows))
+            except Exception as e:
+                logger.exception("RAG: BM25 build failed: %s", e)
+                self.passages = self.bm25 = None
+                return
+        if self.use_index:
+            try:
+                self._save_index()
+            except Exception as e:
+                logger.exception("RAG: failed to save index to %s: %s", self.index_dir, e)
+
+    def summary(self) -> Dict[str, Any]:
+        """Small summary of the loaded index (see `rebuild_index`)."""
+        return {
+            "ref_dir": self.ref_dir,
+            "index_dir": self.index_dir,
+            "retriever": self.retriever,
+            "documents": len(self.docs),
+            "passages": 0 if self.passages is None else len(self.passages),
+            "indexed": self.doc_vectors is not None or self.bm25 is not None,
+        }
+
+    def _index_params(self) -> Dict[str, Any]:
+        return TFIDF_PARAMS if self.retriever == "tfidf" else BM25_PARAMS
+
+    # ---- on-disk index ----
+
+    def _scan_manifest(self, saved: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+        """
+        Build the manifest (path, mtime, size, sha256) for ref files. Hashes are
+        reused from the saved manifest when mtime and size are unchanged.
+        """
+        previous = {}
+        if saved:
+            previous = {e["path"]: e for e in saved.get("files", [])}
+        files = []
+        for f in sorted(glob.glob(os.path.join(self.ref_dir, "*.txt"))):
+            name = os.path.basename(f)
+            try:
+                st = os.stat(f)
+                old = previous.get(name)
+                if old and old.get("mtime") == st.st_mtime_ns and old.get("size") == st.st_size:
+                    digest = old["sha256"]
+                else:
+                    digest = _sha256_file(f)
+            except OSError as e:
+                logger.exception("RAG: failed to stat ref file %s: %s", f, e)
+                continue
+            files.append({"path": name, "mtime": st.st_mtime_ns, "size": st.st_size, "sha256": digest})
+        return {"version": INDEX_FORMAT_VERSION, "params": self._index_params(), "files": files}
+
+    def _read_saved_manifest(self) -> Optional[Dict[str, Any]]:
+        path = os.path.join(self.index_dir, "manifest.json")
+        if not os.path.exists(path):
+            return None
+        try:
+            with open(path, "r", encoding="utf-8") as fh:
+                saved = json.load(fh)
+        except Exception as e:
+            logger.warning("RAG: ignoring unreadable index manifest %s: %s", path, e)
+            return None
+        if saved.get("version") != INDEX_FORMAT_VERSION or saved.get("params") != self._index_params():
+            return None
+        return saved
+
+    def _read_provenance(self) -> Dict[str, Dict[str, Any]]:
+        try:
+            with open(os.path.join(self.ref_dir, PROVENANCE_FILE), "r", encoding="utf-8") as fh:
+                sources = json.load(fh).get("sources", {})
+        except (OSError, ValueError, AttributeError):
+            return {}
+        return {
+            e["output"]: {"category": e.get("category"), "document_type": e.get("document_type"), "url": e.get("url")}
+            for e in sources.values()
+            if isinstance(e, dict) and e.get("output")
+        }
+
+    def _source_label(self, name: str) -> str:
+        url = self.provenance.get(name, {}).get("url")
+        return f"{name} <{url}>" if url else name
+
+    def _read_saved_texts(self, saved: Dict[str, Any]) -> Dict[Tuple[str, str], str]:
+        """Map (file name, sha256) -> text from the saved index, for unchanged files."""
+        try:
+            with open(os.path.join(self.index_dir, saved["files_prefix"] + "docs.json"), "r", encoding="utf-8") as fh:
+                docs = json.load(fh)
+        except Exception:
+            return {}
+        hashes = {e["path"]: e["sha256"] for e in saved.get("files", [])}
+        return {
+            (name, hashes.get(name)): txt
+            for name, txt in zip(docs.get("names", []), docs.get("texts", []))
+        }
+
+    def _load_index(self, saved: Dict[str, Any]) -> bool:
+        if not self.use_sklearn:
+            return self._load_bm25_index(saved)
+        try:
+            prefix = os.path.join(self.index_dir, saved["files_prefix"])
+            shape = tuple(saved["shape"])
+            with open(prefix + "docs.json", "r", encoding="utf-8") as fh:
+                docs = json.load(fh)
+            with open(prefix + "vocabulary.json", "r", encoding="utf-8") as fh:
+                vocabulary = json.load(fh)
+            idf = np.load(prefix + "idf.npy")
+            passages = np.load(prefix + "passages.npy", mmap_mode="r")
+            data = np.load(prefix + "data.npy", mmap_mode="r")
+            indices = np.load(prefix + "indices.npy", mmap_mode="r")
+            indptr = np.load(prefix + "indptr.npy", mmap_mode="r")
+        except Exception as e:
+            logger.warning("RAG: saved index at %s is incomplete, rebuilding: %s", self.index_dir, e)
+            return False
+        if not docs.get("texts"):
+            return False
+        vectorizer = _make_vectorizer(vocabulary)
+        vectorizer.idf_ = idf
+        self.vectorizer = vectorizer
+        self.doc_vectors = sp.csc_matrix((data, indices, indptr), shape=shape, copy=False)
+        self.passages = passages
+        self.docs = docs["texts"]
+        self.doc_names = docs["names"]
+        self.manifest = saved
+        return True
+
+    def _load_bm25_index(self, saved: Dict[str, Any]) -> bool:
+        try:
+            prefix = os.path.join(self.index_dir, saved["files_prefix"])
+            with open(prefix + "docs.json", "r", encoding="utf-8") as fh:
+                docs = json.load(fh)
+            bm25 = BM25Index.load(prefix)
+            passages = array("q")
+            with open(prefix + "passages.bin", "rb") as fh:
+                passages.fromfile(fh, bm25.n_passages * 3)
+        except Exception as e:
+            logger.warning("RAG: saved index at %s is incomplete, rebuilding: %s", self.index_dir, e)
+            return False
+        if not docs.get("texts"):
+            return False
+        self.bm25 = bm25
+        self.passages = _PassageTable(passages)
+        self.docs = docs["texts"]
+        self.doc_names = docs["names"]
+        self.manifest = saved
+        return True
+
+    def _save_index(self) -> None:
+        """
+        Write the fitted index. Data files carry a fresh generation prefix and the
+        manifest is replaced last, so readers never see a half-written index.
+        """
+        os.makedirs(self.index_dir, exist_ok=True)
+        files_prefix = f"{uuid.uuid4().hex[:12]}-"
+        prefix = os.path.join(self.index_dir, files_prefix)
+        _write_json_atomic({"names": self.doc_names, "texts": self.docs}, prefix + "docs.json")
+        if self.use_sklearn:
+            X = self.doc_vectors
+            _write_json_atomic({k: int(v) for k, v in self.vectorizer.vocabulary_.items()}, prefix + "vocabulary.json")
+            np.save(prefix + "idf.npy", self.vectorizer.idf_)
+            np.save(prefix + "passages.npy", self.passages)
+            np.save(prefix + "data.npy", X.data)
+            np.save(prefix + "indices.npy", X.indices)
+            np.save(prefix + "indptr.npy", X.indptr)
+            manifest = dict(self.manifest, files_prefix=files_prefix, shape=list(X.shape))
+        else:
+            self.bm25.save(prefix)
+            with open(prefix + "passages.bin", "wb") as fh:
+                self.passages.flat.tofile(fh)
+            manifest = dict(self.manifest, files_prefix=files_prefix, shape=[len(self.passages), len(self.bm25.vocab)])
+
+        _write_json_atomic(manifest, os.path.join(self.index_dir, "manifest.json"))
+        self.manifest = manifest
+
+        for f in os.listdir(self.index_dir):
+            if f != "manifest.json" and not f.startswith(files_prefix):
+                try:
+                    os.remove(os.path.join(self.index_dir, f))
+                except OSError:
+                    pass
+        logger.info("RAG: saved index to %s", self.index_dir)
+
+    def cache_info(self) -> Dict[str, Any]:
+        """Hit/miss statistics of the query cache (cleared whenever the index is rebuilt)."""
+        return self._cache.info()
 
     def query(self, q: str, top_k: int = 1) -> Tuple[str, float]:
         """
         Query RAG with text `q`.
         Returns (citation_text, score) where score in [0.0, 1.0].
         If low confidence or fallback, returns STATIC_RULE (ambiguous) or matching static rule.
+        Results are memoized per (normalized query, top_k).
         """
         if not q:
             return "", 0.0
+        key = ("query", _normalize_query(q), top_k)
+        cached = self._cache.get(key)
+        if cached is not None:
+            return cached
+        result = self._query_uncached(q, top_k)
+        self._cache.put(key, result)
+        return result
 
-        q_low = q.lower()
+    def query_many(self, queries: List[str], top_k: int = 1) -> List[Tuple[str, float]]:
+        """
+        Batched `query`: cached and static-rule queries are answered directly, the
+        rest are vectorized together and scored with one sparse matrix product.
+        Returns one (citation_text, score) per input query, in order.
+        """
+        results = [None] * len(queries)
+        pending = {}
+        for i, q in enumerate(queries):
+            if not q:
+                results[i] = ("", 0.0)
+                continue
+            norm = _normalize_query(q)
+            cached = self._cache.get(("query", norm, top_k))
+            if cached is not None:
+                results[i] = cached
+            else:
+                pending.setdefault(norm, (q, []))[1].append(i)
+
+        to_search = []
+        for norm, (q, positions) in pending.items():
+            static = self._static_citation(q)
+            if static is not None:
+                self._store(norm, top_k, static, positions, results)
+            else:
+                to_search.append(norm)
+
+        if to_search:
+            try:
+                hits_per_query = self.search_many([pending[n][0] for n in to_search], top_k=top_k)
+            except Exception as e:
+                logger.exception("RAG: batched query failed: %s", e)
+                hits_per_query = [None] * len(to_search)
+            for norm, hits in zip(to_search, hits_per_query):
+                self._store(norm, top_k, self._citation_from_hits(hits), pending[norm][1], results)
+        return results
+
+    def _store(self, norm: str, top_k: int, result: Tuple[str, float], positions: List[int], results: List) -> None:
+        self._cache.put(("query", norm, top_k), result)
+        for i in positions:
+            results[i] = result
 
+    def _query_uncached(self, q: str, top_k: int) -> Tuple[str, float]:
+        static = self._static_citation(q)
+        if static is not None:
+            return static
+        try:
+            return self._citation_from_hits(self.search(q, top_k=top_k))
+        except Exception as e:
+            logger.exception("RAG: query failed: %s", e)
+            return f"STATIC_RULE — {STATIC_RULES.get('ambiguous','')}", 0.0
 
+    def _static_citation(self, q: str) -> Optional[Tuple[str, float]]:
+        q_low = q.lower()
         for key, text in STATIC_RULES.items():
             if key in q_low:
-              
                 return f"STATIC_RULE — {text}", 1.0
+        return None
 
-        
-        if self.use_sklearn and self.doc_vectors is not None and self.docs:
-            try:
-                q_vec = self.vectorizer.transform([q])
-                sims = cosine_similarity(q_vec, self.doc_vectors)[0]
-                top_idx = int(sims.argmax())
-                score = float(sims[top_idx])
-               
-                if score < 0.08:
-                  
-                    return f"STATIC_RULE — {STATIC_RULES.get('ambiguous','')}", 0.0
-                name = self.doc_names[top_idx]
-                excerpt = self.docs[top_idx][:600].replace("\n", " ").strip()
-                citation = f"{name} — {excerpt}..."
-                
-                return citation, float(round(score, 3))
-            except Exception as e:
-                logger.exception("RAG: query failed: %s", e)
-                return f"STATIC_RULE — {STATIC_RULES.get('ambiguous','')}", 0.0
+    def _citation_from_hits(self, hits: Optional[List[Dict[str, Any]]]) -> Tuple[str, float]:
+        if not hits or hits[0]["score"] < MIN_SCORE:
+            return f"STATIC_RULE — {STATIC_RULES.get('ambiguous','')}", 0.0
+        citation = " | ".join(
+            f"{self._source_label(h['source'])} [{h['start']}:{h['end']}] — {h['text'][:600]}..."
+            for h in hits if h["score"] >= MIN_SCORE
+        )
+        return citation, float(round(hits[0]["score"], 3))
 
-        
-        return f"STATIC_RULE — {STATIC_RULES.get('ambiguous','')}", 0.0
+    def search(self, q: str, top_k: int = 1) -> List[Dict[str, Any]]:
+        """
+        Return the top-k passages for `q` as dicts (source, start, end, text, score),
+        best first. Only passages sharing a term with the query are scored, and the
+        top-k is taken with argpartition rather than a full sort.
+        """
+        if not q:
+            return []
+        return self.search_many([q], top_k=top_k)[0]
+
+    def search_many(self, queries: List[str], top_k: int = 1) -> List[List[Dict[str, Any]]]:
+        """
+        `search` for several queries: TF-IDF scores them with a single (queries x
+        passages) sparse product, BM25 by accumulating each query's postings.
+        """
+        if not queries or top_k <= 0:
+            return [[] for _ in queries]
+        if self.bm25 is not None:
+            return [
+                [self._hit(pid, score) for pid, score in ranked]
+                for ranked in self.bm25.search_many(queries, top_k=top_k)
+            ]
+        if not self.use_sklearn or self.doc_vectors is None:
+            return [[] for _ in queries]
+        q_vecs = self.vectorizer.transform(queries)
+        # Rows are l2-normalised, so the dot product is the cosine similarity.
+        sims = (q_vecs @ self.doc_vectors.T).tocsr()
+        out = []
+        for r in range(sims.shape[0]):
+            lo, hi = sims.indptr[r], sims.indptr[r + 1]
+            out.append(self._top_hits(sims.data[lo:hi], sims.indices[lo:hi], top_k))
+        return out
+
+    def _top_hits(self, scores, ids, top_k: int) -> List[Dict[str, Any]]:
+        if len(scores) == 0:
+            return []
+        if len(scores) > top_k:
+            part = np.argpartition(-scores, top_k - 1)[:top_k]
+            scores, ids = scores[part], ids[part]
+        order = np.argsort(-scores, kind="stable")
+        return [self._hit(ids[i], scores[i]) for i in order]
+
+    def _hit(self, pid, score) -> Dict[str, Any]:
+        d, a, b = (int(x) for x in self.passages[pid])
+        return {
+            "source": self.doc_names[d],
+            "start": a,
+            "end": b,
+            "text": self.docs[d][a:b].replace("\n", " ").strip(),
+            "score": float(score),
+            **self.provenance.get(self.doc_names[d], {}),
+        }
 
     def citation_for_docname(self, doc_name: str) -> Tuple[str, float]:
         """
@@ -111,12 +627,21 @@ class LocalRAG:
         """
         if not doc_name:
             return "", 0.0
+        key = ("docname", _normalize_query(doc_name), 1)
+        cached = self._cache.get(key)
+        if cached is not None:
+            return cached
+        result = self._citation_for_docname_uncached(doc_name)
+        self._cache.put(key, result)
+        return result
+
+    def _citation_for_docname_uncached(self, doc_name: str) -> Tuple[str, float]:
         name = doc_name.lower()
         
         for i, fname in enumerate(self.doc_names):
             if fname.lower().startswith(name) or name in fname.lower():
                 excerpt = self.docs[i][:600].replace("\n", " ").strip()
-                return f"{fname} — {excerpt}...", 1.0
+                return f"{self._source_label(fname)} — {excerpt}...", 1.0
        
         for key, text in STATIC_RULES.items():
             if key in name:
@@ -124,7 +649,54 @@ class LocalRAG:
         return f"STATIC_RULE — {STATIC_RULES.get('ambiguous','')}", 0.0
 
 
-_rag = LocalRAG()
+_rag = None
+_rag_lock = threading.Lock()
+
+def get_rag() -> LocalRAG:
+    """Return the shared engine, building it on first use (thread-safe)."""
+    global _rag
+    if _rag is None:
+        with _rag_lock:
+            if _rag is None:
+                _rag = LocalRAG()
+    return _rag
+
+def warmup() -> LocalRAG:
+    """Build the shared engine ahead of the first request (for long-running servers)."""
+    return get_rag()
+
+def rag_cache_stats() -> Dict[str, Any]:
+    """Query cache statistics for the shared engine (zeros if it was never built)."""
+    if _rag is None:
+        return _LRUCache(0).info()
+    return _rag.cache_info()
+
+def index_fingerprint(ref_dir: str = REF_DIR) -> str:
+    """
+    Cheap fingerprint of the reference corpus (names, mtimes, sizes, provenance)
+    plus index settings; changes whenever the index would be rebuilt or citations
+    would change. Does not build the engine.
+    """
+    params = TFIDF_PARAMS if resolve_retriever() == "tfidf" else BM25_PARAMS
+    h = hashlib.sha256(json.dumps([INDEX_FORMAT_VERSION, params, MIN_SCORE]).encode("utf-8"))
+    for f in sorted(glob.glob(os.path.join(ref_dir, "*.txt"))) + [os.path.join(ref_dir, PROVENANCE_FILE)]:
+        try:
+            st = os.stat(f)
+        except OSError:
+            continue
+        h.update(f"{os.path.basename(f)}:{st.st_mtime_ns}:{st.st_size};".encode("utf-8"))
+    return h.hexdigest()
+
+def rebuild_index(force: bool = False) -> Dict[str, Any]:
+    """
+    Refresh the on-disk index (only refits when ref files changed, or `force`) and
+    make it the shared engine. The new engine is built aside and swapped in whole,
+    so queries already running finish on the old one and never fill the new cache.
+    """
+    global _rag
+    with _rag_lock:
+        rag = _rag = LocalRAG(force_rebuild=force)
+    return rag.summary()
 
 def get_legal_reference(query: str) -> str:
     """
@@ -132,7 +704,7 @@ def get_legal_reference(query: str) -> str:
     Example: "myfile.txt — excerpt... (score=0.72)"
     """
     try:
-        citation, score = _rag.query(query)
+        citation, score = get_rag().query(query)
         if not citation:
             return ""
         
@@ -140,9 +712,19 @@ def get_legal_reference(query: str) -> str:
     except Exception:
         return STATIC_RULES.get("ambiguous", "")
 
+def get_legal_references(queries: List[str]) -> List[str]:
+    """Batched `get_legal_reference`: one result string per query, in order."""
+    try:
+        return [
+            f"{citation} (score={score})" if citation else ""
+            for citation, score in get_rag().query_many(list(queries))
+        ]
+    except Exception:
+        return [STATIC_RULES.get("ambiguous", "") for _ in queries]
+
 def get_citation_for_docname(doc_name: str) -> str:
     try:
-        citation, score = _rag.citation_for_docname(doc_name)
+        citation, score = get_rag().citation_for_docname(doc_name)
         if not citation:
             return ""
         return f"{citation} (score={score})"
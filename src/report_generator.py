@@ -1,45 +1,137 @@
+import json
+from typing import Any, Dict, Iterable, Optional
+
+
+def _severity_key(issue):
+    sev = (issue.get("severity") or "").lower()
+    if sev.startswith("h"):
+        return "high"
+    if sev.startswith("m"):
+        return "medium"
+    return "low"
 
 def _severity_buckets(issues):
     buckets = {"high": [], "medium": [], "low": []}
     for it in issues:
-        sev = (it.get("severity") or "").lower()
-        if sev.startswith("h"):
-            buckets["high"].append(it)
-        elif sev.startswith("m"):
-            buckets["medium"].append(it)
-        else:
-            buckets["low"].append(it)
+        buckets[_severity_key(it)].append(it)
     return buckets
 
-def generate_report(processed_docs, checklist_result, detected_process):
-    issues_combined = []
-    reviewed_files = []
-    for pd in processed_docs:
+
+class ReportAggregator:
+    """
+    Builds the review report from per-document results fed one at a time.
+
+    Only running counters, the reviewed-file list and per-document stage timings
+    are kept. With `issues_path` each combined issue is written there as a JSON
+    line instead of being held in memory, and the summary points at that file
+    ("issues_file") in place of the inline "issues_found" list. Without it,
+    `close()` returns exactly what `generate_report` does.
+    """
+
+    def __init__(self, checklist_result: Dict[str, Any], detected_process: Optional[str] = None, issues_path: Optional[str] = None):
+        self.checklist_result = checklist_result or {}
+        self.detected_process = detected_process
+        self.issues_path = issues_path
+        self._issues_fh = open(issues_path, "w", encoding="utf-8") if issues_path else None
+        self.issues_found = None if issues_path else []
+        self.reviewed_files = []
+        self.document_timings = []
+        self.documents = 0
+        self.total_issues = 0
+        self.severity = {"high": 0, "medium": 0, "low": 0}
+        self.cache_hits = 0
+        self.cache_misses = 0
+        self._report = None
+
+    def add(self, pd: Dict[str, Any]) -> None:
         fname = pd.get("file_name", "Unknown")
         for it in pd.get("issues", []):
-            issues_combined.append({
+            combined = {
                 "document": fname,
                 "issue": it.get("issue",""),
                 "severity": it.get("severity",""),
                 "suggestion": it.get("suggestion",""),
                 "paragraph_index": it.get("paragraph_index"),
                 "legal_reference": it.get("legal_reference","")
-            })
+            }
+            self.severity[_severity_key(combined)] += 1
+            self.total_issues += 1
+            if self._issues_fh is not None:
+                self._issues_fh.write(json.dumps(combined, ensure_ascii=False) + "\n")
+            else:
+                self.issues_found.append(combined)
         if pd.get("reviewed_path"):
-            reviewed_files.append(pd["reviewed_path"])
-
-    buckets = _severity_buckets(issues_combined)
-
-    report = {
-        "process": detected_process or checklist_result.get("process","Unknown"),
-        "documents_uploaded": checklist_result.get("documents_uploaded", len(processed_docs)),
-        "required_documents": checklist_result.get("required_documents", 0),
-        "uploaded_documents": checklist_result.get("uploaded_documents", []),
-        "missing_documents": checklist_result.get("missing_documents", []),
-        "issues_found": issues_combined,
-        "reviewed_files": reviewed_files,
-        "total_issues": len(issues_combined),
-        "high_severity_count": len(buckets["high"]),
-        "severity_buckets": {"high": len(buckets["high"]), "medium": len(buckets["medium"]), "low": len(buckets["low"])}
-    }
-    return report
+            self.reviewed_files.append(pd["reviewed_path"])
+        if pd.get("timings_ms"):
+            self.document_timings.append({"document": fname, "timings_ms": pd["timings_ms"]})
+        if pd.get("cache") == "hit":
+            self.cache_hits += 1
+        elif pd.get("cache") == "miss":
+            self.cache_misses += 1
+        self.documents += 1
+
+    def add_many(self, processed_docs: Iterable[Dict[str, Any]]) -> "ReportAggregator":
+        for pd in processed_docs:
+            self.add(pd)
+        return self
+
+    def close(self) -> Dict[str, Any]:
+        """Finish the issues file (if any) and return the summary report."""
+        if self._report is not None:
+            return self._report
+        if self._issues_fh is not None:
+            self._issues_fh.close()
+            self._issues_fh = None
+        self._report = self._build()
+        return self._report
+
+    def snapshot(self) -> Dict[str, Any]:
+        """
+        The report for the documents added so far, without closing. Lists are
+        copied (not rebuilt), so later `add` calls do not change it.
+        """
+        if self._issues_fh is not None:
+            self._issues_fh.flush()
+        report = self._build()
+        for key in ("issues_found", "reviewed_files", "document_timings"):
+            if key in report:
+                report[key] = list(report[key])
+        return report
+
+    def _build(self) -> Dict[str, Any]:
+        checklist_result = self.checklist_result
+        cache_total = self.cache_hits + self.cache_misses
+        report = {
+            "process": self.detected_process or checklist_result.get("process","Unknown"),
+            "documents_uploaded": checklist_result.get("documents_uploaded", self.documents),
+            "required_documents": checklist_result.get("required_documents", 0),
+            "uploaded_documents": checklist_result.get("uploaded_documents", []),
+            "missing_documents": checklist_result.get("missing_documents", []),
+        }
+        if self.issues_path:
+            report["issues_file"] = self.issues_path
+        else:
+            report["issues_found"] = self.issues_found
+        report.update({
+            "reviewed_files": self.reviewed_files,
+            "total_issues": self.total_issues,
+            "high_severity_count": self.severity["high"],
+            "severity_buckets": dict(self.severity),
+            "result_cache": {
+                "hits": self.cache_hits,
+                "misses": self.cache_misses,
+                "hit_rate": round(self.cache_hits / cache_total, 4) if cache_total else 0.0
+            },
+            "document_timings": self.document_timings
+        })
+        return report
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def generate_report(processed_docs, checklist_result, detected_process):
+    return ReportAggregator(checklist_result, detected_process).add_many(processed_docs).close()
@@ -0,0 +1,157 @@
+import os
+import json
+import time
+import sqlite3
+import hashlib
+import logging
+import threading
+from typing import Any, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+CACHE_DIR = os.environ.get(
+    "ADGM_CACHE_DIR",
+    os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".cache")),
+)
+RESULT_CACHE_ENABLED = os.environ.get("ADGM_RESULT_CACHE", "1").lower() not in ("0", "false", "no", "off")
+RESULT_CACHE_MAX_MB = float(os.environ.get("ADGM_RESULT_CACHE_MAX_MB", "256"))
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS results (
+    file_hash TEXT NOT NULL,
+    fingerprint TEXT NOT NULL,
+    document_type TEXT,
+    issues TEXT NOT NULL,
+    artifact BLOB,
+    artifact_context TEXT,
+    size INTEGER NOT NULL,
+    created REAL NOT NULL,
+    last_access REAL NOT NULL,
+    PRIMARY KEY (file_hash, fingerprint)
+);
+CREATE INDEX IF NOT EXISTS results_last_access ON results (last_access);
+"""
+
+
+def sha256_file(path: str) -> str:
+    h = hashlib.sha256()
+    with open(path, "rb") as fh:
+        for block in iter(lambda: fh.read(1 << 20), b""):
+            h.update(block)
+    return h.hexdigest()
+
+
+class ResultCache:
+    """
+    Persistent SQLite cache of `process_document` results.
+
+    Rows are keyed by (SHA-256 of the file bytes, rule/index fingerprint). The
+    reviewed .docx is stored alongside, tagged with the context it was built for
+    (checklist summary, comment mode), and only reused when that context matches.
+    Least recently used rows are evicted once the cache exceeds `max_bytes`.
+    """
+
+    def __init__(self, path: Optional[str] = None, max_bytes: Optional[int] = None):
+        self.path = path or os.path.join(CACHE_DIR, "results.sqlite")
+        self.max_bytes = int(RESULT_CACHE_MAX_MB * 1024 * 1024) if max_bytes is None else max_bytes
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.path, timeout=30, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(_SCHEMA)
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, file_hash: str, fingerprint: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT document_type, issues, artifact, artifact_context FROM results "
+                "WHERE file_hash = ? AND fingerprint = ?",
+                (file_hash, fingerprint),
+            ).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            with self._conn:
+                self._conn.execute(
+                    "UPDATE results SET last_access = ? WHERE file_hash = ? AND fingerprint = ?",
+                    (time.time(), file_hash, fingerprint),
+                )
+        return {
+            "document_type": row[0],
+            "issues": json.loads(row[1]),
+            "artifact": row[2],
+            "artifact_context": row[3],
+        }
+
+    def put(self, file_hash: str, fingerprint: str, document_type: str, issues: List[Dict[str, Any]],
+            artifact: Optional[bytes] = None, artifact_context: Optional[str] = None) -> None:
+        issues_json = json.dumps(issues, ensure_ascii=False)
+        size = len(issues_json) + (len(artifact) if artifact else 0)
+        now = time.time()
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO results VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (file_hash, fingerprint, document_type, issues_json, artifact, artifact_context, size, now, now),
+            )
+        self.evict()
+
+    def purge_stale(self, fingerprint: str) -> int:
+        """Drop rows computed under any other rule/index fingerprint."""
+        with self._lock, self._conn:
+            cur = self._conn.execute("DELETE FROM results WHERE fingerprint != ?", (fingerprint,))
+            return cur.rowcount
+
+    def evict(self) -> int:
+        """Delete least recently used rows until the cache fits `max_bytes`."""
+        removed = 0
+        with self._lock:
+            total = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM results").fetchone()[0]
+            if total <= self.max_bytes:
+                return 0
+            rows = self._conn.execute(
+                "SELECT file_hash, fingerprint, size FROM results ORDER BY last_access"
+            ).fetchall()
+            with self._conn:
+                for file_hash, fingerprint, size in rows:
+                    if total <= self.max_bytes:
+                        break
+                    self._conn.execute(
+                        "DELETE FROM results WHERE file_hash = ? AND fingerprint = ?", (file_hash, fingerprint)
+                    )
+                    total -= size
+                    removed += 1
+        return removed
+
+    def stats(self) -> Dict[str, Any]:
+        total = self.hits + self.misses
+        with self._lock:
+            entries, size = self._conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM results").fetchone()
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / total, 4) if total else 0.0,
+            "entries": entries,
+            "bytes": size,
+        }
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_result_cache() -> Optional[ResultCache]:
+    """Process-wide cache instance, or None when disabled (ADGM_RESULT_CACHE=0) or unavailable."""
+    global _cache
+    if not RESULT_CACHE_ENABLED:
+        return None
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                try:
+                    _cache = ResultCache()
+                except Exception as e:
+                    logger.warning("Result cache unavailable: %s", e)
+                    return None
+    return _cache
@@ -0,0 +1,259 @@
+import os
+import json
+import time
+from collections import deque
+from itertools import groupby
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from .file_utils import ParagraphOffsets, TextParagraph
+
+# Optional JSON file choosing the enabled rules per process type, e.g.
+# {"HR / Employment": ["signature", "ambiguous"], "default": ["signature"]}
+RULES_FILE = os.environ.get("ADGM_RULES_FILE")
+
+
+class DocumentContext:
+    """
+    Shared, precomputed view of one document handed to every rule, so no rule
+    re-derives it: paragraphs, full_text and its lowercase form, the paragraph
+    offset index and the pattern-scanner matches.
+    """
+
+    def __init__(self, filepath: str, paragraphs: Sequence[Any], full_text: str, offsets: ParagraphOffsets, matches: Sequence[Any]):
+        self.filepath = filepath
+        self.file_name = os.path.basename(filepath)
+        self.paragraphs = paragraphs
+        self.full_text = full_text
+        self.lower = full_text.lower()
+        self.offsets = offsets
+        self.matches = matches
+
+    @property
+    def paragraph_count(self) -> int:
+        return len(self.paragraphs)
+
+    def text(self, start: int, end: int) -> str:
+        """full_text[start:end]; rules use this so they also work on a StreamingContext."""
+        return self.full_text[start:end]
+
+    def contains(self, phrase: str) -> bool:
+        """Whether the lowercase `phrase` occurs in the document."""
+        return phrase in self.lower
+
+
+class StreamingContext(DocumentContext):
+    """
+    DocumentContext for `run_rules_stream`, which never holds the whole document:
+    there is no paragraphs list or full_text. `text()` only covers the scan window
+    whose sentences are being dispatched, `offsets` only the paragraphs still in
+    that window, and `contains()` only the `phrases` declared up front.
+    Rules must therefore anchor and quote findings inside their hooks.
+    """
+
+    def __init__(self, filepath: str, phrases: Sequence[str] = ()):
+        self.filepath = filepath
+        self.file_name = os.path.basename(filepath)
+        self.paragraphs = None
+        self.full_text = None
+        self.lower = None
+        self.offsets = ParagraphOffsets()
+        self.matches = None
+        self.phrases = list(phrases)
+        self.found_phrases = set()
+        self.count = 0
+        self.window = (0, "")
+
+    @property
+    def paragraph_count(self) -> int:
+        return self.count
+
+    def text(self, start: int, end: int) -> str:
+        base, window = self.window
+        return window[start - base:end - base]
+
+    def contains(self, phrase: str) -> bool:
+        return phrase in self.found_phrases
+
+
+class Rule:
+    """
+    Base class for checks. A rule overrides only the hooks it needs:
+
+    - paragraph(idx, text): every paragraph, in order
+    - sentence(start, end, matches): every sentence holding at least one scanner match
+    - tail(paragraphs): the last `tail_size` paragraphs, once
+    - finish() -> issues: after the walk
+
+    `processes` limits the rule to those process types (None = all), and
+    `ref_query` is the RAG query its findings cite.
+    """
+    name = ""
+    processes = None
+    ref_query = None
+    tail_size = 0
+
+    def __init__(self, ctx: DocumentContext):
+        self.ctx = ctx
+
+    def paragraph(self, idx: int, text: str) -> None:
+        pass
+
+    def sentence(self, start: int, end: int, matches: List[Any]) -> None:
+        pass
+
+    def tail(self, paragraphs: Sequence[Any]) -> None:
+        pass
+
+    def finish(self) -> List[Dict[str, Any]]:
+        return []
+
+    @classmethod
+    def uses(cls, hook: str) -> bool:
+        return getattr(cls, hook) is not getattr(Rule, hook)
+
+
+RULES: Dict[str, type] = {}
+
+
+def register_rule(cls):
+    """Class decorator adding a Rule subclass to the registry (registration order = issue order)."""
+    if not cls.name:
+        raise ValueError(f"Rule {cls.__name__} needs a name")
+    RULES[cls.name] = cls
+    return cls
+
+
+def _load_rules_config(path: Optional[str]) -> Dict[str, List[str]]:
+    if path and os.path.exists(path):
+        with open(path, "r", encoding="utf-8") as fh:
+            return json.load(fh)
+    return {}
+
+
+_RULES_CONFIG = _load_rules_config(RULES_FILE)
+
+
+def enabled_rules(process: Optional[str] = None) -> List[str]:
+    """Names of the rules that run for `process`, in registry order."""
+    configured = _RULES_CONFIG.get(process or "") or _RULES_CONFIG.get("default")
+    names = []
+    for name, cls in RULES.items():
+        if configured is not None:
+            if name in configured:
+                names.append(name)
+        elif cls.processes is None or process in cls.processes:
+            names.append(name)
+    return names
+
+
+def run_rules(ctx: DocumentContext, process: Optional[str] = None, enabled: Optional[List[str]] = None) -> Tuple[List[Dict[str, Any]], Dict[str, float]]:
+    """
+    Walk the document once and dispatch each paragraph/sentence/tail to every
+    enabled rule that asked for it. Returns (issues, per-rule milliseconds).
+    """
+    names = enabled if enabled is not None else enabled_rules(process)
+    rules = [RULES[n](ctx) for n in names if n in RULES]
+    elapsed = {r.name: 0.0 for r in rules}
+    clock = time.perf_counter
+
+    para_rules = [r for r in rules if r.uses("paragraph")]
+    if para_rules:
+        for idx, p in enumerate(ctx.paragraphs):
+            text = p.text
+            for r in para_rules:
+                t0 = clock()
+                r.paragraph(idx, text)
+                elapsed[r.name] += clock() - t0
+
+    sentence_rules = [r for r in rules if r.uses("sentence")]
+    if sentence_rules and ctx.matches:
+        _dispatch_sentences(sentence_rules, ctx.matches, elapsed)
+
+    tail_rules = [r for r in rules if r.uses("tail")]
+    if tail_rules:
+        size = max(r.tail_size for r in tail_rules)
+        _dispatch_tail(tail_rules, ctx.paragraphs[-size:] if size else [], elapsed)
+    return _finish(rules, elapsed)
+
+
+def run_rules_stream(ctx: StreamingContext, texts: Iterable[str], scanner: Any, process: Optional[str] = None,
+                     enabled: Optional[List[str]] = None) -> Tuple[List[Dict[str, Any]], Dict[str, float]]:
+    """
+    `run_rules` over paragraph texts as they are read. Sentences are scanned over
+    a sliding window (`scanner.stream()`) that carries unfinished sentences across
+    paragraphs, and only the trailing paragraphs the tail rules need are kept, so
+    memory does not grow with the document. Issues match `run_rules` on the same text.
+    """
+    names = enabled if enabled is not None else enabled_rules(process)
+    rules = [RULES[n](ctx) for n in names if n in RULES]
+    elapsed = {r.name: 0.0 for r in rules}
+    clock = time.perf_counter
+
+    para_rules = [r for r in rules if r.uses("paragraph")]
+    sentence_rules = [r for r in rules if r.uses("sentence")]
+    tail_rules = [r for r in rules if r.uses("tail")]
+    size = max((r.tail_size for r in tail_rules), default=0)
+    tail = deque(maxlen=size)
+    stream = scanner.stream()
+    pending_phrases = list(ctx.phrases)
+
+    def dispatch(matches):
+        if matches and sentence_rules:
+            ctx.window = (stream.text_base, stream.text)
+            _dispatch_sentences(sentence_rules, matches, elapsed)
+
+    for idx, text in enumerate(texts):
+        ctx.count = idx + 1
+        if pending_phrases:
+            low = text.lower()
+            for phrase in [p for p in pending_phrases if p in low]:
+                ctx.found_phrases.add(phrase)
+                pending_phrases.remove(phrase)
+        for r in para_rules:
+            t0 = clock()
+            r.paragraph(idx, text)
+            elapsed[r.name] += clock() - t0
+        if size:
+            tail.append(TextParagraph(text))
+        if text and text.strip():
+            joiner = "\n" if len(ctx.offsets) else ""
+            ctx.offsets.append(idx, len(text))
+            dispatch(stream.feed(joiner + text))
+            ctx.offsets.trim(stream.base)
+    dispatch(stream.close())
+
+    if tail_rules:
+        _dispatch_tail(tail_rules, list(tail), elapsed)
+    return _finish(rules, elapsed)
+
+
+def _dispatch_sentences(rules: List[Rule], matches: Sequence[Any], elapsed: Dict[str, float]) -> None:
+    clock = time.perf_counter
+    for (start, end), group in groupby(matches, key=lambda m: (m.sentence_start, m.sentence_end)):
+        sentence_matches = list(group)
+        for r in rules:
+            t0 = clock()
+            r.sentence(start, end, sentence_matches)
+            elapsed[r.name] += clock() - t0
+
+
+def _dispatch_tail(rules: List[Rule], tail: Sequence[Any], elapsed: Dict[str, float]) -> None:
+    clock = time.perf_counter
+    for r in rules:
+        t0 = clock()
+        r.tail(tail[-r.tail_size:] if r.tail_size else [])
+        elapsed[r.name] += clock() - t0
+
+
+def _finish(rules: List[Rule], elapsed: Dict[str, float]) -> Tuple[List[Dict[str, Any]], Dict[str, float]]:
+    clock = time.perf_counter
+    issues = []
+    for r in rules:
+        t0 = clock()
+        found = r.finish()
+        elapsed[r.name] += clock() - t0
+        if r.ref_query:
+            for it in found:
+                it.setdefault("_ref_query", r.ref_query)
+        issues.extend(found)
+    return issues, {name: round(sec * 1000.0, 3) for name, sec in elapsed.items()}
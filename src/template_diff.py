@@ -0,0 +1,307 @@
+import os
+import re
+import json
+import hashlib
+import logging
+import threading
+from difflib import SequenceMatcher
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from .checklist_verifier import normalize_name
+from .doc_classifier import TEMPLATE_DIR
+from .file_utils import iter_docx_paragraph_texts
+
+logger = logging.getLogger(__name__)
+
+TEMPLATE_DIFF_ENABLED = os.environ.get("ADGM_TEMPLATE_DIFF", "1").lower() not in ("0", "false", "no", "off")
+# Optional JSON in TEMPLATE_DIR mapping template file names to document types,
+# for files whose names do not say it, e.g. {"adgm-ra-resolution-....docx": "Shareholder Resolution"}.
+TEMPLATE_TYPES_FILE = "templates.json"
+TEMPLATE_EXTENSIONS = (".docx", ".txt")
+# Bump when alignment or flagging changes (part of the result cache fingerprint).
+TEMPLATE_DIFF_VERSION = 1
+# Template paragraphs shorter than this (normalized) still anchor the alignment but
+# are never flagged: headings, blanks and signature lines.
+MIN_CLAUSE_CHARS = 25
+# A document is compared only if this share of the template's paragraphs match exactly;
+# below it the document is not a version of that template at all.
+MIN_TEMPLATE_OVERLAP = 0.1
+# Unmatched template paragraph vs unmatched document paragraph: word-set Jaccard
+# pre-filter, then character similarity. Below ALTERED_MIN_SIMILARITY it is "removed".
+FUZZY_MIN_JACCARD = 0.3
+ALTERED_MIN_SIMILARITY = 0.5
+ALTERED_LOW_SIMILARITY = 0.9
+# Candidates per unmatched template paragraph: document paragraphs within this
+# distance of its proportional position in the region (bounds rewritten documents).
+FUZZY_WINDOW = 32
+MAX_FINDINGS = 10
+
+_NUMBERING_RE = re.compile(r"^\s*(?:(?:article|clause|section)\s+)?(?:\d+(?:\.\d+)*[.)]?|\(?[a-z]{1,4}\)|[ivxlc]+[.)])\s+", re.IGNORECASE)
+_WORD_RE = re.compile(r"\w+")
+
+
+def normalize_paragraph(text: str) -> str:
+    """Lowercase words only, without the leading clause number, so renumbering is not a deviation."""
+    return " ".join(_WORD_RE.findall(_NUMBERING_RE.sub("", text).lower()))
+
+
+def paragraph_fingerprint(norm: str) -> int:
+    # Stable across processes (unlike hash()), so fingerprints can be shared.
+    return int.from_bytes(hashlib.blake2b(norm.encode("utf-8"), digest_size=8).digest(), "little")
+
+
+class Fingerprints:
+    """Non-empty paragraphs of one text: original indices, raw and normalized texts, fingerprints."""
+
+    def __init__(self, texts: Sequence[str]):
+        self.indices, self.texts, self.norms, self.fps = [], [], [], []
+        for i, text in enumerate(texts):
+            norm = normalize_paragraph(text)
+            if norm:
+                self.indices.append(i)
+                self.texts.append(text.strip())
+                self.norms.append(norm)
+                self.fps.append(paragraph_fingerprint(norm))
+        self._words = None
+
+    def __len__(self) -> int:
+        return len(self.fps)
+
+    def words(self, k: int) -> frozenset:
+        if self._words is None:
+            self._words = [None] * len(self.norms)
+        if self._words[k] is None:
+            self._words[k] = frozenset(self.norms[k].split())
+        return self._words[k]
+
+
+class Template:
+    def __init__(self, path: str, doc_type: str, texts: Sequence[str]):
+        self.path = path
+        self.name = os.path.basename(path)
+        self.doc_type = doc_type
+        self.prints = Fingerprints(texts)
+        self.fp_set = frozenset(self.prints.fps)
+
+
+def _read_paragraphs(path: str) -> List[str]:
+    if path.lower().endswith(".docx"):
+        return list(iter_docx_paragraph_texts(path))
+    with open(path, "r", encoding="utf-8", errors="replace") as fh:
+        return fh.read().splitlines()
+
+
+def _template_files(template_dir: str) -> List[str]:
+    if not os.path.isdir(template_dir):
+        return []
+    return sorted(
+        os.path.join(template_dir, f) for f in os.listdir(template_dir)
+        if f.lower().endswith(TEMPLATE_EXTENSIONS) and not f.startswith((".", "~$"))
+    )
+
+
+def template_fingerprint(template_dir: str = TEMPLATE_DIR) -> str:
+    """Cheap signature of the template set (names, mtimes, sizes) and diff settings."""
+    h = hashlib.sha256(json.dumps([
+        TEMPLATE_DIFF_ENABLED, TEMPLATE_DIFF_VERSION, MIN_CLAUSE_CHARS, MIN_TEMPLATE_OVERLAP,
+        FUZZY_MIN_JACCARD, ALTERED_MIN_SIMILARITY, ALTERED_LOW_SIMILARITY, FUZZY_WINDOW, MAX_FINDINGS,
+    ]).encode("utf-8"))
+    for f in _template_files(template_dir) + [os.path.join(template_dir, TEMPLATE_TYPES_FILE)]:
+        try:
+            st = os.stat(f)
+        except OSError:
+            continue
+        h.update(f"{os.path.basename(f)}:{st.st_mtime_ns}:{st.st_size};".encode("utf-8"))
+    return h.hexdigest()
+
+
+class TemplateLibrary:
+    """
+    Every template in `template_dir`, fingerprinted once when the library is
+    built. A template's document type comes from TEMPLATE_TYPES_FILE, else from
+    its file name (see checklist_verifier.normalize_name).
+    """
+
+    def __init__(self, template_dir: str = TEMPLATE_DIR):
+        self.template_dir = template_dir
+        self.signature = template_fingerprint(template_dir)
+        self.by_type: Dict[str, List[Template]] = {}
+        overrides = {}
+        try:
+            with open(os.path.join(template_dir, TEMPLATE_TYPES_FILE), "r", encoding="utf-8") as fh:
+                overrides = json.load(fh)
+        except FileNotFoundError:
+            pass
+        except (OSError, ValueError) as e:
+            logger.warning("Templates: ignoring unreadable %s: %s", TEMPLATE_TYPES_FILE, e)
+        for path in _template_files(template_dir):
+            doc_type = overrides.get(os.path.basename(path)) or normalize_name(path)
+            if not doc_type:
+                logger.info("Templates: no document type for %s, skipped", path)
+                continue
+            try:
+                template = Template(path, doc_type, _read_paragraphs(path))
+            except Exception as e:
+                logger.warning("Templates: skipping %s: %s", path, e)
+                continue
+            self.by_type.setdefault(doc_type, []).append(template)
+        if self.by_type:
+            logger.info("Templates: %d fingerprinted from %s", sum(map(len, self.by_type.values())), template_dir)
+
+    def best_template(self, doc_type: str, doc: Fingerprints) -> Optional[Template]:
+        """The template of `doc_type` sharing the most paragraphs with `doc` (None below MIN_TEMPLATE_OVERLAP)."""
+        doc_set = set(doc.fps)
+        best, best_share = None, 0.0
+        for template in self.by_type.get(doc_type, ()):
+            if not template.fp_set:
+                continue
+            share = len(template.fp_set & doc_set) / len(template.fp_set)
+            if share > best_share:
+                best, best_share = template, share
+        return best if best_share >= MIN_TEMPLATE_OVERLAP else None
+
+
+def align(a: Sequence[int], b: Sequence[int]) -> List[Tuple[str, int, int, int, int]]:
+    """
+    difflib opcodes between two fingerprint sequences. Equal head and tail are
+    trimmed first; the rest is matched on 8-byte integers, not characters, which
+    keeps hundreds of paragraphs in the millisecond range.
+    """
+    n, m = len(a), len(b)
+    head = 0
+    while head < n and head < m and a[head] == b[head]:
+        head += 1
+    tail = 0
+    while tail < n - head and tail < m - head and a[n - 1 - tail] == b[m - 1 - tail]:
+        tail += 1
+    ops = [("equal", 0, head, 0, head)] if head else []
+    if head < n - tail or head < m - tail:
+        matcher = SequenceMatcher(None, a[head:n - tail], b[head:m - tail], autojunk=False)
+        ops.extend((tag, i1 + head, i2 + head, j1 + head, j2 + head) for tag, i1, i2, j1, j2 in matcher.get_opcodes())
+    if tail:
+        ops.append(("equal", n - tail, n, m - tail, m))
+    return ops
+
+
+def _jaccard(x: frozenset, y: frozenset) -> float:
+    return len(x & y) / len(x | y) if x and y else 0.0
+
+
+def _fuzzy_pairs(t: Fingerprints, d: Fingerprints, t_ids: Sequence[int], d_ids: Sequence[int]) -> Dict[int, Tuple[int, float]]:
+    """Unmatched template paragraph -> (document paragraph, similarity), each document paragraph used once."""
+    pairs, used = {}, set()
+    if not t_ids or not d_ids:
+        return pairs
+    scale = len(d_ids) / len(t_ids)
+    for k, i in enumerate(t_ids):
+        centre = int(k * scale)
+        best_j, best_jac = None, FUZZY_MIN_JACCARD
+        for j in d_ids[max(0, centre - FUZZY_WINDOW):centre + FUZZY_WINDOW + 1]:
+            if j not in used:
+                jac = _jaccard(t.words(i), d.words(j))
+                if jac >= best_jac:
+                    best_j, best_jac = j, jac
+        if best_j is None:
+            continue
+        similarity = SequenceMatcher(None, t.norms[i], d.norms[best_j], autojunk=False).ratio()
+        if similarity >= ALTERED_MIN_SIMILARITY:
+            pairs[i] = (best_j, similarity)
+            used.add(best_j)
+    return pairs
+
+
+def compare_to_template(template: Template, doc: Fingerprints) -> List[Dict[str, Any]]:
+    """Issues for template clauses missing from, altered in or moved within `doc`."""
+    t = template.prints
+    doc_pos = {}
+    for j, fp in enumerate(doc.fps):
+        doc_pos.setdefault(fp, j)
+    findings = []
+    for tag, i1, i2, j1, j2 in align(t.fps, doc.fps):
+        if tag in ("equal", "insert"):
+            continue
+        # Clauses present verbatim elsewhere were moved; the rest are fuzzy-matched
+        # only against the region's document paragraphs that match no template clause.
+        fuzzy = {}
+        if tag == "replace":
+            fuzzy = _fuzzy_pairs(
+                t, doc,
+                [i for i in range(i1, i2) if t.fps[i] not in doc_pos],
+                [j for j in range(j1, j2) if doc.fps[j] not in template.fp_set],
+            )
+        for i in range(i1, i2):
+            if len(t.norms[i]) < MIN_CLAUSE_CHARS:
+                continue
+            clause = t.texts[i][:200]
+            if i in fuzzy:
+                j, similarity = fuzzy[i]
+                findings.append({
+                    "paragraph_index": doc.indices[j],
+                    "issue": f"Clause differs from the ADGM template '{template.name}' (similarity {similarity:.2f}): \"{doc.texts[j][:200]}\"",
+                    "severity": "Low" if similarity >= ALTERED_LOW_SIMILARITY else "Medium",
+                    "suggestion": f"Check the change against the template wording: \"{clause}\"",
+                    "template": template.name,
+                    "deviation": "altered",
+                    "similarity": round(similarity, 3),
+                })
+            elif t.fps[i] in doc_pos:
+                findings.append({
+                    "paragraph_index": doc.indices[doc_pos[t.fps[i]]],
+                    "issue": f"Clause from the ADGM template '{template.name}' appears out of order: \"{clause}\"",
+                    "severity": "Low",
+                    "suggestion": "Confirm the clause order is intended.",
+                    "template": template.name,
+                    "deviation": "moved",
+                })
+            else:
+                anchor = j1 if j1 < len(doc) else len(doc) - 1
+                findings.append({
+                    "paragraph_index": doc.indices[anchor] if anchor >= 0 else None,
+                    "issue": f"Clause from the ADGM template '{template.name}' is missing: \"{clause}\"",
+                    "severity": "Medium",
+                    "suggestion": "Restore the template clause or confirm the removal is intended.",
+                    "template": template.name,
+                    "deviation": "removed",
+                })
+    if len(findings) > MAX_FINDINGS:
+        extra = len(findings) - MAX_FINDINGS
+        findings = findings[:MAX_FINDINGS] + [{
+            "paragraph_index": None,
+            "issue": f"{extra} further deviation(s) from the ADGM template '{template.name}' not listed.",
+            "severity": "Low",
+            "suggestion": "Compare the document with the template in full.",
+            "template": template.name,
+            "deviation": "summary",
+        }]
+    return findings
+
+
+_library = None
+_library_lock = threading.Lock()
+
+
+def get_template_library() -> TemplateLibrary:
+    """Shared library, re-fingerprinted only when the template set changes (thread-safe)."""
+    global _library
+    signature = template_fingerprint()
+    if _library is None or _library.signature != signature:
+        with _library_lock:
+            if _library is None or _library.signature != signature:
+                _library = TemplateLibrary()
+    return _library
+
+
+def template_deviations(doc_type: str, paragraph_texts: Sequence[str]) -> List[Dict[str, Any]]:
+    """Template-diff issues for a classified document (empty without a matching template); never raises."""
+    if not TEMPLATE_DIFF_ENABLED or not doc_type or doc_type == "Unknown":
+        return []
+    try:
+        library = get_template_library()
+        if doc_type not in library.by_type:
+            return []
+        doc = Fingerprints(paragraph_texts)
+        template = library.best_template(doc_type, doc)
+        return compare_to_template(template, doc) if template else []
+    except Exception as e:
+        logger.exception("Template diff failed: %s", e)
+        return []
@@ -0,0 +1,27 @@
+import zipfile
+
+from docx import Document
+
+import app
+from src import document_processor
+from src.output_store import OutputStore
+
+
+def test_same_named_uploads_keep_separate_reviewed_docs(tmp_path, monkeypatch):
+    monkeypatch.setattr(app, "output_store", OutputStore(str(tmp_path / "out")))
+    monkeypatch.setattr(document_processor, "get_result_cache", lambda: None)
+    paths = []
+    for entity in ("entity_a", "entity_b"):
+        (tmp_path / entity).mkdir()
+        doc = Document()
+        doc.add_paragraph(f"Board resolution of {entity}.")
+        path = tmp_path / entity / "board_resolution.docx"
+        doc.save(str(path))
+        paths.append(str(path))
+
+    report, zip_path = app.analyze_documents(paths, workers=1)
+    with zipfile.ZipFile(zip_path) as z:
+        names = sorted(z.namelist())
+        texts = [z.read(n) for n in names]
+    assert names == ["board_resolution_reviewed.docx", "board_resolution_reviewed_2.docx"]
+    assert texts[0] != texts[1]
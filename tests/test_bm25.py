@@ -0,0 +1,73 @@
+import math
+from collections import Counter
+
+import pytest
+
+from src import bm25
+from src.bm25 import BM25_B, BM25_K1, BM25Index, tokenize
+
+PASSAGES = [
+    "The register of members shall be kept at the registered office.",
+    "Directors shall keep accounting records; accounting records are kept for six years.",
+    "The company may transfer shares with the consent of the directors.",
+    "Notice of a general meeting shall be given to every member.",
+    "",
+]
+
+
+def _reference_scores(query, texts, k1=BM25_K1, b=BM25_B):
+    """Textbook Okapi BM25, normalised by the query's best achievable score."""
+    docs = [tokenize(t) for t in texts]
+    n = len(docs)
+    avgdl = sum(map(len, docs)) / n
+    terms = {t for t in tokenize(query) if any(t in d for d in docs)}
+    idf = {t: math.log(1 + (n - sum(t in d for d in docs) + 0.5) / (sum(t in d for d in docs) + 0.5)) for t in terms}
+    bound = sum(idf.values()) * (k1 + 1)
+    scores = {}
+    for pid, d in enumerate(docs):
+        tf = Counter(d)
+        s = sum(idf[t] * tf[t] * (k1 + 1) / (tf[t] + k1 * (1 - b + b * len(d) / avgdl)) for t in terms if tf[t])
+        if s:
+            scores[pid] = s / bound
+    return sorted(scores.items(), key=lambda kv: (-kv[1], kv[0]))
+
+
+@pytest.mark.parametrize("query", ["accounting records", "register of members office", "directors shares", "unknown words"])
+def test_scores_match_okapi_bm25(query):
+    index = BM25Index.build(PASSAGES)
+    got = index.search_many([query], top_k=10)[0]
+    want = _reference_scores(query, PASSAGES)
+    assert [p for p, _ in got] == [p for p, _ in want]
+    assert [s for _, s in got] == pytest.approx([s for _, s in want], rel=1e-5)
+    assert all(0.0 < s <= 1.0 for _, s in got)
+
+
+def test_python_and_numpy_paths_agree(monkeypatch):
+    pytest.importorskip("numpy")
+    index = BM25Index.build(PASSAGES * 3)
+    queries = ["accounting records", "shall", "member meeting notice", "directors"]
+    fast = index.search_many(queries, top_k=4)
+    monkeypatch.setattr(bm25, "_NUMPY_AVAILABLE", False)
+    slow = index.search_many(queries, top_k=4)
+    assert [[p for p, _ in r] for r in fast] == [[p for p, _ in r] for r in slow]
+    for f, s in zip(fast, slow):
+        assert [x for _, x in f] == pytest.approx([x for _, x in s], rel=1e-6)
+
+
+def test_save_and_load_roundtrip(tmp_path):
+    index = BM25Index.build(PASSAGES)
+    prefix = str(tmp_path / "idx-")
+    index.save(prefix)
+    loaded = BM25Index.load(prefix)
+    assert loaded.vocab == index.vocab and loaded.n_passages == index.n_passages
+    queries = ["accounting records", "general meeting"]
+    assert loaded.search_many(queries, top_k=3) == index.search_many(queries, top_k=3)
+
+
+def test_load_rejects_truncated_index(tmp_path):
+    prefix = str(tmp_path / "idx-")
+    BM25Index.build(PASSAGES).save(prefix)
+    with open(prefix + "bm25_indptr.bin", "r+b") as fh:
+        fh.truncate(8)
+    with pytest.raises(ValueError):
+        BM25Index.load(prefix)
@@ -0,0 +1,32 @@
+from src.checklist_verifier import normalize_uploaded_types, verify_document_checklist
+
+INCORPORATION = [
+    "articles_of_association.docx",
+    "memorandum.docx",
+    "incorporation_application.docx",
+    "UBO_declaration.docx",
+    "register_of_members.docx",
+    "board_resolution.docx",
+    "shareholder_resolution.docx",
+]
+
+
+def test_filename_keyword_beats_classifier():
+    # The classifier's best guess for this upload was the register at 0.316.
+    detected = [("Register of Members and Directors", 0.316)]
+    assert normalize_uploaded_types(["UBO_declaration.docx"], detected) == ["UBO Declaration Form"]
+
+
+def test_classifier_used_without_filename_keyword():
+    detected = [("UBO Declaration Form", 0.4)]
+    assert normalize_uploaded_types(["scan_0001.docx"], detected) == ["UBO Declaration Form"]
+    assert normalize_uploaded_types(["scan_0001.docx"], [("Unknown", 0.0)]) == ["Scan_0001"]
+
+
+def test_checklist_not_missing_ubo_when_classifier_disagrees():
+    detected = [("Unknown", 0.0)] * len(INCORPORATION)
+    detected[3] = ("Register of Members and Directors", 0.316)
+    result = verify_document_checklist(INCORPORATION, detected)
+    assert result["process"] == "Company Incorporation"
+    assert "UBO Declaration Form" in result["uploaded_documents"]
+    assert not result.get("missing_documents")
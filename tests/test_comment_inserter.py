@@ -0,0 +1,95 @@
+import zipfile
+
+from docx import Document
+from docx.oxml import parse_xml
+from docx.oxml.ns import qn
+from lxml import etree
+
+from src.comment_inserter import insert_comments
+
+W_NS = "http://schemas.openxmlformats.org/wordprocessingml/2006/main"
+
+
+def _paragraph(doc, *texts):
+    p = doc.add_paragraph()
+    for text in texts:
+        p.add_run(text)
+    return p
+
+
+def _add_hyperlink(p, text):
+    p._p.append(parse_xml(
+        f'<w:hyperlink xmlns:w="{W_NS}" w:anchor="section_3"><w:r><w:t xml:space="preserve">{text}</w:t></w:r></w:hyperlink>'
+    ))
+
+
+def _saved_parts(doc, path):
+    doc.save(str(path))
+    Document(str(path))  # still opens
+    with zipfile.ZipFile(str(path)) as z:
+        comment_parts = [n for n in z.namelist() if n.startswith("word/comments")]
+        assert len(comment_parts) == 1
+        return etree.fromstring(z.read("word/document.xml")), etree.fromstring(z.read(comment_parts[0]))
+
+
+def _comment_ids(comments):
+    return [c.get(qn("w:id")) for c in comments.iterchildren(qn("w:comment"))]
+
+
+def _covered_text(body_p, cid):
+    """Text between the comment's range markers, and the id of the reference run after the end."""
+    inside, text = False, []
+    for el in body_p.iter(qn("w:commentRangeStart"), qn("w:commentRangeEnd"), qn("w:t")):
+        if el.tag == qn("w:commentRangeStart") and el.get(qn("w:id")) == cid:
+            inside = True
+        elif el.tag == qn("w:commentRangeEnd") and el.get(qn("w:id")) == cid:
+            break
+        elif inside and el.tag == qn("w:t"):
+            text.append(el.text or "")
+    end = body_p.find(f".//{qn('w:commentRangeEnd')}[@{qn('w:id')}='{cid}']")
+    return "".join(text), end.getnext().find(qn("w:commentReference")).get(qn("w:id"))
+
+
+def test_span_across_runs(tmp_path):
+    doc = Document()
+    p = _paragraph(doc, "The com", "pany may ap", "point directors.")
+    insert_comments(doc, [(p, "Ambiguous wording.", (4, 23))], mode="native")
+    assert p.text == "The company may appoint directors."
+
+    document, comments = _saved_parts(doc, tmp_path / "out.docx")
+    assert _comment_ids(comments) == ["0"]
+    assert comments.find(f".//{qn('w:t')}[last()]").text == "Ambiguous wording."
+    body_p = document.find(f".//{qn('w:body')}/{qn('w:p')}")
+    assert _covered_text(body_p, "0") == ("company may appoint", "0")
+
+
+def test_paragraph_with_hyperlink(tmp_path):
+    doc = Document()
+    p = _paragraph(doc, "Disputes go to the ")
+    _add_hyperlink(p, "Dubai Courts")
+    p.add_run(" under clause 3.")
+    insert_comments(doc, [(p, "Not ADGM jurisdiction.", (19, 31)), (p, "Whole paragraph.", None)], mode="native")
+
+    document, comments = _saved_parts(doc, tmp_path / "out.docx")
+    assert _comment_ids(comments) == ["0", "1"]
+    body_p = document.find(f".//{qn('w:body')}/{qn('w:p')}")
+    assert _covered_text(body_p, "0") == ("Dubai Courts", "0")
+    assert _covered_text(body_p, "1")[0] == "Disputes go to the Dubai Courts under clause 3."
+    # The hyperlink is wrapped whole, never split.
+    assert len(body_p.findall(qn("w:hyperlink"))) == 1
+
+
+def test_existing_comments_part_is_reused(tmp_path):
+    doc = Document()
+    p = _paragraph(doc, "First clause.")
+    insert_comments(doc, [(p, "One.", None)], mode="native")
+    first = tmp_path / "first.docx"
+    doc.save(str(first))
+
+    reopened = Document(str(first))
+    q = _paragraph(reopened, "Second clause.")
+    insert_comments(reopened, [(q, "Two.", None), (reopened.paragraphs[0], "Three.", (0, 5))], mode="native")
+    document, comments = _saved_parts(reopened, tmp_path / "second.docx")
+    assert _comment_ids(comments) == ["0", "1", "2"]
+    starts = [el.get(qn("w:id")) for el in document.iter(qn("w:commentRangeStart"))]
+    assert sorted(starts) == ["0", "1", "2"]
@@ -0,0 +1,32 @@
+from docx import Document
+
+from src.document_processor import process_document
+
+
+def _write_docx(path, *paragraphs):
+    doc = Document()
+    for text in paragraphs:
+        doc.add_paragraph(text)
+    doc.save(str(path))
+    return str(path)
+
+
+def test_filename_keyword_beats_classifier(tmp_path):
+    path = _write_docx(tmp_path / "UBO_declaration.docx", "The beneficial owner is listed below.")
+    checklist = {"classified_documents": {path: {"document_type": "Register of Members and Directors", "confidence": 0.316}}}
+    result = process_document(path, checklist, report_only=True, use_cache=False)
+    assert result["document_type"] == "UBO Declaration Form"
+
+
+def test_classifier_used_without_filename_keyword(tmp_path):
+    path = _write_docx(tmp_path / "scan_0001.docx", "The beneficial owner is listed below.")
+    checklist = {"classified_documents": {path: {"document_type": "UBO Declaration Form", "confidence": 0.4}}}
+    assert process_document(path, checklist, report_only=True, use_cache=False)["document_type"] == "UBO Declaration Form"
+    assert process_document(path, report_only=True, use_cache=False)["document_type"] == "Unknown"
+
+
+def test_missing_file_reported_as_issue(tmp_path):
+    result = process_document(str(tmp_path / "nope.docx"), report_only=True)
+    assert result["document_type"] == "Unknown"
+    assert result["reviewed_path"] is None
+    assert result["issues"][0]["issue"].startswith("Failed to open .docx")
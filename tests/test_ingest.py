@@ -0,0 +1,80 @@
+import json
+import os
+
+from docx import Document
+
+from src.ingest import ingest_sources, load_provenance, normalize_text
+from src.rag_engine import PROVENANCE_FILE
+
+CSV = (
+    "Category,Document/Template Type,Official ADGM/Government Link\n"
+    "Guidance,Guidance, Templates, Policy Statements,https://example.org/download/Guide.txt/abc123\n"
+)
+
+
+def _sources(tmp_path):
+    src = tmp_path / "sources"
+    (src / "sub").mkdir(parents=True)
+    (src / "guide.txt").write_text("Top-level guide.\r\nSecond   line.", encoding="utf-8")
+    (src / "sub" / "guide.txt").write_text("Nested guide.", encoding="utf-8")
+    (src / "notes.txt").write_text("Notes as text.", encoding="utf-8")
+    doc = Document()
+    doc.add_paragraph("Notes as Word.")
+    doc.save(str(src / "notes.docx"))
+    csv = tmp_path / "sources.csv"
+    csv.write_text(CSV, encoding="utf-8")
+    return str(src), str(csv)
+
+
+def _ingest(src, out, csv):
+    return ingest_sources(src, str(out), csv, workers=1, rebuild=False)
+
+
+def test_output_names_never_collide_or_overwrite(tmp_path):
+    src, csv = _sources(tmp_path)
+    out = tmp_path / "refs"
+    out.mkdir()
+    (out / "notes.txt").write_text("hand-written", encoding="utf-8")
+    (out / "notes_docx.txt").write_text("hand-written too", encoding="utf-8")
+
+    summary = _ingest(src, out, csv)
+    assert (summary["extracted"], summary["failed"]) == (4, {})
+    outputs = {rel: e["output"] for rel, e in load_provenance(str(out))["sources"].items()}
+    assert outputs == {
+        "guide.txt": "guide.txt",
+        "notes.docx": "notes_docx_2.txt",
+        "notes.txt": "notes_txt.txt",
+        os.path.join("sub", "guide.txt"): "sub__guide.txt",
+    }
+    assert (out / "notes.txt").read_text(encoding="utf-8") == "hand-written"
+    assert (out / "notes_docx.txt").read_text(encoding="utf-8") == "hand-written too"
+    assert (out / "notes_docx_2.txt").read_text(encoding="utf-8") == "Notes as Word.\n"
+    assert (out / "guide.txt").read_text(encoding="utf-8") == "Top-level guide.\nSecond line.\n"
+
+
+def test_provenance_and_incremental_rerun(tmp_path):
+    src, csv = _sources(tmp_path)
+    out = tmp_path / "refs"
+    _ingest(src, out, csv)
+    sources = load_provenance(str(out))["sources"]
+    assert sources["guide.txt"]["url"] == "https://example.org/download/Guide.txt/abc123"
+    assert sources["guide.txt"]["category"] == "Guidance"
+    assert sources["notes.txt"]["url"] is None
+    manifest_mtime = os.stat(out / PROVENANCE_FILE).st_mtime_ns
+
+    again = _ingest(src, out, csv)
+    assert (again["extracted"], again["unchanged"]) == (0, 4)
+    assert os.stat(out / PROVENANCE_FILE).st_mtime_ns == manifest_mtime
+
+    os.remove(os.path.join(src, "notes.txt"))
+    (tmp_path / "sources" / "guide.txt").write_text("Revised guide.", encoding="utf-8")
+    third = _ingest(src, out, csv)
+    assert (third["extracted"], third["unchanged"], third["removed"]) == (1, 2, 1)
+    assert not (out / "notes_txt.txt").exists()
+    assert (out / "guide.txt").read_text(encoding="utf-8") == "Revised guide.\n"
+    with open(out / PROVENANCE_FILE, encoding="utf-8") as fh:
+        assert "notes.txt" not in json.load(fh)["sources"]
+
+
+def test_normalize_text():
+    assert normalize_text("Regu-\nlation  one\r\n\n\n\nTwo") == "Regulation one\n\nTwo"
@@ -0,0 +1,91 @@
+import random
+import re
+
+from src.pattern_scanner import SENTENCE_BOUNDARY, PatternScanner
+
+GROUPS = {
+    "ambiguous": {"regex": [r"\bmay\b", r"\bbest endeavours\b", r"\bsubject to\b", r"(?:shall|must) not", r"\d+ days"]},
+    "jurisdiction": {"literal": ["federal court", "uae federal court", "dubai courts"]},
+}
+WORDS = [
+    "may", "best", "endeavours", "subject", "to", "shall", "must", "not", "30", "days",
+    "uae", "federal", "court", "dubai", "courts", "the", "company", "İstanbul",
+]
+SEPARATORS = [" ", " ", " ", ". ", "? ", "!\n", ".  ", ".", "\n", ". \n "]
+
+
+def _random_text(rng, n_words):
+    return "".join(rng.choice(WORDS) + rng.choice(SEPARATORS) for _ in range(n_words))
+
+
+def _random_pieces(rng, text):
+    pieces, i = [], 0
+    while i < len(text):
+        n = rng.randint(0, 12)
+        pieces.append(text[i:i + n])
+        i += n
+    return pieces
+
+
+def _stream(scanner, pieces, max_window=None):
+    stream = scanner.stream(max_window)
+    out, edges = [], []
+    for piece in pieces:
+        out += stream.feed(piece)
+        edges.append(stream.base)
+    out += stream.close()
+    return out, set(edges)
+
+
+def test_stream_matches_full_scan():
+    scanner = PatternScanner(GROUPS)
+    rng = random.Random(0)
+    for _ in range(500):
+        text = _random_text(rng, rng.randint(0, 60))
+        streamed, _ = _stream(scanner, _random_pieces(rng, text))
+        assert streamed == scanner.scan(text), text
+
+
+def test_boundary_split_across_pieces():
+    scanner = PatternScanner(GROUPS)
+    text = "The company may act.  Dubai courts apply?\n\nSubject to law!"
+    for cut in range(len(text) + 1):
+        streamed, _ = _stream(scanner, [text[:cut], text[cut:]])
+        assert streamed == scanner.scan(text), cut
+    streamed, _ = _stream(scanner, list(text))
+    assert streamed == scanner.scan(text)
+
+
+def test_sentences_at_max_window():
+    scanner = PatternScanner(GROUPS)
+    rng = random.Random(1)
+    exact = 0
+    for _ in range(500):
+        text = _random_text(rng, rng.randint(0, 60))
+        max_window = rng.randint(8, 96)
+        streamed, edges = _stream(scanner, _random_pieces(rng, text), max_window)
+        full = scanner.scan(text)
+        starts = [0] + [m.end() for m in re.finditer(SENTENCE_BOUNDARY, text)] + [len(text)]
+        if all(b - a <= max_window for a, b in zip(starts, starts[1:])):
+            # No sentence (with its trailing whitespace) outgrows the window: same result as the full scan.
+            exact += 1
+            assert streamed == full, (max_window, text)
+        else:
+            # Over-long sentences are cut at a window edge: only matches across a cut are lost.
+            expected = [m[:5] for m in full if not any(m.start < e < m.end for e in edges)]
+            assert [m[:5] for m in streamed] == expected, (max_window, text)
+    assert 0 < exact < 500
+
+
+def test_long_sentence_cut_at_max_window():
+    scanner = PatternScanner(GROUPS)
+    text = "the company " * 10 + "may rely on dubai courts. Subject to law."
+    stream = scanner.stream(32)
+    out = []
+    for word in text.split(" "):
+        out += stream.feed(word + " ")
+        assert len(stream.text) <= 32 + len("company ")
+    out += stream.close()
+    assert [(m.group, m.pattern) for m in out] == [
+        ("ambiguous", r"\bmay\b"), ("jurisdiction", "dubai courts"), ("ambiguous", r"\bsubject to\b"),
+    ]
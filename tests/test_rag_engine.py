@@ -0,0 +1,110 @@
+import json
+import os
+
+from src import rag_engine
+from src.bm25 import BM25Index
+from src.rag_engine import LocalRAG, split_passages
+
+
+def _refs(tmp_path):
+    ref_dir = tmp_path / "refs"
+    ref_dir.mkdir()
+    (ref_dir / "companies.txt").write_text(
+        "Part 3. Jurisdiction of the ADGM Courts over company disputes.\n\n"
+        "Section 12. Articles of Association must be filed with the Registrar.\n",
+        encoding="utf-8",
+    )
+    return str(ref_dir)
+
+
+def test_rebuild_index_fits_once_and_swaps_engine(tmp_path, monkeypatch):
+    ref_dir = _refs(tmp_path)
+    builds = []
+    real_build = BM25Index.build.__func__
+    monkeypatch.setattr(BM25Index, "build", classmethod(lambda cls, texts: builds.append(1) or real_build(cls, texts)))
+    monkeypatch.setattr(rag_engine, "LocalRAG", lambda **kw: LocalRAG(ref_dir, retriever="bm25", **kw))
+    monkeypatch.setattr(rag_engine, "_rag", None)
+
+    old = rag_engine.get_rag()
+    assert len(builds) == 1
+    old.query("registrar filing")
+    summary = rag_engine.rebuild_index(force=True)
+    assert len(builds) == 2
+    assert summary["indexed"] and summary["documents"] == 1
+    assert rag_engine.get_rag() is not old
+    assert rag_engine.get_rag().cache_info()["size"] == 0
+    assert old.cache_info()["size"] == 1
+
+
+def _long_refs(tmp_path):
+    ref_dir = tmp_path / "long_refs"
+    ref_dir.mkdir()
+    sections = "\n".join(
+        f"Section {k}. The Registrar may require the company to file its register of members within {k} days. "
+        "Directors shall keep accounting records at the registered office." * (1 + k % 3)
+        for k in range(1, 40)
+    )
+    (ref_dir / "companies.txt").write_text(sections, encoding="utf-8")
+    (ref_dir / "employment.txt").write_text(
+        "Article 1. An employment contract shall state the wage and the working hours.\n"
+        "Article 2. Notice of termination shall be given in writing.\n",
+        encoding="utf-8",
+    )
+    return str(ref_dir)
+
+
+def _retrievers():
+    return ["bm25", "tfidf"] if rag_engine.sklearn_available() else ["bm25"]
+
+
+def _prefix(rag):
+    return rag.manifest["files_prefix"]
+
+
+QUERIES = ["register of members", "termination notice in writing", "accounting records office"]
+
+
+def test_split_passages_bounded_and_clause_aligned():
+    text = "Part 1. Scope\n" + "Regulation 1. " + "word " * 400 + "\n(a) A short item.\n"
+    passages = split_passages(text, max_chars=300, overlap=50)
+    # Headings start passages; the long regulation is cut into overlapping windows.
+    assert passages[0] == (0, len("Part 1. Scope\n"))
+    assert passages[-1] == (text.index("(a)"), len(text))
+    windows = passages[1:-1]
+    assert all(b - a <= 300 for a, b in windows)
+    assert all(a2 < b1 for (_, b1), (a2, _) in zip(windows, windows[1:]))
+    assert windows[-1][1] == text.index("(a)")
+
+
+def test_saved_index_reloads_with_same_results(tmp_path):
+    ref_dir = _long_refs(tmp_path)
+    for retriever in _retrievers():
+        index_dir = str(tmp_path / f"index_{retriever}")
+        built = LocalRAG(ref_dir, index_dir=index_dir, retriever=retriever)
+        loaded = LocalRAG(ref_dir, index_dir=index_dir, retriever=retriever)
+        assert _prefix(loaded) == _prefix(built)
+        assert len(loaded.passages) == len(built.passages) > 2
+        assert loaded.search_many(QUERIES, top_k=3) == built.search_many(QUERIES, top_k=3)
+        assert [loaded.search(q, top_k=3) for q in QUERIES] == loaded.search_many(QUERIES, top_k=3)
+        assert loaded.search("termination notice")[0]["source"] == "employment.txt"
+
+
+def test_stale_index_is_rebuilt(tmp_path):
+    ref_dir = _long_refs(tmp_path)
+    index_dir = str(tmp_path / "index")
+    first = LocalRAG(ref_dir, index_dir=index_dir, retriever="bm25")
+    with open(os.path.join(ref_dir, "employment.txt"), "a", encoding="utf-8") as fh:
+        fh.write("Article 3. Gratuity is payable at the end of service.\n")
+    changed = LocalRAG(ref_dir, index_dir=index_dir, retriever="bm25")
+    assert _prefix(changed) != _prefix(first)
+    assert changed.search("end of service gratuity")[0]["source"] == "employment.txt"
+
+    manifest_path = os.path.join(index_dir, "manifest.json")
+    with open(manifest_path, encoding="utf-8") as fh:
+        manifest = json.load(fh)
+    for broken in ({k: v for k, v in manifest.items() if k != "files_prefix"}, dict(manifest, version=-1)):
+        with open(manifest_path, "w", encoding="utf-8") as fh:
+            json.dump(broken, fh)
+        rebuilt = LocalRAG(ref_dir, index_dir=index_dir, retriever="bm25")
+        assert rebuilt.search_many(QUERIES, top_k=2) == changed.search_many(QUERIES, top_k=2)
+        assert _prefix(rebuilt) != manifest["files_prefix"]
@@ -0,0 +1,67 @@
+import shutil
+
+from docx import Document
+
+from src import document_processor
+from src.result_cache import ResultCache
+
+
+def test_same_bytes_different_name_not_served_from_cache(tmp_path, monkeypatch):
+    cache = ResultCache(path=str(tmp_path / "results.sqlite"))
+    monkeypatch.setattr(document_processor, "get_result_cache", lambda: cache)
+    doc = Document()
+    doc.add_paragraph("The parties agree to the terms set out below.")
+    named = tmp_path / "articles_of_association.docx"
+    doc.save(str(named))
+    scan = tmp_path / "scan_0042.docx"
+    shutil.copy(named, scan)
+
+    first = document_processor.process_document(str(named), report_only=True)
+    second = document_processor.process_document(str(scan), report_only=True)
+    assert first["document_type"] == "Articles of Association"
+    assert second["cache"] == "miss"
+    assert second["document_type"] == "Unknown"
+
+    renamed = tmp_path / "articles.docx"
+    shutil.copy(scan, renamed)
+    third = document_processor.process_document(str(renamed), report_only=True)
+    assert third["document_type"] == "Articles of Association"
+
+
+def test_classifier_type_part_of_key(tmp_path, monkeypatch):
+    cache = ResultCache(path=str(tmp_path / "results.sqlite"))
+    monkeypatch.setattr(document_processor, "get_result_cache", lambda: cache)
+    doc = Document()
+    doc.add_paragraph("The beneficial owner is listed below.")
+    path = str(tmp_path / "scan_0001.docx")
+    doc.save(path)
+    checklist = {"classified_documents": {path: {"document_type": "UBO Declaration Form", "confidence": 0.4}}}
+
+    assert document_processor.process_document(path, checklist, report_only=True)["document_type"] == "UBO Declaration Form"
+    plain = document_processor.process_document(path, report_only=True)
+    assert (plain["cache"], plain["document_type"]) == ("miss", "Unknown")
+    again = document_processor.process_document(path, checklist, report_only=True)
+    assert (again["cache"], again["document_type"]) == ("hit", "UBO Declaration Form")
+
+
+def test_reviewed_artifact_reused_across_upload_paths(tmp_path, monkeypatch):
+    cache = ResultCache(path=str(tmp_path / "results.sqlite"))
+    monkeypatch.setattr(document_processor, "get_result_cache", lambda: cache)
+    doc = Document()
+    doc.add_paragraph("The company may appoint directors.")
+    first, second = tmp_path / "a", tmp_path / "b"
+    first.mkdir()
+    second.mkdir()
+    doc.save(str(first / "articles.docx"))
+    shutil.copy(first / "articles.docx", second / "articles.docx")
+
+    def checklist(path):
+        return {"process": "Company Incorporation", "classified_documents": {path: {"document_type": "Unknown", "confidence": 0.0}}}
+
+    p1, p2 = str(first / "articles.docx"), str(second / "articles.docx")
+    document_processor.process_document(p1, checklist(p1), output_dir=str(tmp_path / "out1"))
+    rebuilt = []
+    monkeypatch.setattr(document_processor, "_save_reviewed", lambda *a, **k: rebuilt.append(a))
+    hit = document_processor.process_document(p2, checklist(p2), output_dir=str(tmp_path / "out2"))
+    assert hit["cache"] == "hit"
+    assert hit["reviewed_path"] and not rebuilt
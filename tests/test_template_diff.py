@@ -0,0 +1,37 @@
+import os
+
+from src.doc_classifier import TEMPLATE_DIR
+from src.template_diff import TemplateLibrary, template_deviations
+
+TEMPLATE = os.path.join(TEMPLATE_DIR, "articles_of_association.txt")
+
+
+def _template_lines():
+    with open(TEMPLATE, encoding="utf-8") as fh:
+        return fh.read().splitlines()
+
+
+def test_shipped_template_is_loaded():
+    library = TemplateLibrary()
+    assert [t.name for t in library.by_type["Articles of Association"]] == ["articles_of_association.txt"]
+
+
+def test_unmodified_document_has_no_deviations():
+    assert template_deviations("Articles of Association", _template_lines()) == []
+
+
+def test_modified_clause_is_flagged():
+    lines = _template_lines()
+    k = next(i for i, line in enumerate(lines) if line.startswith("5.1 "))
+    lines[k] = lines[k].replace("fourteen clear days", "seven days")
+    findings = template_deviations("Articles of Association", lines)
+    assert [(f["deviation"], f["paragraph_index"]) for f in findings] == [("altered", k)]
+    assert findings[0]["template"] == "articles_of_association.txt"
+
+
+def test_removed_clause_is_flagged():
+    lines = _template_lines()
+    k = next(i for i, line in enumerate(lines) if line.startswith("6.1 "))
+    del lines[k]
+    findings = template_deviations("Articles of Association", lines)
+    assert [f["deviation"] for f in findings] == ["removed"]